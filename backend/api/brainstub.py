@@ -0,0 +1,140 @@
+"""
+Stand-in remote brain with injected latency, and a run against it.
+
+Serves POST /decide in the remote brain protocol (backend/sim/remote.py):
+every actor moves to a random neighbouring ENVI, or eats from its inventory
+when below half HP. Each request is answered after --latency seconds plus a
+uniform 0..--jitter; a fraction --late of requests stalls for --stall seconds,
+far past any sensible deadline.
+
+  python -m backend.api.brainstub --serve --port 9000 --latency 0.05
+      just the stand-in; point CHARs at control = "remote:http://127.0.0.1:9000/decide"
+
+  python -m backend.api.brainstub worlds/nord.json --ticks 100 --latency 0.05 \\
+          --jitter 0.1 --late 0.1 --deadline 0.1
+      starts the stand-in on a free port, turns every CHAR with a brain
+      (--all: every CHAR) into a remote one and reports tick time and how
+      many answers came back in time, missed the deadline or failed
+
+The in-process stand-in shares the interpreter with the engine, so tick
+times include its request handling; run it with --serve separately for
+cleaner figures.
+"""
+
+import asyncio
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI
+
+from backend.api.loadtest import _free_port
+from backend.api.timing import percentiles_ms
+from backend.core.entity import EntityType
+from backend.core.world import World
+from backend.sim.engine import REMOTE, tick
+from backend.sim.remote import remote_of
+
+
+def _decide(actor: dict) -> list[dict]:
+    if actor["hp"] is not None and actor["hp_max"] and actor["hp"] * 2 < actor["hp_max"]:
+        if actor["inventory"]:
+            return [{"actor_id": actor["id"], "action": "EAT", "target_id": actor["inventory"][0][0]}]
+    if actor["neighbours"]:
+        return [{"actor_id": actor["id"], "action": "MOVE", "target_id": random.choice(actor["neighbours"])}]
+    return []
+
+
+def create_app(latency: float = 0.05, jitter: float = 0.0, late: float = 0.0,
+               stall: float = 10.0) -> FastAPI:
+    """FastAPI app answering /decide after the configured delay."""
+    app = FastAPI(title="PocketStory brain stub")
+    app.state.requests = 0
+
+    @app.post("/decide")
+    async def decide(body: dict) -> dict:
+        app.state.requests += 1
+        delay = stall if random.random() < late else latency + random.uniform(0.0, jitter)
+        await asyncio.sleep(delay)
+        return {"intents": [i for actor in body.get("actors", []) for i in _decide(actor)]}
+
+    return app
+
+
+def _serve_in_thread(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="brainstub", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def run(path: Path, ticks: int, latency: float, jitter: float, late: float,
+        stall: float, deadline: float, everyone: bool) -> dict:
+    port = _free_port()
+    server = _serve_in_thread(create_app(latency, jitter, late, stall), port)
+
+    world = World.load(path)
+    control = f"{REMOTE}http://127.0.0.1:{port}/decide"
+    remote = [
+        e for e in world.entities.values()
+        if e.type == EntityType.CHAR and (everyone or e.control is not None)
+    ]
+    for entity in remote:
+        entity.control = control
+    brains = remote_of(world)
+    brains.deadline = deadline
+
+    times: list[float] = []
+    for _ in range(ticks):
+        started = time.perf_counter()
+        tick(world)
+        times.append(time.perf_counter() - started)
+
+    brains.close()
+    server.should_exit = True
+    return {
+        "remote_chars": len(remote),
+        "ticks": ticks,
+        "tick_ms": percentiles_ms(times),
+        "deadline_ms": deadline * 1000,
+        **{k: brains.stats[k] for k in ("asked", "answered", "late", "failed")},
+    }
+
+
+def parse_args() -> dict:
+    opts = {"path": Path("worlds/nord.json"), "ticks": 50, "latency": 0.05, "jitter": 0.0,
+            "late": 0.0, "stall": 10.0, "deadline": 0.25, "everyone": False,
+            "serve": False, "port": 9000}
+    casts = {"--ticks": int, "--latency": float, "--jitter": float, "--late": float,
+             "--stall": float, "--deadline": float, "--port": int}
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in casts and i + 1 < len(args):
+            opts[args[i][2:]] = casts[args[i]](args[i + 1])
+            i += 2
+        elif args[i] == "--all":
+            opts["everyone"] = True
+            i += 1
+        elif args[i] == "--serve":
+            opts["serve"] = True
+            i += 1
+        else:
+            opts["path"] = Path(args[i])
+            i += 1
+    return opts
+
+
+if __name__ == "__main__":
+    opts = parse_args()
+    if opts.pop("serve"):
+        app = create_app(opts["latency"], opts["jitter"], opts["late"], opts["stall"])
+        uvicorn.run(app, port=opts["port"])
+    else:
+        del opts["port"]
+        for key, value in run(**opts).items():
+            print(f"{key:>12}: {value}")
@@ -0,0 +1,368 @@
+"""
+Graph export for the Three.js frontend (frontend/index.html).
+
+export_graph(world) turns a world into a compact, columnar node/edge payload
+with a precomputed 3D position for every node:
+
+  {"world": name, "tick": 42, "topology": "<hash>",
+   "types": ["CHAR", "ENVI", "UNIQUE", "SUMS"],
+   "ids": [...], "names": [...], "type": [index into types, …],
+   "pos": [x0, y0, z0, x1, y1, z1, …],
+   "location": [parent, child, …],      node indices, one pair per LOCATION
+   "adjacency": [a, b, …]}               node indices, one pair per EDGE
+
+Archetype/dialogue UNIQUEs (no LOCATION) are left out, as in the console.
+
+Layout, in two layers:
+
+  skeleton   ENVIs, hung on levels by LOCATION depth (y), seeded with each
+             ENVI's children on a sunflower disc below it and then relaxed
+             in the xz plane: EDGE neighbours and parent/child attract, ENVIs
+             on the same level repel (Fruchterman–Reingold per connected
+             component, repulsion only within neighbouring grid cells, so a
+             step is O(nodes + edges)). A chessboard of 64 EDGE-linked
+             squares comes out as a grid, a kingdom as a cone.
+  occupants  CHAR / UNIQUE / SUMS on small rings below their container.
+
+The skeleton is what is expensive and it rarely changes, so it is cached per
+topology hash (ENVI ids, their parents and EDGEs); occupants move every tick
+and are placed fresh on every export.
+
+Run:  python -m backend.api.graph worlds/chess.json [-o frontend/world.js]
+"""
+
+import hashlib
+import math
+import sys
+from collections import OrderedDict, deque
+from pathlib import Path
+
+from backend.core.entity import EntityType
+from backend.core.relation import RelationType
+from backend.core.world import World
+
+TYPES = [t.value for t in EntityType]
+
+LEVEL         = 2.5    # y distance between LOCATION depths of ENVIs
+SPACING       = 1.6    # preferred distance between neighbouring ENVIs
+OCCUPANT_DROP = 1.1    # y distance between a container and its occupants
+OCCUPANT_RING = 0.7    # ring radius for a container's occupants
+ITERATIONS    = 300    # force-directed steps per skeleton component
+RELAX_LIMIT   = 600    # larger connected components keep the seed layout
+CACHE_SIZE    = 16     # skeleton layouts kept in memory
+
+_GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+# topology hash → {envi id: (x, y, z)}
+_layouts: "OrderedDict[str, dict[str, tuple[float, float, float]]]" = OrderedDict()
+
+
+# ── Skeleton ────────────────────────────────────────────────────────────────
+
+def _skeleton(world: World) -> tuple[list[str], dict[str, str | None], list[tuple[str, str]]]:
+    """ENVI ids, their (first) ENVI parent and the EDGEs between them."""
+    envis = [e.id for e in world.entities.values() if e.type == EntityType.ENVI]
+    is_envi = set(envis)
+    parent: dict[str, str | None] = dict.fromkeys(envis)
+    for r in world.related(RelationType.LOCATION):
+        if r.ent2 in is_envi and r.ent1 in is_envi and parent[r.ent2] is None:
+            parent[r.ent2] = r.ent1
+    edges = [
+        (r.ent1, r.ent2) for r in world.related(RelationType.EDGE)
+        if r.ent1 in is_envi and r.ent2 in is_envi and r.ent1 != r.ent2
+    ]
+    return envis, parent, edges
+
+
+def topology_hash(envis: list[str], parent: dict[str, str | None],
+                  edges: list[tuple[str, str]]) -> str:
+    h = hashlib.sha1()
+    for eid in envis:
+        h.update(f"{eid}\0{parent[eid] or ''}\n".encode())
+    h.update(b"--\n")
+    for a, b in edges:
+        h.update(f"{a}\0{b}\n".encode())
+    return h.hexdigest()[:16]
+
+
+def _depths(envis: list[str], parent: dict[str, str | None]) -> dict[str, int]:
+    depth: dict[str, int] = {}
+    for eid in envis:
+        chain = []
+        node = eid
+        while node is not None and node not in depth and node not in chain:
+            chain.append(node)
+            node = parent[node]
+        base = depth.get(node, -1) if node is not None else -1   # -1: root or cycle
+        for i, n in enumerate(reversed(chain)):
+            depth[n] = base + 1 + i
+    return depth
+
+
+def _spiral(envis: list[str], parent: dict[str, str | None], depth: dict[str, int],
+            edges: list[tuple[str, str]]) -> dict[str, list[float]]:
+    """Nested sunflower layout: every ENVI's children on a Vogel spiral below it.
+
+    Discs are sized bottom-up by the footprint of the subtrees on them, so
+    sibling subtrees do not overlap on the levels below.
+    """
+    # Siblings in EDGE breadth-first order, so that neighbours start close together
+    adjacency: dict[str, list[str]] = {eid: [] for eid in envis}
+    for a, b in edges:
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+    rank: dict[str, int] = {}
+    for start in envis:
+        if start in rank:
+            continue
+        queue = deque([start])
+        rank[start] = len(rank)
+        while queue:
+            for n in adjacency[queue.popleft()]:
+                if n not in rank:
+                    rank[n] = len(rank)
+                    queue.append(n)
+
+    children: dict[str | None, list[str]] = {}
+    for eid in sorted(envis, key=rank.__getitem__):
+        children.setdefault(parent[eid], []).append(eid)
+
+    # Footprint radius of each subtree, leaves first. On a Vogel spiral with
+    # r = c·sqrt(i) neighbours end up about 1.9·c apart, so c ≈ the widest child.
+    footprint: dict[str, float] = {}
+    step: dict[str | None, float] = {}
+
+    def measure(node: str | None) -> float:
+        kids = children.get(node, ())
+        if not kids:
+            return SPACING / 2
+        widest = max(footprint[k] for k in kids)
+        step[node] = 1.05 * widest
+        return step[node] * math.sqrt(len(kids)) + widest
+
+    for eid in sorted(envis, key=depth.__getitem__, reverse=True):
+        footprint[eid] = measure(eid)
+    measure(None)
+
+    pos: dict[str, list[float]] = {}
+    stack: list[tuple[str | None, float, float]] = [(None, 0.0, 0.0)]
+    while stack:
+        node, x, z = stack.pop()
+        kids = children.get(node, ())
+        for i, kid in enumerate(kids):
+            r = step[node] * math.sqrt(i + 0.5) if len(kids) > 1 else 0.0
+            angle = i * _GOLDEN_ANGLE
+            kx, kz = x + r * math.cos(angle), z + r * math.sin(angle)
+            pos[kid] = [kx, -depth[kid] * LEVEL, kz]
+            stack.append((kid, kx, kz))
+    return pos
+
+
+def _components(envis: list[str], parent: dict[str, str | None],
+                edges: list[tuple[str, str]]) -> list[list[str]]:
+    """ENVIs grouped by connectivity through EDGEs and LOCATION parents."""
+    root = {eid: eid for eid in envis}
+
+    def find(a: str) -> str:
+        while root[a] != a:
+            root[a] = root[root[a]]
+            a = root[a]
+        return a
+
+    for a, b in edges + [(eid, p) for eid, p in parent.items() if p is not None]:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            root[ra] = rb
+    groups: dict[str, list[str]] = {}
+    for eid in envis:
+        groups.setdefault(find(eid), []).append(eid)
+    return list(groups.values())
+
+
+def _relax(members: list[str], parent: dict[str, str | None], edges: list[tuple[str, str]],
+           pos: dict[str, list[float]]) -> None:
+    """Fruchterman–Reingold for one component, in the xz plane of each level; y stays put.
+
+    The component keeps its centroid, so it stays where the seed layout put it.
+    """
+    n = len(members)
+    index = {eid: i for i, eid in enumerate(members)}
+    xs = [pos[eid][0] for eid in members]
+    zs = [pos[eid][2] for eid in members]
+    level = [pos[eid][1] for eid in members]
+    springs = [(index[a], index[b], 1.0) for a, b in edges if a in index]
+    springs += [(index[eid], index[parent[eid]], 0.2) for eid in members if parent[eid] is not None]
+    if n < 2 or not springs:
+        return
+    cx, cz = sum(xs) / n, sum(zs) / n
+
+    k = SPACING
+    cell = 2 * k
+    extent = max(max(abs(x - cx) for x in xs), max(abs(z - cz) for z in zs), k)
+    temperature = extent / 4
+    cooling = temperature / (ITERATIONS + 1)
+
+    for _ in range(ITERATIONS):
+        dx = [0.0] * n
+        dz = [0.0] * n
+        # Repulsion between nodes of one level, neighbouring grid cells only
+        grid: dict[tuple[float, int, int], list[int]] = {}
+        for i in range(n):
+            grid.setdefault((level[i], int(xs[i] // cell), int(zs[i] // cell)), []).append(i)
+        for (y, gx, gz), occupants in grid.items():
+            near = []
+            for ox in (-1, 0, 1):
+                for oz in (-1, 0, 1):
+                    near += grid.get((y, gx + ox, gz + oz), ())
+            for i in occupants:
+                xi, zi = xs[i], zs[i]
+                for j in near:
+                    if j == i:
+                        continue
+                    ex, ez = xi - xs[j], zi - zs[j]
+                    d2 = ex * ex + ez * ez
+                    if d2 > cell * cell:
+                        continue
+                    if d2 < 1e-9:
+                        ex, ez, d2 = (i - j) * 1e-3, 1e-3, 2e-6   # coincident: nudge apart
+                    f = k * k / d2
+                    dx[i] += ex * f
+                    dz[i] += ez * f
+        # Attraction along EDGEs and towards the parent
+        for i, j, weight in springs:
+            ex, ez = xs[i] - xs[j], zs[i] - zs[j]
+            d = math.sqrt(ex * ex + ez * ez)
+            if d < 1e-9:
+                continue
+            f = weight * d / k
+            dx[i] -= ex * f
+            dz[i] -= ez * f
+            dx[j] += ex * f
+            dz[j] += ez * f
+        for i in range(n):
+            d = math.sqrt(dx[i] * dx[i] + dz[i] * dz[i])
+            if d > 0:
+                step = min(d, temperature) / d
+                xs[i] += dx[i] * step
+                zs[i] += dz[i] * step
+        temperature -= cooling
+
+    shift_x, shift_z = cx - sum(xs) / n, cz - sum(zs) / n
+    for i, eid in enumerate(members):
+        pos[eid][0] = xs[i] + shift_x
+        pos[eid][2] = zs[i] + shift_z
+
+
+def skeleton_layout(world: World) -> tuple[str, dict[str, tuple[float, float, float]]]:
+    """(topology hash, ENVI positions) — computed once per topology."""
+    envis, parent, edges = _skeleton(world)
+    key = topology_hash(envis, parent, edges)
+    layout = _layouts.get(key)
+    if layout is None:
+        pos = _spiral(envis, parent, _depths(envis, parent), edges)
+        for members in _components(envis, parent, edges):
+            # Without global repulsion (Barnes–Hut) a big graph folds into a
+            # clump; large components keep their seed layout.
+            if len(members) <= RELAX_LIMIT:
+                _relax(members, parent, edges, pos)
+        layout = {eid: (p[0], p[1], p[2]) for eid, p in pos.items()}
+        _layouts[key] = layout
+        if len(_layouts) > CACHE_SIZE:
+            _layouts.popitem(last=False)
+    else:
+        _layouts.move_to_end(key)
+    return key, layout
+
+
+# ── Export ──────────────────────────────────────────────────────────────────
+
+def export_graph(world: World) -> dict:
+    """The world as the frontend's node/edge payload (see the module docstring)."""
+    topology, layout = skeleton_layout(world)
+
+    located: dict[str, list[str]] = {}   # child id → container ids, world order
+    for r in world.related(RelationType.LOCATION):
+        if r.ent1 in world.entities and r.ent2 in world.entities:
+            located.setdefault(r.ent2, []).append(r.ent1)
+    nodes = [
+        e for e in world.entities.values()
+        if not (e.type == EntityType.UNIQUE and e.id not in located)
+    ]
+    index = {e.id: i for i, e in enumerate(nodes)}
+
+    # Occupants hang on rings below their first container, nesting downwards
+    occupants: dict[str | None, list[str]] = {}
+    for e in nodes:
+        if e.type != EntityType.ENVI:
+            container = next((c for c in located.get(e.id, ()) if c in index), None)
+            occupants.setdefault(container, []).append(e.id)
+    top = max((p[1] for p in layout.values()), default=0.0) + LEVEL
+    pos: dict[str, tuple[float, float, float]] = dict(layout)
+    queue = deque([None, *layout])
+    while queue:
+        container = queue.popleft()
+        kids = occupants.get(container)
+        if not kids:
+            continue
+        cx, cy, cz = pos[container] if container is not None else (0.0, top, 0.0)
+        ring = OCCUPANT_RING * (1 + len(kids) / 8) if len(kids) > 1 else 0.0
+        for i, kid in enumerate(kids):
+            angle = 2 * math.pi * i / len(kids)
+            pos[kid] = (cx + ring * math.cos(angle), cy - OCCUPANT_DROP, cz + ring * math.sin(angle))
+            queue.append(kid)
+
+    flat_pos: list[float] = []
+    for e in nodes:
+        x, y, z = pos.get(e.id, (0.0, 0.0, 0.0))
+        flat_pos += (round(x, 2), round(y, 2), round(z, 2))
+    location: list[int] = []
+    for child, containers in located.items():
+        if child in index:
+            for c in containers:
+                if c in index:
+                    location += (index[c], index[child])
+    adjacency: list[int] = []
+    for r in world.related(RelationType.EDGE):
+        if r.ent1 in index and r.ent2 in index:
+            adjacency += (index[r.ent1], index[r.ent2])
+
+    return {
+        "world": world.name,
+        "tick": world.meta.tick,
+        "topology": topology,
+        "types": TYPES,
+        "ids": [e.id for e in nodes],
+        "names": [e.name for e in nodes],
+        "type": [TYPES.index(e.type.value) for e in nodes],
+        "pos": flat_pos,
+        "location": location,
+        "adjacency": adjacency,
+    }
+
+
+def parse_args() -> tuple[Path, Path]:
+    """Returns (world_path, output_path)."""
+    path = Path("worlds/nord.json")
+    out = Path("frontend/world.js")
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in ("-o", "--out") and i + 1 < len(args):
+            out = Path(args[i + 1])
+            i += 2
+        else:
+            path = Path(args[i])
+            i += 1
+    return path, out
+
+
+if __name__ == "__main__":
+    import json
+
+    path, out = parse_args()
+    payload = json.dumps(export_graph(World.load(path)), ensure_ascii=False, separators=(",", ":"))
+    # A classic script, so index.html also works from file:// where fetch() is blocked
+    if out.suffix == ".js":
+        payload = f"window.WORLD_GRAPH = {payload};\n"
+    out.write_text(payload, encoding="utf-8")
+    print(f"{path} -> {out}")
@@ -0,0 +1,141 @@
+"""
+Load test for the simulation server: a local swarm of WebSocket clients.
+
+Starts the server in-process on a free port (or targets --url), connects
+--clients flow-controlled subscribers (/ws?window=WINDOW, see server.py),
+--slow of which sleep after every message so the backpressure path gets
+exercised, and after --seconds reports:
+
+  tick jitter / duration   server side, from GET /stats
+  fan-out latency          client receive time - the frame's "sent" stamp,
+                           for normal and slow clients separately
+  frames, resyncs, drops   per swarm
+
+Run:  python -m backend.api.loadtest worlds/nord.json --clients 200 --slow 10 --rate 20 --seconds 10
+
+In-process clients share the event loop with the server, so the figures
+are pessimistic; point --url at a separately started server to split them.
+"""
+
+import asyncio
+import json
+import socket
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+import websockets
+
+from backend.api.server import create_app
+from backend.api.timing import percentiles_ms
+from backend.core.world import World
+
+SLOW_CLIENT_DELAY = 0.5   # seconds a slow client sleeps per message
+WINDOW = 4                # ticks a client lets the server run ahead of its acks
+
+
+class _Swarm:
+    """Counters shared by a group of clients."""
+
+    def __init__(self):
+        self.latency: list[float] = []
+        self.frames = 0
+        self.snapshots = 0
+        self.errors = 0
+
+    def report(self) -> dict:
+        return {"fanout_ms": percentiles_ms(self.latency), "frames": self.frames,
+                "snapshots": self.snapshots, "errors": self.errors}
+
+
+async def _client(url: str, slow: bool, swarm: _Swarm, stop: asyncio.Event) -> None:
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            while not stop.is_set():
+                try:
+                    msg = await asyncio.wait_for(ws.recv(), 0.5)
+                except asyncio.TimeoutError:
+                    continue
+                received = time.time()
+                frame = json.loads(msg)
+                if frame["type"] == "tick":
+                    swarm.frames += 1
+                    swarm.latency.append(received - frame["sent"])
+                else:
+                    swarm.snapshots += 1
+                if slow:
+                    await asyncio.sleep(SLOW_CLIENT_DELAY)
+                await ws.send(json.dumps({"ack": frame["tick"]}))
+    except (OSError, websockets.WebSocketException):
+        swarm.errors += 1
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run(path: Path, clients: int, slow: int, rate: float, seconds: float,
+              url: str | None = None) -> dict:
+    server = None
+    if url is None:
+        port = _free_port()
+        app = create_app(World.load(path), tps=rate)
+        server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+        url = f"http://127.0.0.1:{port}"
+
+    ws_url = url.replace("http", "ws", 1) + f"/ws?window={WINDOW}"
+    # A slow client's latency is mostly its own backlog: report it separately.
+    fast, laggy = _Swarm(), _Swarm()
+    stop = asyncio.Event()
+    tasks = [
+        asyncio.create_task(_client(ws_url, i < slow, laggy if i < slow else fast, stop))
+        for i in range(clients)
+    ]
+    await asyncio.sleep(seconds)
+    async with httpx.AsyncClient() as http:
+        stats = (await http.get(url + "/stats")).json()
+    stop.set()
+    await asyncio.gather(*tasks)
+
+    if server is not None:
+        server.should_exit = True
+        await serving
+
+    return {
+        "clients": clients,
+        "ticks": stats["tick"],
+        "tick_ms": stats["tick_ms"],
+        "jitter_ms": stats["jitter_ms"],
+        "dropped": stats["dropped"],
+        "fast": fast.report(),
+        "slow": laggy.report(),
+    }
+
+
+def parse_args() -> dict:
+    opts = {"path": Path("worlds/nord.json"), "clients": 100, "slow": 5,
+            "rate": 20.0, "seconds": 10.0, "url": None}
+    casts = {"--clients": int, "--slow": int, "--rate": float, "--seconds": float, "--url": str}
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in casts and i + 1 < len(args):
+            opts[args[i][2:]] = casts[args[i]](args[i + 1])
+            i += 2
+        else:
+            opts["path"] = Path(args[i])
+            i += 1
+    return opts
+
+
+if __name__ == "__main__":
+    report = asyncio.run(run(**parse_args()))
+    for key, value in report.items():
+        print(f"{key:>13}: {value}")
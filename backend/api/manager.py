@@ -0,0 +1,257 @@
+"""
+Multi-world host: many pocket worlds in one process, few of them in memory.
+
+WorldManager keeps the worlds it was asked for recently in an LRU under a
+memory budget. A world pushed out is written to a snapshot file in the state
+directory and dropped; the next get() loads it back — from the snapshot, or
+from its source file if it was never evicted.
+
+World time keeps running while nobody looks: every world advances at `tps`
+ticks per wall-clock second. get() catches a world up for the time since it
+was last synced (at most max_catch_up ticks) with run_events(), so a world
+that sat on disk for an hour comes back an hour older, at the cost of the
+events in between rather than of every tick.
+
+    manager = WorldManager("state/", budget=256 * 2**20, tps=1.0)
+    manager.register("alice", "worlds/nord.json")
+    manager.register("bob", "worlds/valley")      # a world package
+    world = manager.get("alice")
+    manager.stats()        # hit rate, load latency, resident worlds and bytes
+
+What a snapshot does not hold comes from the registered source on every load:
+the dialogue templates next to a world file, or a package's templates and
+hook workers (backend/sim/hooks.py). Eviction stops the hook workers.
+
+Memory is estimated, not measured: ESTIMATE_BASE plus ESTIMATE_PER_ITEM bytes
+per entity and relation (calibrated with tracemalloc on the bundled and
+generated worlds after a few ticks, 500–950 B per item). stats() also reports
+the process RSS where the platform exposes it.
+
+Run:  python -m backend.api.manager worlds/nord.json --worlds 2000 --budget 8 \\
+          --accesses 20000 --zipf 1.1 --tps 1
+      simulated access pattern over copies of the given world(s); budget in MiB
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from backend.api.timing import percentiles_ms
+from backend.core.diff import replica, snapshot
+from backend.core.world import World
+from backend.sim.dialogue import load_dialogue
+from backend.sim.hooks import MANIFEST, hooks_of, load_hooks, load_manifest
+from backend.sim.scheduler import run_events
+
+ESTIMATE_BASE = 16 * 1024      # bytes per world besides its entities and relations
+ESTIMATE_PER_ITEM = 700        # bytes per entity or relation
+MAX_CATCH_UP = 100_000         # ticks
+
+
+def estimate_size(world: World) -> int:
+    """Rough resident size of a world in bytes (see the module docstring)."""
+    return ESTIMATE_BASE + ESTIMATE_PER_ITEM * (len(world.entities) + len(world.relations))
+
+
+def _rss() -> int | None:
+    """Resident set size of this process in bytes, or None if unknown."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+@dataclass
+class _Resident:
+    world: World
+    size: int            # estimate_size() when loaded or last touched
+    synced: float        # wall-clock time the world's tick corresponds to
+
+
+class WorldManager:
+    """LRU of live worlds under a memory budget, backed by snapshot files."""
+
+    def __init__(self, state_dir: str | Path, budget: int = 256 * 2**20, tps: float = 1.0,
+                 max_catch_up: int = MAX_CATCH_UP, clock: Callable[[], float] = time.time):
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.budget = budget
+        self.tps = tps
+        self.max_catch_up = max_catch_up
+        self.clock = clock          # wall time; snapshots outlive the process
+        self.sources: dict[str, Path] = {}
+        self.resident: OrderedDict[str, _Resident] = OrderedDict()   # least recent first
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.caught_up = 0          # ticks run by catch-up
+        self.load_times: deque[float] = deque(maxlen=1000)   # seconds per miss, catch-up included
+
+    # ── Registry ────────────────────────────────────────────────────────────
+
+    def register(self, world_id: str, source: str | Path) -> None:
+        """Make world_id loadable; source is its world file or package directory.
+
+        The world state comes from the source until the world is first evicted
+        and from its snapshot after that; dialogue and hooks always come from
+        the source.
+        """
+        self.sources[world_id] = Path(source)
+
+    def _snapshot_path(self, world_id: str) -> Path:
+        return self.state_dir / f"{world_id}.json"
+
+    # ── Access ──────────────────────────────────────────────────────────────
+
+    def get(self, world_id: str) -> World:
+        """The world, resident and caught up to now; raises ValueError if unknown."""
+        entry = self.resident.get(world_id)
+        if entry is not None:
+            self.hits += 1
+            self.resident.move_to_end(world_id)
+            self._catch_up(entry)
+        else:
+            self.misses += 1
+            started = time.perf_counter()
+            entry = self.resident[world_id] = self._load(world_id)
+            self._catch_up(entry)
+            self.load_times.append(time.perf_counter() - started)
+        size = estimate_size(entry.world)
+        self.resident_bytes += size - entry.size
+        entry.size = size
+        self._shrink()
+        return entry.world
+
+    def _load(self, world_id: str) -> _Resident:
+        path = self._snapshot_path(world_id)
+        source = self.sources.get(world_id)
+        package = None
+        if source is not None and (source.is_dir() or source.name == MANIFEST):
+            package = load_manifest(source)
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            world, synced = replica(data["world"]), data["synced"]
+        elif source is not None:
+            world, synced = World.load(package.world if package else source), self.clock()
+        else:
+            raise ValueError(f"Unknown world '{world_id}'")
+        if package is not None:
+            load_dialogue(world, package.world)
+            load_hooks(world, package.root)
+        elif source is not None:
+            load_dialogue(world, source)
+        size = estimate_size(world)
+        self.resident_bytes += size
+        return _Resident(world, size, synced)
+
+    def _catch_up(self, entry: _Resident) -> None:
+        now = self.clock()
+        due = int((now - entry.synced) * self.tps)
+        if due <= 0:
+            return
+        if due > self.max_catch_up:
+            due = self.max_catch_up
+            entry.synced = now                # time beyond the cap is forgone, not owed
+        else:
+            entry.synced += due / self.tps    # keeps the fraction of a tick left over
+        run_events(entry.world, due)
+        self.caught_up += due
+
+    # ── Eviction ────────────────────────────────────────────────────────────
+
+    def _shrink(self) -> None:
+        # The world just asked for is the most recent entry; it always stays
+        while self.resident_bytes > self.budget and len(self.resident) > 1:
+            self.evict(next(iter(self.resident)))
+
+    def evict(self, world_id: str) -> None:
+        """Write a resident world's snapshot and drop it from memory."""
+        entry = self.resident.pop(world_id)
+        path = self._snapshot_path(world_id)
+        tmp = path.with_suffix(".tmp")
+        data = {"world": snapshot(entry.world), "synced": entry.synced}
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)   # a crash mid-write leaves the previous snapshot
+        hooks_of(entry.world).close()
+        self.resident_bytes -= entry.size
+        self.evictions += 1
+
+    def close(self) -> None:
+        """Evict everything, so the state directory holds every world."""
+        for world_id in list(self.resident):
+            self.evict(world_id)
+
+    # ── Metrics ─────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "registered": len(self.sources),
+            "resident": len(self.resident),
+            "resident_bytes": self.resident_bytes,
+            "budget": self.budget,
+            "rss_bytes": _rss(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 4) if requests else None,
+            "evictions": self.evictions,
+            "caught_up_ticks": self.caught_up,
+            "load_ms": percentiles_ms(self.load_times),
+        }
+
+
+def run(paths: list[Path], worlds: int, budget: float, accesses: int, zipf: float,
+        tps: float, step: float, state_dir: Path | None = None) -> dict:
+    """Simulated host: `accesses` get() calls, Zipf-distributed over `worlds` worlds.
+
+    A virtual clock moves `step` seconds per access, so catch-up is exercised
+    without waiting.
+    """
+    now = [0.0]
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = WorldManager(state_dir or tmp, int(budget * 2**20), tps, clock=lambda: now[0])
+        ids = [f"w{i:05d}" for i in range(worlds)]
+        for i, world_id in enumerate(ids):
+            manager.register(world_id, paths[i % len(paths)])
+        weights = [1.0 / (rank + 1) ** zipf for rank in range(worlds)]
+        started = time.perf_counter()
+        for world_id in random.choices(ids, weights, k=accesses):
+            now[0] += step
+            manager.get(world_id)
+        seconds = time.perf_counter() - started
+        stats = manager.stats()
+        manager.close()
+    return {"seconds": round(seconds, 2), "accesses/s": round(accesses / seconds), **stats}
+
+
+def parse_args() -> dict:
+    opts = {"paths": [], "worlds": 1000, "budget": 8.0, "accesses": 10_000,
+            "zipf": 1.1, "tps": 1.0, "step": 0.01, "state_dir": None}
+    casts = {"--worlds": int, "--budget": float, "--accesses": int, "--zipf": float,
+             "--tps": float, "--step": float, "--state": Path}
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in casts and i + 1 < len(args):
+            key = "state_dir" if args[i] == "--state" else args[i][2:]
+            opts[key] = casts[args[i]](args[i + 1])
+            i += 2
+        else:
+            opts["paths"].append(Path(args[i]))
+            i += 1
+    opts["paths"] = opts["paths"] or [Path("worlds/nord.json")]
+    return opts
+
+
+if __name__ == "__main__":
+    for key, value in run(**parse_args()).items():
+        print(f"{key:>16}: {value}")
@@ -0,0 +1,333 @@
+"""
+Async simulation server (FastAPI).
+
+A SimHost owns one World and runs tick() on a background asyncio task at a
+configurable rate. After every tick it fans a delta out to all WebSocket
+subscribers:
+
+  GET  /          the Three.js viewer (frontend/index.html)
+  GET  /world     full snapshot — backend.core.diff.snapshot() plus the tick number
+                  (?tick=N: the world at a past tick, with --history on)
+  GET  /graph     graph payload with a precomputed 3D layout (backend/api/graph.py)
+  GET  /stats     tick rate, tick duration and jitter, subscribers, dropped frames
+  POST /rate      {"tps": 20} — change the tick rate (0 = paused)
+  (autosave stats appear under /stats when --autosave is on, per-hook
+  latencies when the world is a package with hooks)
+  WS   /ws        one "snapshot" message, then one "tick" message per tick
+                  (?window=N turns on flow control, see below)
+
+Tick message: a WorldDiff (backend/core/diff.py) in its to_dict() form plus
+the tick's log lines and a send timestamp:
+  {"type": "tick", "since": 41, "tick": 42, "sent": <unix time>,
+   "hp": {entity_id: hp}, "moved": [[relation_id, new_ent1]],
+   "added": [relation dicts], "removed": [relation ids],
+   "stacks": [[relation_id, number, hp, decay anchor or null]],
+   "entities_added": [entity dicts], "entities_removed": [entity ids],
+   "events": [log lines]}
+
+A Python client keeps a replica with replica(snapshot["world"]) and
+WorldDiff.from_dict(message).apply(replica).
+
+Backpressure: each subscriber has a bounded queue. A client too slow to
+drain it loses its queued frames and gets a fresh snapshot instead; frames
+with tick <= the snapshot's tick are stale and should be skipped. The
+simulation never waits for a socket.
+
+Socket buffers can hide a slow client for a long time, so clients may opt in
+to flow control: connect to /ws?window=N and send {"ack": tick} after
+handling each message. The server then stays at most N ticks ahead of the
+last ack; frames beyond that wait in the queue, where they overflow into a
+resync.
+
+Run:  python -m backend.api.server worlds/nord.json --rate 10 --port 8000
+      [--autosave 100 --keep 3 --compress gzip --saves state/]
+      autosave every 100 ticks in the background (backend/api/autosave.py)
+      [--history 100]  keyframe every 100 ticks for /world?tick= (backend/sim/history.py)
+      python -m backend.api.server worlds/valley
+      a world package directory: world.yaml, world JSON and hooks (backend/sim/hooks.py)
+"""
+
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse
+
+from backend.api.graph import export_graph
+from backend.api.timing import percentiles_ms
+from backend.core.diff import DiffRecorder, snapshot
+from backend.core.world import World
+from backend.sim.dialogue import load_dialogue
+from backend.sim.engine import tick
+from backend.sim.hooks import hooks_of, load_manifest, open_package
+
+FRONTEND = Path(__file__).resolve().parents[2] / "frontend" / "index.html"
+_RESYNC = object()   # queue marker: send a snapshot instead of the dropped frames
+
+
+class _Subscriber:
+    """Bounded outgoing queue and flow-control window of one WebSocket client."""
+
+    def __init__(self, size: int, window: int | None):
+        self.queue: asyncio.Queue = asyncio.Queue(size)
+        self.window = window           # None = no flow control
+        self.dropped = 0
+        self.sent = 0                  # tick of the last message written
+        self.acked = 0                 # last tick the client confirmed
+        self._ack = asyncio.Event()
+
+    def offer(self, tick_no: int, data: str) -> None:
+        try:
+            self.queue.put_nowait((tick_no, data))
+        except asyncio.QueueFull:
+            # Too slow: throw the backlog away and resync with a snapshot.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.dropped += 1
+            self.queue.put_nowait((tick_no, _RESYNC))
+
+    def ack(self, tick_no: int) -> None:
+        self.acked = max(self.acked, tick_no)
+        self._ack.set()
+
+    async def wait_window(self) -> None:
+        while self.window is not None and self.sent - self.acked >= self.window:
+            self._ack.clear()
+            await self._ack.wait()
+
+
+class SimHost:
+    """Runs one world's tick loop and publishes per-tick deltas."""
+
+    def __init__(self, world: World, tps: float = 1.0, queue_size: int = 8, autosave=None,
+                 history=None):
+        self.world = world
+        self.autosave = autosave                 # backend.api.autosave.Autosave or None
+        self.history = history                   # backend.sim.history.History or None
+        self.tps = tps
+        self.queue_size = queue_size
+        self.subscribers: set[_Subscriber] = set()
+        self.recorder = DiffRecorder(world)
+        self.dropped = 0                         # frames dropped by departed clients
+        self.tick_times: deque[float] = deque(maxlen=1000)   # seconds per tick()
+        self.jitter: deque[float] = deque(maxlen=1000)       # |actual - planned| start
+        self._rate_changed = asyncio.Event()
+
+    # ── Tick loop ───────────────────────────────────────────────────────────
+
+    def set_rate(self, tps: float) -> None:
+        self.tps = max(0.0, tps)
+        self._rate_changed.set()
+
+    async def run(self) -> None:
+        """Tick at self.tps until cancelled; a late tick never triggers a burst."""
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+        while True:
+            if self.tps <= 0:
+                self._rate_changed.clear()
+                await self._rate_changed.wait()
+                next_at = loop.time()
+                continue
+            delay = next_at - loop.time()
+            if delay > 0:
+                self._rate_changed.clear()
+                try:
+                    await asyncio.wait_for(self._rate_changed.wait(), delay)
+                    next_at = loop.time()   # new rate: restart the schedule now
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(0)   # let the sockets drain between ticks
+            started = loop.time()
+            self.jitter.append(abs(started - next_at))
+            frame = self.step()
+            if self.history is not None:
+                self.history.record()
+            if self.autosave is not None:
+                self.autosave.after_tick()
+            self.tick_times.append(loop.time() - started)
+            self.publish(frame)
+            next_at += 1.0 / self.tps
+            if loop.time() > next_at + 1.0 / self.tps:
+                next_at = loop.time()   # fell behind by a full period: skip, don't catch up
+
+    def step(self) -> dict:
+        """One tick; returns its delta frame."""
+        events = tick(self.world)
+        return {"type": "tick", **self.recorder.take().to_dict(), "events": events}
+
+    # ── Fan-out ─────────────────────────────────────────────────────────────
+
+    def publish(self, frame: dict) -> None:
+        frame["sent"] = time.time()
+        data = json.dumps(frame, ensure_ascii=False)   # encoded once for everyone
+        for sub in self.subscribers:
+            sub.offer(frame["tick"], data)
+
+    def snapshot(self) -> dict:
+        return {"type": "snapshot", "tick": self.world.meta.tick, "world": snapshot(self.world)}
+
+    def snapshot_at(self, tick_no: int) -> dict:
+        """The snapshot of a past tick; raises ValueError without history or outside it."""
+        if self.history is None:
+            raise ValueError("No history recorded (start the server with --history)")
+        # A re-simulation runs on the loop: at most one keyframe interval of ticks
+        past = self.history.world_at(tick_no, limit=self.history.every)
+        return {"type": "snapshot", "tick": tick_no, "world": snapshot(past)}
+
+    async def serve(self, ws: WebSocket, window: int | None = None) -> None:
+        """Stream snapshot + deltas to one client until it disconnects."""
+        sub = _Subscriber(self.queue_size, window)
+        self.subscribers.add(sub)
+        sender = asyncio.create_task(self._pump(ws, sub))
+        try:
+            while True:
+                try:
+                    msg = json.loads(await ws.receive_text())
+                except ValueError:
+                    continue
+                if isinstance(msg, dict) and isinstance(msg.get("ack"), int):
+                    sub.ack(msg["ack"])
+        except (WebSocketDisconnect, RuntimeError):
+            pass   # RuntimeError: receive after the sender already saw the close
+        finally:
+            sender.cancel()
+            self.subscribers.discard(sub)
+            self.dropped += sub.dropped
+
+    async def _pump(self, ws: WebSocket, sub: _Subscriber) -> None:
+        sub.sent = sub.acked = self.world.meta.tick
+        await ws.send_text(json.dumps(self.snapshot(), ensure_ascii=False))
+        while True:
+            await sub.wait_window()   # before get(): waiting frames stay droppable
+            tick_no, data = await sub.queue.get()
+            if data is _RESYNC:
+                tick_no = self.world.meta.tick
+                data = json.dumps(self.snapshot(), ensure_ascii=False)
+            sub.sent = tick_no
+            await ws.send_text(data)
+
+    def stats(self) -> dict:
+        return {
+            "tick": self.world.meta.tick,
+            "tps": self.tps,
+            "subscribers": len(self.subscribers),
+            "dropped": self.dropped + sum(s.dropped for s in self.subscribers),
+            "tick_ms": percentiles_ms(self.tick_times),
+            "jitter_ms": percentiles_ms(self.jitter),
+            "autosave": self.autosave.stats() if self.autosave is not None else None,
+            "hooks": hooks_of(self.world).stats() or None,
+        }
+
+
+def create_app(world: World, tps: float = 1.0, queue_size: int = 8, autosave=None,
+               history=None) -> FastAPI:
+    """FastAPI app serving one world; the tick loop runs for the app's lifetime."""
+    host = SimHost(world, tps, queue_size, autosave, history)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        task = asyncio.create_task(host.run())
+        yield
+        task.cancel()
+        if host.autosave is not None:
+            host.autosave.close()   # a last save of the final tick
+        hooks_of(world).close()
+
+    app = FastAPI(title="PocketStory", lifespan=lifespan)
+    app.state.host = host
+
+    @app.get("/")
+    def get_viewer() -> FileResponse:
+        return FileResponse(FRONTEND)
+
+    # Handlers that read or change the world are async: they run on the event
+    # loop between two ticks, never in the threadpool alongside one.
+    @app.get("/world")
+    async def get_world(tick: int | None = None) -> dict:
+        if tick is None or tick == host.world.meta.tick:
+            return host.snapshot()
+        try:
+            return host.snapshot_at(tick)
+        except ValueError as e:
+            raise HTTPException(404, str(e))
+
+    @app.get("/graph")
+    async def get_graph() -> dict:
+        return export_graph(host.world)
+
+    @app.get("/stats")
+    async def get_stats() -> dict:
+        return host.stats()
+
+    @app.post("/rate")
+    async def post_rate(body: dict) -> dict:
+        host.set_rate(float(body.get("tps", host.tps)))
+        return {"tps": host.tps}
+
+    @app.websocket("/ws")
+    async def ws_stream(ws: WebSocket, window: int | None = None) -> None:
+        await ws.accept()
+        await host.serve(ws, window)
+
+    return app
+
+
+def parse_args() -> tuple[Path, float, str, int, dict]:
+    """Returns (world_path, ticks_per_second, host, port, autosave / history options)."""
+    path = Path("worlds/nord.json")
+    rate = 1.0
+    host = "127.0.0.1"
+    port = 8000
+    opts = {"every": None, "keep": 3, "compress": None, "saves": Path("state"), "history": None}
+    casts = {"--autosave": int, "--keep": int, "--compress": str, "--saves": Path, "--history": int}
+
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] == "--rate" and i + 1 < len(args):
+            rate = float(args[i + 1])
+            i += 2
+        elif args[i] == "--host" and i + 1 < len(args):
+            host = args[i + 1]
+            i += 2
+        elif args[i] == "--port" and i + 1 < len(args):
+            port = int(args[i + 1])
+            i += 2
+        elif args[i] in casts and i + 1 < len(args):
+            key = "every" if args[i] == "--autosave" else args[i][2:]
+            opts[key] = casts[args[i]](args[i + 1])
+            i += 2
+        else:
+            path = Path(args[i])
+            i += 1
+
+    return path, rate, host, port, opts
+
+
+if __name__ == "__main__":
+    import uvicorn
+    from backend.api.autosave import Autosave
+    from backend.sim.history import History
+
+    path, rate, host, port, opts = parse_args()
+    if path.is_dir():   # a world package: world.yaml, world JSON, hooks
+        world = open_package(path)
+        path = load_manifest(path).world
+    else:
+        world = World.load(path)
+        load_dialogue(world, path)
+    saver = history = None
+    if opts["every"]:
+        saver = Autosave(world, opts["saves"] / path.name, opts["every"], opts["keep"], opts["compress"])
+    if opts["history"]:
+        history = History(world, every=opts["history"])
+    uvicorn.run(create_app(world, tps=rate, autosave=saver, history=history), host=host, port=port)
@@ -0,0 +1,16 @@
+"""
+Latency summaries for the stats the server, the world manager, autosave and
+the load and brain stand-in scripts report.
+
+Kept out of server.py so that modules which only report timings do not pull
+in FastAPI.
+"""
+
+
+def percentiles_ms(values) -> dict:
+    """p50 / p99 / max of a sample of seconds, in milliseconds."""
+    if not values:
+        return {"p50": None, "p99": None, "max": None}
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+    return {"p50": pick(0.50), "p99": pick(0.99), "max": round(ordered[-1] * 1000, 3)}
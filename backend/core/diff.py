@@ -0,0 +1,245 @@
+"""
+Per-tick world diffs from mutation tracking.
+
+A DiffRecorder listens to the World change feed (World.subscribe()) and turns
+everything written since the last take() into a WorldDiff: entity hp, added /
+removed / re-parented relations, stack number and hp, added / removed
+entities and the meta.tick bump. Nothing is compared — only what was written
+ends up in the diff, with its value at take() time.
+
+    recorder = DiffRecorder(world)
+    tick(world)
+    diff = recorder.take()            # since = tick before, tick = tick after
+    diff.apply(replica)               # replica now matches world
+
+Diffs compose: compose([d10, d11, …, d19]) is one diff from tick 10 to 20,
+with overwritten values and short-lived relations folded away.
+
+Stacks draining in closed form (Relation.decay, backend/sim/stacks.py) change
+hp every tick without writes; the diff carries their anchor (hp0, t0, drain,
+cap) instead, and a replica derives the hp from its own meta.tick. Use
+snapshot() / replica() rather than to_dict() / from_dict() to bootstrap a
+replica, so the anchors come along.
+
+meta.vars (e.g. triggers_fired) is written directly by the engine and is not
+part of a diff.
+"""
+
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from .entity import Entity
+from .relation import Decay, Relation
+from .world import Change, World, _dict_to_entity, _dict_to_relation, _entity_to_dict, _relation_to_dict
+
+# (hp0, t0, drain, cap) of a Decay — see Relation.decay
+Anchor = tuple[int, int, int, int]
+
+
+@dataclass
+class WorldDiff:
+    """Everything written to a world between meta.tick == since and meta.tick == tick."""
+    since: int
+    tick: int
+    hp: dict[str, int | None] = field(default_factory=dict)            # entity id → hp
+    added: dict[int, dict] = field(default_factory=dict)              # relation id → relation dict
+    removed: list[int] = field(default_factory=list)                  # relation ids
+    moved: dict[int, str] = field(default_factory=dict)               # LOCATION id → new ent1
+    stacks: dict[int, tuple[int, int | None, Anchor | None]] = field(default_factory=dict)
+    entities_added: dict[str, dict] = field(default_factory=dict)     # entity id → entity dict
+    entities_removed: list[str] = field(default_factory=list)
+
+    # ── Composition ─────────────────────────────────────────────────────────
+
+    def then(self, later: "WorldDiff") -> "WorldDiff":
+        """The diff of self followed by later (later.since must be self.tick)."""
+        if later.since != self.tick:
+            raise ValueError(f"Diff from tick {later.since} does not follow a diff ending at {self.tick}")
+        gone = set(later.removed)
+        gone_entities = set(later.entities_removed)
+        added = {rid: d for rid, d in self.added.items() if rid not in gone}
+        added.update(later.added)
+        entities_added = {eid: d for eid, d in self.entities_added.items() if eid not in gone_entities}
+        entities_added.update(later.entities_added)
+        return WorldDiff(
+            since=self.since,
+            tick=later.tick,
+            hp={**{eid: hp for eid, hp in self.hp.items() if eid not in gone_entities}, **later.hp},
+            added=added,
+            # Relations that lived only inside the combined window drop out entirely
+            removed=self.removed + [
+                rid for rid in later.removed
+                if rid not in self.added and rid not in self.removed
+            ],
+            moved={**{rid: e for rid, e in self.moved.items() if rid not in gone}, **later.moved},
+            stacks={**{rid: s for rid, s in self.stacks.items() if rid not in gone}, **later.stacks},
+            entities_added=entities_added,
+            entities_removed=self.entities_removed + [
+                eid for eid in later.entities_removed
+                if eid not in self.entities_added and eid not in self.entities_removed
+            ],
+        )
+
+    # ── Replica ─────────────────────────────────────────────────────────────
+
+    def apply(self, world: World) -> None:
+        """Replay the diff on a replica sitting at tick `since`.
+
+        Goes through World methods, so the replica's own subscribers (a UI, a
+        further DiffRecorder) see the changes. Rules are not re-validated —
+        the source world already did.
+        """
+        if world.meta.tick != self.since:
+            raise ValueError(f"Diff starts at tick {self.since}, world is at tick {world.meta.tick}")
+        for rid in self.removed:
+            world.delete_relation(rid)
+        for eid in self.entities_removed:
+            world.remove(eid)
+        for d in self.entities_added.values():
+            world.add_entity(_dict_to_entity(d))
+        for d in self.added.values():
+            world.insert_relation(_dict_to_relation(d))
+        for rid, ent1 in self.moved.items():
+            world.reparent(world.relations[rid], ent1)
+        world.meta.tick = self.tick
+        for rid, (number, hp, anchor) in self.stacks.items():
+            rel = world.relations[rid]
+            if anchor is None:
+                world.set_stack(rel, number=number, hp=hp)
+            else:
+                world.set_stack(rel, number=number)
+                world.set_decay(rel, Decay(*anchor, world.meta))
+        for eid, hp in self.hp.items():
+            world.set_hp(world.entities[eid], hp)
+
+    # ── Wire format ─────────────────────────────────────────────────────────
+
+    def to_dict(self) -> dict:
+        """JSON-ready form; relation ids become list entries, not object keys."""
+        return {
+            "since": self.since,
+            "tick": self.tick,
+            "hp": self.hp,
+            "added": list(self.added.values()),
+            "removed": self.removed,
+            "moved": [[rid, ent1] for rid, ent1 in self.moved.items()],
+            "stacks": [[rid, number, hp, anchor] for rid, (number, hp, anchor) in self.stacks.items()],
+            "entities_added": list(self.entities_added.values()),
+            "entities_removed": self.entities_removed,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "WorldDiff":
+        return cls(
+            since=d["since"],
+            tick=d["tick"],
+            hp=dict(d.get("hp", {})),
+            added={r["id"]: r for r in d.get("added", [])},
+            removed=list(d.get("removed", [])),
+            moved={rid: ent1 for rid, ent1 in d.get("moved", [])},
+            stacks={
+                rid: (number, hp, tuple(anchor) if anchor is not None else None)
+                for rid, number, hp, anchor in d.get("stacks", [])
+            },
+            entities_added={e["id"]: e for e in d.get("entities_added", [])},
+            entities_removed=list(d.get("entities_removed", [])),
+        )
+
+
+def compose(diffs: Iterable[WorldDiff]) -> WorldDiff:
+    """Fold consecutive diffs into one; raises ValueError on a gap or an empty input."""
+    result = None
+    for diff in diffs:
+        result = diff if result is None else result.then(diff)
+    if result is None:
+        raise ValueError("Nothing to compose")
+    return result
+
+
+def _anchor(rel: Relation) -> Anchor | None:
+    d = rel.decay
+    return (d.hp0, d.t0, d.drain, d.cap) if d is not None else None
+
+
+class DiffRecorder:
+    """Collects a world's mutations into WorldDiffs (see World.subscribe())."""
+
+    def __init__(self, world: World):
+        self.world = world
+        self.since = world.meta.tick
+        self._clear()
+        world.subscribe(self._on_change)
+
+    def close(self) -> None:
+        """Stop listening to the world."""
+        self.world.unsubscribe(self._on_change)
+
+    def _clear(self) -> None:
+        # Live objects; their values are read in take()
+        self._hp: dict[str, Entity] = {}
+        self._added: dict[int, Relation] = {}
+        self._removed: dict[int, None] = {}
+        self._moved: dict[int, Relation] = {}
+        self._stacks: dict[int, Relation] = {}
+        self._entities_added: dict[str, Entity] = {}
+        self._entities_removed: dict[str, None] = {}
+
+    def _on_change(self, change: Change, subject, old) -> None:
+        match change:
+            case Change.HP:
+                self._hp[subject.id] = subject
+            case Change.RELATION_ADDED:
+                self._added[subject.id] = subject
+            case Change.RELATION_REMOVED:
+                self._moved.pop(subject.id, None)
+                self._stacks.pop(subject.id, None)
+                if self._added.pop(subject.id, None) is None:
+                    self._removed[subject.id] = None
+            case Change.RELATION_MOVED:
+                if subject.id not in self._added:
+                    self._moved[subject.id] = subject
+            case Change.STACK | Change.DECAY:
+                # Also for fresh relations: the relation dict carries no anchor
+                self._stacks[subject.id] = subject
+            case Change.ENTITY_ADDED:
+                self._entities_added[subject.id] = subject
+            case Change.ENTITY_REMOVED:
+                self._hp.pop(subject.id, None)
+                if self._entities_added.pop(subject.id, None) is None:
+                    self._entities_removed[subject.id] = None
+
+    def take(self) -> WorldDiff:
+        """The diff since the previous take() (or since construction); starts a new one."""
+        diff = WorldDiff(
+            since=self.since,
+            tick=self.world.meta.tick,
+            hp={eid: e.hp for eid, e in self._hp.items()},
+            added={rid: _relation_to_dict(r) for rid, r in self._added.items()},
+            removed=list(self._removed),
+            moved={rid: r.ent1 for rid, r in self._moved.items()},
+            stacks={rid: (r.number, r.hp, _anchor(r)) for rid, r in self._stacks.items()},
+            entities_added={eid: _entity_to_dict(e) for eid, e in self._entities_added.items()},
+            entities_removed=list(self._entities_removed),
+        )
+        self.since = diff.tick
+        self._clear()
+        return diff
+
+
+# ── Snapshots ───────────────────────────────────────────────────────────────
+
+def snapshot(world: World) -> dict:
+    """World.to_dict() plus the running stack decays — the starting point for diffs."""
+    data = world.to_dict()
+    data["decays"] = [
+        [r.id, *_anchor(r)] for r in world.relations.values() if r.decay is not None
+    ]
+    return data
+
+
+def replica(data: dict) -> World:
+    """A world built from snapshot(), ready to apply the diffs that follow it."""
+    world = World.from_dict(data)
+    for rid, *anchor in data.get("decays", []):
+        world.relations[rid].decay = Decay(*anchor, world.meta)
+    return world
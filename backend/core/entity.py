@@ -82,7 +82,8 @@ class Entity:
         # "survival" → data-driven: seeks HP recovery via world's BEHAVIOR data.
         # "player"   → human-in-the-loop; opens dialog for action selection (stub).
         # "rand"     → probabilistic random action from available action set (stub).
-        # "remote:…" → external decision source: REST API, chess engine, LLM… (stub).
+        # "remote:<url>" → external decision source: REST API, chess engine, LLM…
+        #                  asked over HTTP within a per-tick deadline (backend/sim/remote.py).
 
     def __repr__(self) -> str:
         return f"Entity({self.type.value}, id={self.id!r}, name={self.name!r})"
@@ -12,6 +12,42 @@ class RelationType(Enum):
     EDGE     = "EDGE"      # ENT1 and ENT2 are adjacent ENVIs; NUMBER = distance/cost (0 = immediate); WAY = route type (road/sea/air/…); bidirectional by default
 
 
+class Decay:
+    """Constant per-tick drain of a SUMS stack's hp, evaluated lazily.
+
+    hp0 is the stack's hp after tick t0; clock is any object whose .tick says
+    how many ticks of drain have been applied by now (backend/sim/stacks.py).
+    Each tick is one clamp step: hp - drain, kept within [0, cap].
+    """
+    __slots__ = ("hp0", "t0", "drain", "cap", "clock")
+
+    def __init__(self, hp0: int, t0: int, drain: int, cap: int, clock):
+        self.hp0 = hp0
+        self.t0 = t0
+        self.drain = drain
+        self.cap = cap
+        self.clock = clock
+
+    def at(self, tick: int) -> int:
+        """hp after the given tick."""
+        k = tick - self.t0
+        if k <= 0:
+            return self.hp0
+        h1 = max(0, min(self.cap, self.hp0 - self.drain))
+        return max(0, min(self.cap, h1 - (k - 1) * self.drain))
+
+    def zero_at(self) -> Optional[int]:
+        """First tick after which hp is 0, or None if it never gets there.
+
+        A stack that heals (drain < 0) or holds (drain == 0) never gets there,
+        even from hp 0.
+        """
+        if self.drain <= 0:
+            return None
+        h1 = max(0, min(self.cap, self.hp0 - self.drain))
+        return self.t0 + 1 + -(-h1 // self.drain)
+
+
 class Relation:
     def __init__(
         self,
@@ -32,10 +68,27 @@ class Relation:
         self.ent2: Optional[str] = ent2  # None for unary relations
         self.number: int = number
         self.lambda_: float = lambda_    # Poisson λ for stochastic production
+        self.decay: Optional[Decay] = None
         self.hp: Optional[int] = hp      # LOCATION only: current freshness/durability of this stack (SUMS)
         self.way: Optional[str] = way    # EDGE only: route type (road, sea, air, …)
         self.one_way: bool = one_way     # EDGE only: if True, only ent1→ent2 is traversable
         self.deny: Optional[str] = deny  # EDGE only: TYPE_OF category string denied passage
 
+    @property
+    def hp(self) -> Optional[int]:
+        """Stack hp — derived from decay while the stack drains at a constant rate."""
+        if self.decay is not None:
+            return self.decay.at(self.decay.clock.tick)
+        return self._hp
+
+    @hp.setter
+    def hp(self, value: Optional[int]) -> None:
+        self._hp = value
+        self.decay = None
+
+    def settle(self) -> None:
+        """Stop a running decay, keeping the current hp as a plain value."""
+        self.hp = self.hp
+
     def __repr__(self) -> str:
         return f"Relation({self.type.value}, id={self.id}, {self.ent1!r} → {self.ent2!r}, n={self.number}, λ={self.lambda_})"
@@ -1,10 +1,34 @@
+import copy
 import json
+import os
+from contextlib import contextmanager
 from dataclasses import dataclass, field
+from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
 
 from .entity import Entity, EntityType, can_contain
-from .relation import Relation, RelationType
+from .relation import Decay, Relation, RelationType
+
+
+# Entity types that occupy a capacity slot; ENVI children are structural and free.
+_OCCUPANT_TYPES = {EntityType.CHAR, EntityType.UNIQUE, EntityType.SUMS}
+
+
+class Change(Enum):
+    """Kinds of world mutations reported to subscribers (see World.subscribe())."""
+    ENTITY_ADDED     = "ENTITY_ADDED"      # subject = Entity
+    ENTITY_REMOVED   = "ENTITY_REMOVED"    # subject = Entity
+    HP               = "HP"                # subject = Entity; old = previous hp
+    RELATION_ADDED   = "RELATION_ADDED"    # subject = Relation
+    RELATION_REMOVED = "RELATION_REMOVED"  # subject = Relation
+    RELATION_MOVED   = "RELATION_MOVED"    # subject = LOCATION Relation; old = previous ent1
+    STACK            = "STACK"             # subject = LOCATION Relation; old = (number, hp) before
+    DECAY            = "DECAY"             # subject = LOCATION Relation; old = previous Decay
+
+
+# listener(change, subject, old)
+Listener = Callable[[Change, Any, Any], None]
 
 
 @dataclass
@@ -32,6 +56,9 @@ class World:
         self.meta: WorldMeta = WorldMeta()
         self.entities: dict[str, Entity] = {}
         self.relations: dict[int, Relation] = {}
+        self._batch: _Batch | None = None
+        self._listeners: list[Listener] = []
+        self._index: _RelationIndex | None = None   # built on first related() call
 
     # ── Entity management ───────────────────────────────────────────────────
 
@@ -39,34 +66,25 @@ class World:
         if entity.id in self.entities:
             raise ValueError(f"Entity id '{entity.id}' already exists in world")
         self.entities[entity.id] = entity
+        self._notify(Change.ENTITY_ADDED, entity)
         return entity
 
     def add_relation(self, relation: Relation) -> Relation:
+        if self._batch is not None:
+            # Inside world.batch(): validation is deferred to commit time.
+            self._batch.pending.append(relation.id)
+            self._batch.max_id = max(self._batch.max_id, relation.id)
+            self._store(relation)
+            self._notify(Change.RELATION_ADDED, relation)
+            return relation
         # Uniqueness: (type, ent1, ent2)
-        for r in self.relations.values():
-            if r.type == relation.type and r.ent1 == relation.ent1 and r.ent2 == relation.ent2:
-                raise ValueError(
-                    f"Relation ({relation.type.value}, {relation.ent1!r}, {relation.ent2!r}) already exists"
-                )
+        if self.related(relation.type, relation.ent1, relation.ent2):
+            raise ValueError(
+                f"Relation ({relation.type.value}, {relation.ent1!r}, {relation.ent2!r}) already exists"
+            )
         # Validate LOCATION containment
         if relation.type == RelationType.LOCATION:
-            parent = self.entities.get(relation.ent1)
-            child  = self.entities.get(relation.ent2)
-            if parent is None:
-                raise ValueError(f"Entity '{relation.ent1}' not found")
-            if child is None:
-                raise ValueError(f"Entity '{relation.ent2}' not found")
-            if not can_contain(parent.type, child.type):
-                raise ValueError(
-                    f"{parent.type.value} cannot contain {child.type.value} "
-                    f"('{parent.name}' -> '{child.name}')"
-                )
-            # UNIQUE entity is only a container when capacity is explicitly set
-            if parent.type == EntityType.UNIQUE and parent.capacity is None:
-                raise ValueError(
-                    f"UNIQUE '{parent.name}' has no capacity — not a container"
-                )
-            _OCCUPANT_TYPES = {EntityType.CHAR, EntityType.UNIQUE, EntityType.SUMS}
+            parent, child = self._check_containment(relation)
             if parent.capacity is not None and child.type in _OCCUPANT_TYPES:
                 used = sum(
                     1 for e, _ in self.children(relation.ent1)
@@ -76,16 +94,276 @@ class World:
                     raise ValueError(
                         f"'{parent.name}' is full ({used}/{parent.capacity} slots)"
                     )
-        self.relations[relation.id] = relation
+        self._store(relation)
+        self._notify(Change.RELATION_ADDED, relation)
+        return relation
+
+    def _check_containment(self, relation: Relation) -> tuple[Entity, Entity]:
+        """Validate a LOCATION relation against CONTAINMENT_RULES; return (parent, child)."""
+        parent = self.entities.get(relation.ent1)
+        child  = self.entities.get(relation.ent2)
+        if parent is None:
+            raise ValueError(f"Entity '{relation.ent1}' not found")
+        if child is None:
+            raise ValueError(f"Entity '{relation.ent2}' not found")
+        if not can_contain(parent.type, child.type):
+            raise ValueError(
+                f"{parent.type.value} cannot contain {child.type.value} "
+                f"('{parent.name}' -> '{child.name}')"
+            )
+        # UNIQUE entity is only a container when capacity is explicitly set
+        if parent.type == EntityType.UNIQUE and parent.capacity is None:
+            raise ValueError(
+                f"UNIQUE '{parent.name}' has no capacity — not a container"
+            )
+        return parent, child
+
+    # ── Change feed ─────────────────────────────────────────────────────────
+
+    def subscribe(self, listener: Listener) -> None:
+        """Register listener(change, subject, old) for every tracked mutation.
+
+        Tracked mutations are the ones made through World methods (add_*, remove,
+        move, reparent, insert_relation, delete_relation, set_hp, set_stack,
+        set_decay). Assigning attributes directly (entity.hp = …) is invisible
+        to subscribers.
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener) -> None:
+        self._listeners.remove(listener)
+
+    def _notify(self, change: Change, subject: Any, old: Any = None) -> None:
+        if self._batch is not None:
+            self._batch.changes.append((change, subject, old))
+            return
+        for listener in self._listeners:
+            listener(change, subject, old)
+
+    def set_hp(self, entity: Entity, hp: int) -> None:
+        """Write entity.hp and notify subscribers (no-op when unchanged)."""
+        old = entity.hp
+        if old == hp:
+            return
+        entity.hp = hp
+        self._notify(Change.HP, entity, old)
+
+    def set_stack(self, relation: Relation, number: int | None = None, hp: int | None = None) -> None:
+        """Write quantity and/or hp of a LOCATION relation and notify subscribers.
+
+        Writing hp stops a running Decay — a change even if the value is equal.
+        """
+        old = (relation.number, relation.hp)
+        decaying = relation.decay is not None
+        if number is not None:
+            relation.number = number
+        if hp is not None:
+            relation.hp = hp
+        if (relation.number, relation.hp) != old or (decaying and relation.decay is None):
+            self._notify(Change.STACK, relation, old)
+
+    def set_decay(self, relation: Relation, decay: Decay | None) -> None:
+        """Attach a Decay to a stack, or stop it (None) keeping the current hp.
+
+        The stack's derived hp changes every tick without further notifications;
+        subscribers only hear about the anchor.
+        """
+        old = relation.decay
+        if decay is old:
+            return
+        if decay is None:
+            relation.settle()
+        else:
+            relation.decay = decay
+        self._notify(Change.DECAY, relation, old)
+
+    def insert_relation(self, relation: Relation) -> Relation:
+        """Store a relation without validation — for engine code that already
+        guarantees the rules (e.g. PRODUCE creating a fresh stack)."""
+        self._store(relation)
+        self._notify(Change.RELATION_ADDED, relation)
         return relation
 
+    def delete_relation(self, relation_id: int) -> Relation:
+        """Remove a single relation by id and return it."""
+        relation = self.relations.pop(relation_id)
+        if self._index is not None:
+            self._index.remove(relation)
+        self._notify(Change.RELATION_REMOVED, relation)
+        return relation
+
+    def reparent(self, relation: Relation, ent1: str) -> None:
+        """Point a LOCATION relation at a new container in place, without validation
+        (World.move() checks the rules first)."""
+        old_parent = relation.ent1
+        relation.ent1 = ent1
+        if self._index is not None:
+            self._index.move(relation, old_parent)
+        self._notify(Change.RELATION_MOVED, relation, old_parent)
+
+    def _store(self, relation: Relation) -> None:
+        previous = self.relations.get(relation.id)
+        self.relations[relation.id] = relation   # a replacement keeps its place
+        if self._index is None:
+            return
+        if previous is not None:
+            self._index.replace(previous, relation)
+        else:
+            self._index.add(relation)
+
+    # ── Relation index ──────────────────────────────────────────────────────
+
+    def related(
+        self,
+        type: RelationType,
+        ent1: str | None = None,
+        ent2: str | None = None,
+    ) -> list[Relation]:
+        """Relations of `type`, optionally filtered by ent1 and/or ent2.
+
+        Answered from an index kept up to date by World methods; results come in
+        world.relations order, exactly as a full scan would return them. After
+        editing relations directly (r.ent1 = …, world.relations[id] = …) call
+        reindex(); only a changed number of relations is noticed on its own.
+        """
+        index = self._index
+        if index is None or index.size != len(self.relations):
+            # First use, or relations were added or removed behind World's back
+            index = self._index = _RelationIndex(self.relations.values())
+        if ent1 is not None:
+            bucket = index.by_ent1.get((type, ent1))
+            if bucket is None:
+                return []
+            if ent2 is not None:
+                return [r for r in bucket.values() if r.ent2 == ent2]
+            return list(bucket.values())
+        if ent2 is not None:
+            bucket = index.by_ent2.get((type, ent2))
+        else:
+            bucket = index.by_type.get(type)
+        return list(bucket.values()) if bucket else []
+
+    def reindex(self) -> None:
+        """Drop the relation index; the next related() rebuilds it from world.relations.
+
+        Needed after changing a relation's type, ent1 or ent2 by assignment, or
+        replacing entries of world.relations, without going through World.
+        """
+        self._index = None
+
+    def touching(self, type: RelationType, entity_id: str) -> list[Relation]:
+        """Relations of `type` with entity_id on either end, in world.relations order."""
+        forward = self.related(type, ent1=entity_id)
+        backward = [r for r in self.related(type, ent2=entity_id) if r.ent1 != entity_id]
+        if not forward or not backward:
+            return forward or backward
+        seq = self._index.seq
+        return sorted(forward + backward, key=lambda r: seq[r.id])
+
+    # ── Batch editing ───────────────────────────────────────────────────────
+
+    @contextmanager
+    def batch(self) -> Iterator["World"]:
+        """Transactional bulk edit: defer relation validation to the end of the block.
+
+        Inside the block add_relation() only records the relation; uniqueness,
+        containment and capacity are checked for all of them in a single pass
+        on exit (see validate()). If the block raises, or validation fails, the
+        world is rolled back to its state on entry and the error re-raised.
+
+            with world.batch():
+                for square in squares:
+                    world.add_relation(Relation(...))
+
+        Nested batch() calls join the outermost batch. Change notifications
+        (see subscribe()) are held back until the batch commits.
+        """
+        if self._batch is not None:
+            yield self
+            return
+        self._batch = _Batch(
+            entities=dict(self.entities),
+            relations=dict(self.relations),
+            entity_state={eid: dict(e.__dict__) for eid, e in self.entities.items()},
+            relation_state={rid: dict(r.__dict__) for rid, r in self.relations.items()},
+            max_id=max(self.relations.keys(), default=0),
+        )
+        try:
+            yield self
+            pending = [self.relations[rid] for rid in self._batch.pending if rid in self.relations]
+            self.validate(pending)
+        except BaseException:
+            self._rollback(self._batch)
+            raise
+        finally:
+            batch, self._batch = self._batch, None
+        # Subscribers only hear about committed edits
+        for change, subject, old in batch.changes:
+            self._notify(change, subject, old)
+
+    def _rollback(self, batch: "_Batch") -> None:
+        for eid, entity in batch.entities.items():
+            entity.__dict__.clear()
+            entity.__dict__.update(batch.entity_state[eid])
+        for rid, relation in batch.relations.items():
+            relation.__dict__.clear()
+            relation.__dict__.update(batch.relation_state[rid])
+        self.entities = batch.entities
+        self.relations = batch.relations
+        self._index = None
+
+    def validate(self, relations: list[Relation] | None = None) -> None:
+        """Check relations against uniqueness, containment and capacity rules in one pass.
+
+        relations: the relations to check (default: all). They are compared against
+        the whole world, so checking a subset finds conflicts with existing data too.
+        Raises ValueError on the first violation.
+        """
+        if relations is None:
+            relations = list(self.relations.values())
+        checked = {id(r) for r in relations}
+
+        # Uniqueness: (type, ent1, ent2) — one set instead of a scan per relation
+        seen: set[tuple[RelationType, str, str | None]] = {
+            (r.type, r.ent1, r.ent2) for r in self.relations.values() if id(r) not in checked
+        }
+        for r in relations:
+            key = (r.type, r.ent1, r.ent2)
+            if key in seen:
+                raise ValueError(
+                    f"Relation ({r.type.value}, {r.ent1!r}, {r.ent2!r}) already exists"
+                )
+            seen.add(key)
+
+        # Containment + capacity: occupancy counted once for every parent
+        parents: dict[str, Entity] = {}
+        for r in relations:
+            if r.type != RelationType.LOCATION:
+                continue
+            parent, child = self._check_containment(r)
+            if parent.capacity is not None and child.type in _OCCUPANT_TYPES:
+                parents[parent.id] = parent
+        if not parents:
+            return
+        used: dict[str, int] = dict.fromkeys(parents, 0)
+        for r in self.relations.values():
+            if r.type != RelationType.LOCATION or r.ent1 not in used:
+                continue
+            child = self.entities.get(r.ent2)
+            if child is not None and child.type in _OCCUPANT_TYPES:
+                used[r.ent1] += 1
+        for pid, parent in parents.items():
+            if used[pid] > parent.capacity:
+                raise ValueError(
+                    f"'{parent.name}' is full ({used[pid]}/{parent.capacity} slots)"
+                )
+
     def children(self, parent_id: str) -> list[tuple[Entity, int]]:
         result = []
-        for r in self.relations.values():
-            if r.type == RelationType.LOCATION and r.ent1 == parent_id:
-                entity = self.entities.get(r.ent2)
-                if entity:
-                    result.append((entity, r.number))
+        for r in self.related(RelationType.LOCATION, ent1=parent_id):
+            entity = self.entities.get(r.ent2)
+            if entity:
+                result.append((entity, r.number))
         return result
 
     def roots(self) -> list[Entity]:
@@ -109,9 +387,7 @@ class World:
         queue: list[str] = [entity.id]
         while queue:
             current_id = queue.pop(0)
-            for r in self.relations.values():
-                if r.type != RelationType.TYPE_OF or r.ent1 != current_id:
-                    continue
+            for r in self.related(RelationType.TYPE_OF, ent1=current_id):
                 archetype_id = r.ent2
                 if archetype_id is None or archetype_id in visited:
                     continue
@@ -126,13 +402,14 @@ class World:
         return None
 
     def _next_relation_id(self) -> int:
+        if self._batch is not None:
+            return self._batch.max_id + 1
         return max(self.relations.keys(), default=0) + 1
 
     def location_of(self, entity_id: str) -> Entity | None:
         """Return the direct parent container of entity_id, or None if it is a root."""
-        for r in self.relations.values():
-            if r.type == RelationType.LOCATION and r.ent2 == entity_id:
-                return self.entities.get(r.ent1)
+        for r in self.related(RelationType.LOCATION, ent2=entity_id):
+            return self.entities.get(r.ent1)
         return None
 
     def remove(self, entity_id: str) -> None:
@@ -143,13 +420,11 @@ class World:
         """
         if entity_id not in self.entities:
             raise ValueError(f"Entity '{entity_id}' not found")
-        to_delete = [
-            rid for rid, r in self.relations.items()
-            if r.ent1 == entity_id or r.ent2 == entity_id
-        ]
+        to_delete = [r.id for type in RelationType for r in self.touching(type, entity_id)]
         for rid in to_delete:
-            del self.relations[rid]
-        del self.entities[entity_id]
+            self.delete_relation(rid)
+        entity = self.entities.pop(entity_id)
+        self._notify(Change.ENTITY_REMOVED, entity)
 
     def move(self, entity_id: str, new_container_id: str, amount: int | None = None) -> None:
         """Move entity to a new container.
@@ -181,11 +456,7 @@ class World:
             raise ValueError(f"UNIQUE '{new_container.name}' has no capacity — not a container")
 
         # Find existing source LOCATION relation
-        source_rel = next(
-            (r for r in self.relations.values()
-             if r.type == RelationType.LOCATION and r.ent2 == entity_id),
-            None,
-        )
+        source_rel = next(iter(self.related(RelationType.LOCATION, ent2=entity_id)), None)
 
         if entity.type == EntityType.SUMS:
             if amount is None:
@@ -198,18 +469,15 @@ class World:
             # Reduce or remove source relation
             if source_rel is not None:
                 if amount == src_qty:
-                    del self.relations[source_rel.id]
+                    self.delete_relation(source_rel.id)
                 else:
-                    source_rel.number -= amount
+                    self.set_stack(source_rel, number=source_rel.number - amount)
             # Merge into existing target relation, or create a new one
             target_rel = next(
-                (r for r in self.relations.values()
-                 if r.type == RelationType.LOCATION
-                 and r.ent1 == new_container_id and r.ent2 == entity_id),
-                None,
+                iter(self.related(RelationType.LOCATION, new_container_id, entity_id)), None
             )
             if target_rel is not None:
-                target_rel.number += amount
+                self.set_stack(target_rel, number=target_rel.number + amount)
             else:
                 self.add_relation(Relation(
                     id=self._next_relation_id(),
@@ -222,7 +490,6 @@ class World:
         else:
             # UNIQUE / CHAR / ENVI — simple single-location move
             # Capacity check: CHAR + UNIQUE + SUMS count as occupants; ENVI is structural
-            _OCCUPANT_TYPES = {EntityType.CHAR, EntityType.UNIQUE, EntityType.SUMS}
             if new_container.capacity is not None and entity.type in _OCCUPANT_TYPES:
                 used = sum(
                     1 for e, _ in self.children(new_container_id)
@@ -233,7 +500,7 @@ class World:
                         f"'{new_container.name}' is full ({used}/{new_container.capacity} slots)"
                     )
             if source_rel is not None:
-                source_rel.ent1 = new_container_id
+                self.reparent(source_rel, new_container_id)
             else:
                 self.add_relation(Relation(
                     id=self._next_relation_id(),
@@ -245,6 +512,18 @@ class World:
     # ── Serialization ───────────────────────────────────────────────────────
 
     def save(self, path: str | Path) -> None:
+        """Write the world file: to a temporary sibling first, then renamed over
+        path, so a crash mid-write leaves the previous file intact."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(
+            json.dumps(self.to_dict(), indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+
+    def to_dict(self) -> dict:
+        """The world as the JSON-ready dict save() writes."""
         manifest: dict[str, Any] = {"author": self.manifest.author, "created": self.manifest.created, "version": self.manifest.version}
         if self.manifest.lore:
             manifest["lore"] = self.manifest.lore
@@ -252,8 +531,8 @@ class World:
         if self.meta.turn is not None:
             meta["turn"] = self.meta.turn
         if self.meta.vars:
-            meta["vars"] = self.meta.vars
-        data = {
+            meta["vars"] = copy.deepcopy(self.meta.vars)   # the dict must not alias live state
+        return {
             "name": self.name,
             "description": self.description,
             "manifest": manifest,
@@ -261,14 +540,14 @@ class World:
             "entities":  [_entity_to_dict(e)  for e in self.entities.values()],
             "relations": [_relation_to_dict(r) for r in self.relations.values()],
         }
-        Path(path).write_text(
-            json.dumps(data, indent=2, ensure_ascii=False),
-            encoding="utf-8",
-        )
 
     @classmethod
     def load(cls, path: str | Path) -> "World":
-        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "World":
+        """Build a world from the dict to_dict() returns (the world file format)."""
         world = cls(data["name"], data.get("description", ""))
 
         mf = data.get("manifest", {})
@@ -280,7 +559,7 @@ class World:
         m = data.get("meta", {})
         world.meta.tick = m.get("tick", 0)
         world.meta.turn = m.get("turn")
-        world.meta.vars = m.get("vars", {})
+        world.meta.vars = copy.deepcopy(m.get("vars", {}))   # two worlds from one dict share nothing
 
         ids = [e["id"] for e in data["entities"]]
         if len(ids) != len(set(ids)):
@@ -302,6 +581,89 @@ class World:
 
 # ── Helpers ─────────────────────────────────────────────────────────────────
 
+class _RelationIndex:
+    """Relation buckets by type, (type, ent1) and (type, ent2).
+
+    Buckets are dicts keyed by relation id so they keep world.relations order;
+    seq remembers each relation's position for re-sorting after a re-parent.
+    """
+
+    def __init__(self, relations):
+        self.by_type: dict[RelationType, dict[int, Relation]] = {}
+        self.by_ent1: dict[tuple[RelationType, str], dict[int, Relation]] = {}
+        self.by_ent2: dict[tuple[RelationType, str | None], dict[int, Relation]] = {}
+        self.seq: dict[int, int] = {}
+        self._next_seq = 0
+        self.size = 0
+        for r in relations:
+            self.add(r)
+
+    def add(self, r: Relation) -> None:
+        self.seq[r.id] = self._next_seq
+        self._next_seq += 1
+        self.size += 1
+        self.by_type.setdefault(r.type, {})[r.id] = r
+        self.by_ent1.setdefault((r.type, r.ent1), {})[r.id] = r
+        self.by_ent2.setdefault((r.type, r.ent2), {})[r.id] = r
+
+    def remove(self, r: Relation) -> None:
+        self.size -= 1
+        self.seq.pop(r.id, None)
+        for bucket, key in ((self.by_type, r.type),
+                            (self.by_ent1, (r.type, r.ent1)),
+                            (self.by_ent2, (r.type, r.ent2))):
+            entries = bucket.get(key)
+            if entries is not None:
+                entries.pop(r.id, None)
+                if not entries:
+                    del bucket[key]
+
+    def move(self, r: Relation, old_ent1: str) -> None:
+        """Re-file r after its ent1 changed in place (World.move())."""
+        old = self.by_ent1.get((r.type, old_ent1))
+        if old is not None:
+            old.pop(r.id, None)
+            if not old:
+                del self.by_ent1[(r.type, old_ent1)]
+        bucket = self.by_ent1.setdefault((r.type, r.ent1), {})
+        bucket[r.id] = r
+        self._resort(bucket)
+
+    def replace(self, old: Relation, r: Relation) -> None:
+        """File r in place of old, a relation with the same id, keeping its seq."""
+        if (old.type, old.ent1, old.ent2) == (r.type, r.ent1, r.ent2):
+            for bucket in (self.by_type[r.type], self.by_ent1[(r.type, r.ent1)],
+                           self.by_ent2[(r.type, r.ent2)]):
+                bucket[r.id] = r   # an existing key keeps its position
+            return
+        seq = self.seq[old.id]
+        self.remove(old)
+        self.add(r)
+        self.seq[r.id] = seq
+        self._resort(self.by_type[r.type])
+        self._resort(self.by_ent1[(r.type, r.ent1)])
+        self._resort(self.by_ent2[(r.type, r.ent2)])
+
+    def _resort(self, bucket: dict[int, Relation]) -> None:
+        if len(bucket) > 1:
+            seq = self.seq
+            ordered = sorted(bucket.values(), key=lambda x: seq[x.id])
+            bucket.clear()
+            bucket.update((x.id, x) for x in ordered)
+
+
+@dataclass
+class _Batch:
+    """Rollback snapshot + pending relation ids of an open World.batch()."""
+    entities: dict[str, Entity]
+    relations: dict[int, Relation]
+    entity_state: dict[str, dict]
+    relation_state: dict[int, dict]
+    max_id: int = 0
+    pending: list[int] = field(default_factory=list)
+    changes: list[tuple[Change, Any, Any]] = field(default_factory=list)
+
+
 def _entity_to_dict(e: Entity) -> dict:
     d: dict = {"id": e.id, "name": e.name, "type": e.type.value}
     if e.description is not None:
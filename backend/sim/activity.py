@@ -0,0 +1,174 @@
+"""
+Quiescence tracking for the tick engine.
+
+Most entities in a running world sit at a fixed point: HP already at hp_max
+with only healing behaviors, HP at 0 under a drain, or no net drain at all.
+Their next tick is provably a no-op, so tick() does not need to visit them.
+
+ActivityTracker keeps, per world, the entities with HP (CHAR / UNIQUE / ENVI)
+and the SUMS stacks (LOCATION relations carrying hp) whose next tick may still
+change something. The engine puts an entry to sleep once it reaches a fixed
+point; world changes that could alter the outcome wake it again:
+
+  LOCATION added / removed / re-parented  → the moved entity or stack
+  HP written (EAT, resurrection, …)        → that entity
+  stack quantity/hp written (PRODUCE)      → that stack
+  BEHAVIOR / TYPE_OF added or removed      → everything (cascades are global)
+
+Wake-ups arrive through the World change feed (World.subscribe()). Code that
+assigns attributes directly (entity.hp = …, relation.number = …) bypasses the
+feed and must call wake(world) afterwards.
+
+Entities in `held` never sleep — their drain follows other entities' state
+(neighbourhood aggregates, backend/sim/neighbourhood.py).
+"""
+
+from weakref import WeakKeyDictionary
+
+from backend.core.entity import Entity, EntityType
+from backend.core.relation import Relation, RelationType
+from backend.core.world import Change, World
+
+
+class ActivityTracker:
+    """Active sets of one world, kept in world iteration order."""
+
+    def __init__(self, world: World):
+        self.active_entities: set[str] = set()
+        self.active_stacks: set[int] = set()
+        self.held: set[str] = set()
+        # Insertion order of entities / relations, so the engine visits active
+        # entries in the same order (and logs in the same order) as a full scan.
+        self._entity_order: dict[str, int] = {}
+        self._stack_order: dict[int, int] = {}
+        self._next_order = 0
+        self._sizes = (-1, -1)
+        self.rebuild(world)
+        world.subscribe(self._on_change)
+
+    # ── Bookkeeping ─────────────────────────────────────────────────────────
+
+    def rebuild(self, world: World) -> None:
+        """Mark everything active and re-read iteration order from the world."""
+        self._entity_order = {eid: i for i, eid in enumerate(world.entities)}
+        self._stack_order = {
+            rid: i for i, (rid, r) in enumerate(world.relations.items())
+            if r.type == RelationType.LOCATION and r.hp is not None
+        }
+        self._next_order = max(len(world.entities), len(world.relations))
+        self.active_entities = {
+            e.id for e in world.entities.values()
+            if e.hp is not None and e.type != EntityType.SUMS
+        }
+        self.active_stacks = set(self._stack_order)
+        self._sizes = (len(world.entities), len(world.relations))
+
+    def sync(self, world: World) -> None:
+        """Rebuild if the world was edited behind the change feed's back."""
+        if self._sizes != (len(world.entities), len(world.relations)):
+            self.rebuild(world)
+
+    def _order(self) -> int:
+        self._next_order += 1
+        return self._next_order
+
+    def entities(self, world: World) -> list[Entity]:
+        """Active entities, in world.entities order."""
+        order = self._entity_order
+        ids = sorted(self.active_entities, key=lambda eid: order.get(eid, 0))
+        return [world.entities[eid] for eid in ids if eid in world.entities]
+
+    def stacks(self, world: World) -> list[Relation]:
+        """Active SUMS stacks, in world.relations order."""
+        order = self._stack_order
+        ids = sorted(self.active_stacks, key=lambda rid: order.get(rid, 0))
+        return [world.relations[rid] for rid in ids if rid in world.relations]
+
+    def stack_key(self, relation_id: int) -> int:
+        """Sort key of a stack in world.relations order."""
+        return self._stack_order.get(relation_id, 0)
+
+    def sleep_entity(self, entity_id: str) -> None:
+        if entity_id not in self.held:
+            self.active_entities.discard(entity_id)
+
+    def sleep_stack(self, relation_id: int) -> None:
+        self.active_stacks.discard(relation_id)
+
+    def wake_entity(self, entity_id: str) -> None:
+        if entity_id in self._entity_order:
+            self.active_entities.add(entity_id)
+
+    def wake_stack(self, relation: Relation) -> None:
+        if relation.hp is None:
+            return
+        if relation.id not in self._stack_order:
+            self._stack_order[relation.id] = self._order()
+        self.active_stacks.add(relation.id)
+
+    # ── Change feed ─────────────────────────────────────────────────────────
+
+    def _on_change(self, change: Change, subject, old) -> None:
+        n_entities, n_relations = self._sizes
+        match change:
+            case Change.HP:
+                self.wake_entity(subject.id)
+            case Change.STACK:
+                self.wake_stack(subject)
+            case Change.RELATION_MOVED:
+                self.wake_entity(subject.ent2)
+                self.wake_stack(subject)
+            case Change.RELATION_ADDED | Change.RELATION_REMOVED:
+                delta = 1 if change == Change.RELATION_ADDED else -1
+                self._sizes = (n_entities, n_relations + delta)
+                if subject.type in (RelationType.BEHAVIOR, RelationType.TYPE_OF):
+                    self.wake_all()
+                elif subject.type == RelationType.LOCATION:
+                    self.wake_entity(subject.ent2)
+                    if change == Change.RELATION_ADDED:
+                        self.wake_stack(subject)
+                    else:
+                        self.active_stacks.discard(subject.id)
+                        self._stack_order.pop(subject.id, None)
+            case Change.ENTITY_ADDED:
+                self._sizes = (n_entities + 1, n_relations)
+                self._entity_order[subject.id] = self._order()
+                if subject.hp is not None and subject.type != EntityType.SUMS:
+                    self.active_entities.add(subject.id)
+            case Change.ENTITY_REMOVED:
+                self._sizes = (n_entities - 1, n_relations)
+                self._entity_order.pop(subject.id, None)
+                self.active_entities.discard(subject.id)
+
+    def wake_all(self) -> None:
+        # Entities without HP are put back to sleep on their first visit.
+        self.active_entities = set(self._entity_order)
+        self.active_stacks = set(self._stack_order)
+
+
+_trackers: "WeakKeyDictionary[World, ActivityTracker]" = WeakKeyDictionary()
+
+
+def activity_of(world: World) -> ActivityTracker:
+    """Return the world's ActivityTracker, creating it on first use."""
+    tracker = _trackers.get(world)
+    if tracker is None:
+        tracker = _trackers[world] = ActivityTracker(world)
+    else:
+        tracker.sync(world)
+    return tracker
+
+
+def wake(world: World, entity_id: str | None = None) -> None:
+    """Force an entity (or, with no id, everything) back into the active set.
+
+    Needed only after editing attributes directly instead of through World
+    methods — e.g. a script setting entity.hp or entity.hp_max by hand.
+    """
+    tracker = _trackers.get(world)
+    if tracker is None:
+        return
+    if entity_id is None:
+        tracker.rebuild(world)
+    else:
+        tracker.wake_entity(entity_id)
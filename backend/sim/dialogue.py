@@ -0,0 +1,268 @@
+"""
+Dialogue templates for TRIGGER lines.
+
+Without templates a firing TRIGGER says the description of its ent2 UNIQUE,
+as before. A world can ship `<world>.dialogs.yaml` next to its JSON file:
+
+    FELIX:                        # speaker: entity id, TYPE_OF category or "*"
+      threshold:                  # event: TRIGGER ent2, or its mode
+        - "{name} stares at the ground. {hp} HP and falling."
+        - "Is this the bottom? No. Not yet."
+      ambient:
+        lines:
+          - "Still here. Still bored."
+        generate: "{name}, a fallen angel at {hp}/{hp_max} HP in {location}, mutters one bitter line."
+    "*":
+      resurrect:
+        - "{name} rises again."
+
+Events are tried most specific first: (speaker, ent2), (speaker, mode), then
+the speaker's TYPE_OF categories, then "*". Modes are threshold, ambient
+and resurrect (see _process_triggers). Placeholders: {name}, {hp}, {hp_max},
+{location}, {tick}, {world}.
+
+Templates are checked once when loaded (unknown placeholders are a
+ValueError then, not mid-run) and the pool behind each (speaker, ent2, mode)
+is resolved once, so a firing costs a dict lookup, one draw and a
+str.format_map over just the placeholders the pool uses. A
+speaker does not repeat any of its last HISTORY lines from a pool while the
+pool has others left.
+
+Generated lines (Tier 2 in IDEAS.md) are optional: give load_dialogue() a
+generator(prompt) -> str. A pool's `generate` prompt is rendered per firing
+and hashed; a cached line for that hash is used if present (memory, then the
+SQLite file), otherwise the template line is said and the prompt goes to a
+background thread, so a slow generator never holds up a tick.
+
+Draws use the Dialogue's own Random: loading templates does not change the
+simulation's random stream.
+"""
+
+import hashlib
+import random
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from string import Formatter
+from typing import Callable
+from weakref import WeakKeyDictionary
+
+from backend.core.entity import Entity
+from backend.core.relation import RelationType
+from backend.core.world import Change, World
+
+HISTORY = 4              # lines per speaker and pool that are not repeated
+GENERATOR_THREADS = 2
+
+
+def _location_name(world: World, speaker: Entity) -> str:
+    location = world.location_of(speaker.id)
+    return location.name if location is not None else "nowhere"
+
+
+# placeholder → its value for a speaker
+_CONTEXT: dict[str, Callable[[World, Entity], object]] = {
+    "name":     lambda world, speaker: speaker.name,
+    "hp":       lambda world, speaker: speaker.hp,
+    "hp_max":   lambda world, speaker: speaker.hp_max,
+    "location": _location_name,
+    "tick":     lambda world, speaker: world.meta.tick,
+    "world":    lambda world, speaker: world.name,
+}
+FIELDS = set(_CONTEXT)
+
+
+def _fields(text: str) -> set[str]:
+    """Placeholders of a template; raises ValueError on anything but FIELDS."""
+    found = set()
+    for _, field, spec, conversion in Formatter().parse(text):
+        if field is not None:
+            if field not in FIELDS or spec or conversion:
+                raise ValueError(f"Unknown placeholder {{{field}}} in dialogue template {text!r}")
+            found.add(field)
+    return found
+
+
+class _Pool:
+    """Compiled lines (and optional generation prompt) of one speaker/event entry."""
+
+    def __init__(self, key: str, entry):
+        if isinstance(entry, dict):
+            lines, prompt = entry.get("lines", []), entry.get("generate")
+        else:
+            lines, prompt = entry, None
+        if isinstance(lines, str):
+            lines = [lines]
+        if not lines and prompt is None:
+            raise ValueError(f"Dialogue entry {key} has no lines")
+        self.key = key
+        self.lines = [str(line) for line in lines]
+        self.prompt = str(prompt) if prompt is not None else None
+        # The context is built for these only
+        self.fields: set[str] = set().union(*map(_fields, self.lines + [self.prompt or ""]))
+
+
+class _Cache:
+    """Generated lines by context hash: a dict in front of an optional SQLite file."""
+
+    def __init__(self, path: Path | None):
+        self.lines: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS lines (hash TEXT PRIMARY KEY, line TEXT)")
+            self.lines.update(self._db.execute("SELECT hash, line FROM lines"))
+
+    def put(self, key: str, line: str) -> None:
+        with self._lock:
+            self.lines[key] = line
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO lines VALUES (?, ?)", (key, line))
+                self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+                self._db = None
+
+
+class Dialogue:
+    """A world's compiled dialogue templates, history rings and generated-line cache."""
+
+    def __init__(self, world: World, templates: dict | None = None,
+                 generator: Callable[[str], str] | None = None,
+                 cache: str | Path | None = None, seed: int | None = None):
+        self.pools: dict[tuple[str, str], _Pool] = {}
+        for speaker, events in (templates or {}).items():
+            if not isinstance(events, dict):
+                raise ValueError(f"Dialogue speaker {speaker!r} must map events to lines")
+            for event, entry in events.items():
+                self.pools[str(speaker), str(event)] = _Pool(f"{speaker}/{event}", entry)
+        self.generator = generator
+        self.cache = _Cache(Path(cache) if cache is not None else None)
+        self.rng = random.Random(seed)
+        self._resolved: dict[tuple[str, str | None, str], _Pool | None] = {}
+        self._history: dict[tuple[str, str], deque[int]] = {}
+        self._pending: set[str] = set()
+        self._workers: ThreadPoolExecutor | None = None
+        if self.pools:
+            world.subscribe(self._on_change)
+
+    def _on_change(self, change: Change, subject, old) -> None:
+        # A speaker's categories pick its pools
+        if (change in (Change.RELATION_ADDED, Change.RELATION_REMOVED)
+                and subject.type == RelationType.TYPE_OF):
+            self._resolved.clear()
+
+    def close(self) -> None:
+        """Finish queued generations and close the cache file."""
+        if self._workers is not None:
+            self._workers.shutdown(wait=True)
+            self._workers = None
+        self.cache.close()
+
+    # ── Lines ───────────────────────────────────────────────────────────────
+
+    def _pool(self, world: World, speaker: Entity, line_id: str | None, event: str) -> _Pool | None:
+        key = (speaker.id, line_id, event)
+        if key not in self._resolved:
+            scopes = [speaker.id] + [
+                r.ent2 for r in world.related(RelationType.TYPE_OF, ent1=speaker.id)
+            ] + ["*"]
+            events = [e for e in (line_id, event) if e is not None]
+            self._resolved[key] = next(
+                (self.pools[s, e] for s in scopes for e in events if (s, e) in self.pools), None)
+        return self._resolved[key]
+
+    def line(self, world: World, speaker: Entity, line_id: str | None, event: str) -> str | None:
+        """What speaker says when a TRIGGER with ent2 = line_id fires as `event`."""
+        pool = self._pool(world, speaker, line_id, event) if self.pools else None
+        if pool is None:
+            entity = world.get(line_id) if line_id is not None else None
+            return entity.description if entity is not None else None
+
+        context = {field: _CONTEXT[field](world, speaker) for field in pool.fields}
+        if pool.prompt is not None and self.generator is not None:
+            generated = self._generated(pool.prompt.format_map(context))
+            if generated is not None or not pool.lines:
+                return generated
+        if not pool.lines:
+            return None
+        return pool.lines[self._pick(speaker.id, pool)].format_map(context)
+
+    def _pick(self, speaker_id: str, pool: _Pool) -> int:
+        """A random line index, skipping the speaker's recent lines from this pool."""
+        ring = self._history.get((speaker_id, pool.key))
+        if ring is None:
+            ring = self._history[speaker_id, pool.key] = deque(maxlen=min(HISTORY, len(pool.lines) - 1))
+        index = self.rng.randrange(len(pool.lines) - len(ring))
+        for recent in sorted(ring):   # map onto the indices not in the ring
+            if recent <= index:
+                index += 1
+        if ring.maxlen:
+            ring.append(index)
+        return index
+
+    def _generated(self, prompt: str) -> str | None:
+        key = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+        line = self.cache.lines.get(key)
+        if line is None and key not in self._pending:
+            self._pending.add(key)
+            if self._workers is None:
+                self._workers = ThreadPoolExecutor(GENERATOR_THREADS, thread_name_prefix="dialogue")
+            self._workers.submit(self._generate, key, prompt)
+        return line
+
+    def _generate(self, key: str, prompt: str) -> None:
+        try:
+            line = self.generator(prompt)
+            if line:
+                self.cache.put(key, line)
+        finally:
+            self._pending.discard(key)
+
+
+_dialogues: "WeakKeyDictionary[World, Dialogue]" = WeakKeyDictionary()
+
+
+def dialogue_of(world: World) -> Dialogue:
+    """Return the world's Dialogue; without load_dialogue() it has no templates."""
+    dialogue = _dialogues.get(world)
+    if dialogue is None:
+        dialogue = _dialogues[world] = Dialogue(world)
+    return dialogue
+
+
+def load_dialogue(world: World, path: str | Path,
+                  generator: Callable[[str], str] | None = None,
+                  cache: str | Path | None = None, seed: int | None = None) -> Dialogue | None:
+    """Compile a world's templates and attach them to the world.
+
+    path: the YAML file, or the world JSON, whose `<stem>.dialogs.yaml`
+    sibling is used if it exists. With a generator and no cache path, the
+    generated lines go to `<stem>.dialogs.db` next to the YAML file.
+    Returns None (and leaves the world as is) if there is no template file.
+    """
+    path = Path(path)
+    if path.suffix == ".json":
+        path = path.with_name(f"{path.stem}.dialogs.yaml")
+    if not path.exists():
+        return None
+    import yaml   # only worlds with templates need PyYAML
+
+    templates = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    if not isinstance(templates, dict):
+        raise ValueError(f"{path}: expected a mapping of speakers")
+    if generator is not None and cache is None:
+        cache = path.with_name(path.name.removesuffix(".yaml") + ".db")
+    old = _dialogues.get(world)
+    if old is not None:
+        if old.pools:
+            world.unsubscribe(old._on_change)
+        old.close()
+    dialogue = _dialogues[world] = Dialogue(world, templates, generator, cache, seed)
+    return dialogue
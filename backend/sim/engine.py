@@ -5,27 +5,49 @@ Each call to tick(world) advances time by one step and applies all BEHAVIOR
 effects to entities that have HP — either defined directly on the entity,
 or inherited via TYPE_OF categories.
 
+tick() advances world.meta.tick itself, before the first phase, so phases
+and everything keyed by time (stack decay, random streams, hooks) see the
+number of the tick being run. Earlier versions left meta.tick alone and a
+saved world stayed at tick 0; callers must not add their own increment.
+
 BEHAVIOR number convention:
   positive  → HP drain  (hunger, decay, battery drain, entropy ...)
   negative  → HP gain   (recharge, regeneration ...)
 
-Lookup order per entity (all four sources summed):
+Lookup order per entity (all five sources summed):
   1. BEHAVIOR relations where ent1 == entity.id         (entity-specific)
   2. BEHAVIOR relations where ent1 == category          (TYPE_OF cascade)
   3. BEHAVIOR relations where ent1 == location.id       (location-direct)
   4. BEHAVIOR relations where ent1 == location_category (location TYPE_OF cascade)
+  5. Neighbourhood aggregates over EDGE-adjacent ENVIs   (backend/sim/neighbourhood.py)
 
 All matching behaviors are collected and their rates summed — an entity
 under multiple effects accumulates them all each tick.
+
+Entities and SUMS stacks that reached a fixed point (nothing to drain, HP at
+0 under drain, HP at cap under healing) are put to sleep and skipped until a
+world change wakes them — see backend/sim/activity.py.
 """
 
 import math
 import random
+import time
 from dataclasses import dataclass
+from typing import Callable
 
 from backend.core.world import World
 from backend.core.entity import Entity, EntityType
 from backend.core.relation import Relation, RelationType
+from backend.sim.activity import activity_of
+from backend.sim.dialogue import dialogue_of
+from backend.sim.hooks import hooks_of
+from backend.sim.hpindex import hp_index_of
+from backend.sim.metrics import firings_of, produced_of
+from backend.sim.neighbourhood import neighbourhood_of
+from backend.sim.remote import remote_of
+from backend.sim.rng import draws_of, streams_of
+from backend.sim.stacks import stacks_of
+from backend.sim.walkers import walkers_of
 
 
 # ── Intent ───────────────────────────────────────────────────────────────────
@@ -44,17 +66,21 @@ class Intent:
     weight: float = 1.0      # urgency: 0.0 = low, 1.0 = critical
 
 
-def _poisson(lam: float, max_yield: int = 4) -> int:
-    """Draw a sample from Poisson(lam), capped at max_yield. Uses Knuth's algorithm."""
+def _poisson(lam: float, max_yield: int = 4, rand: Callable[[], float] | None = None) -> int:
+    """Draw a sample from Poisson(lam), capped at max_yield. Uses Knuth's algorithm.
+
+    rand: the uniform source (a Stream's random, backend/sim/rng.py); default random.random.
+    """
+    rand = rand or random.random
     L = math.exp(-lam)
     k, p = 0, 1.0
     while p > L:
         k += 1
-        p *= random.random()
+        p *= rand()
     return min(k - 1, max_yield)
 
 
-def _process_produce(world: World) -> list[str]:
+def _process_produce(world: World, due: dict[int, int] | None = None) -> list[str]:
     """Apply all PRODUCE relations.
 
     Either/or yield mode:
@@ -67,11 +93,33 @@ def _process_produce(world: World) -> list[str]:
     TYPE_OF category name. All ENVI entities of that type are found; those
     occupied by at least one CHAR are excluded. One empty ENVI is chosen at
     random to receive the produced items this tick.
+
+    due: relation id → amount, for schedulers that draw yields themselves
+         (backend/sim/scheduler.py). Only the listed relations produce, and
+         no Poisson draw is made.
+
+    With meta.vars["rng"] set, yields and sites come from per-relation
+    streams (backend/sim/rng.py) instead of the global random module.
     """
     log: list[str] = []
-    produce_rels = [r for r in world.relations.values() if r.type == RelationType.PRODUCE]
-    for r in produce_rels:
-        amount = _poisson(r.lambda_, r.number) if r.lambda_ > 0 else r.number
+    streams = streams_of(world)
+    produced = produced_of(world)   # per item, for console.py's run report
+    producers = world.related(RelationType.PRODUCE)
+    if streams is not None:   # new stacks are numbered in this order
+        producers = sorted(producers, key=lambda r: r.id)
+    for r in producers:
+        if due is None:
+            if r.lambda_ <= 0:
+                amount = r.number
+            elif streams is None:
+                amount = _poisson(r.lambda_, r.number, draws_of(world).random)
+            else:
+                amount = _poisson(r.lambda_, r.number,
+                                  streams.stream(world.meta.tick, "produce", r.id).random)
+        elif r.id in due:
+            amount = due[r.id]
+        else:
+            continue
         if amount == 0:
             continue
 
@@ -83,29 +131,25 @@ def _process_produce(world: World) -> list[str]:
         if producer is None or producer.type == EntityType.UNIQUE:
             # Type-based: find all ENVI entities with TYPE_OF(x, r.ent1).
             candidates = [
-                world.get(rel.ent1) for rel in world.relations.values()
-                if rel.type == RelationType.TYPE_OF and rel.ent2 == r.ent1
-                and world.get(rel.ent1) is not None
+                world.get(rel.ent1) for rel in world.related(RelationType.TYPE_OF, ent2=r.ent1)
+                if world.get(rel.ent1) is not None
                 and world.get(rel.ent1).type == EntityType.ENVI
             ]
             # Exclude ENVIs that already hold a CHAR child (occupied squares).
-            occupied = {
-                rel.ent1 for rel in world.relations.values()
-                if rel.type == RelationType.LOCATION
-                and world.get(rel.ent2) is not None
-                and world.get(rel.ent2).type == EntityType.CHAR
-            }
-            candidates = [e for e in candidates if e.id not in occupied]
+            candidates = [
+                e for e in candidates
+                if not any(child.type == EntityType.CHAR for child, _ in world.children(e.id))
+            ]
             if not candidates:
                 continue
-            producer = random.choice(candidates)
+            if streams is None:
+                producer = draws_of(world).choice(candidates)
+            else:   # by id, not index order: the draw must not depend on the world's history
+                candidates.sort(key=lambda e: e.id)
+                producer = streams.stream(world.meta.tick, "produce.site", r.id).choice(candidates)
 
         # Find existing LOCATION(producer.id → ent2) to read current stock.
-        loc = next(
-            (l for l in world.relations.values()
-             if l.type == RelationType.LOCATION and l.ent1 == producer.id and l.ent2 == r.ent2),
-            None,
-        )
+        loc = next(iter(world.related(RelationType.LOCATION, producer.id, r.ent2)), None)
         current = loc.number if loc is not None else 0
 
         # Cap: producer.capacity × item.capacity (only when both are defined).
@@ -119,21 +163,23 @@ def _process_produce(world: World) -> list[str]:
 
         if loc is not None:
             # HP: blend existing stack with freshly produced items (weighted average).
+            blended = None
             if item is not None and item.hp_max is not None and loc.hp is not None:
                 total = current + amount
-                loc.hp = round((current * loc.hp + amount * item.hp_max) / total)
-            loc.number += amount
+                blended = round((current * loc.hp + amount * item.hp_max) / total)
+            world.set_stack(loc, number=loc.number + amount, hp=blended)
         else:
             new_id = max(world.relations.keys(), default=0) + 1
             init_hp = item.hp_max if (item is not None and item.hp_max is not None) else None
-            world.relations[new_id] = Relation(
+            world.insert_relation(Relation(
                 id=new_id,
                 type=RelationType.LOCATION,
                 ent1=producer.id,
                 ent2=r.ent2,
                 number=amount,
                 hp=init_hp,
-            )
+            ))
+        produced[r.ent2] += amount
         log.append(f"{producer.name}: +{amount} {item.name}")
     return log
 
@@ -146,12 +192,16 @@ def _collect_behaviors(
     """
     Return all (behavior_name, rate) pairs active for entity_id.
 
-    Four sources (applied in order, all summed):
+    Six sources (applied in order, all summed):
       1. Entity-specific BEHAVIOR relations (direct override).
       2. TYPE_OF category cascade — behaviors on each category the entity belongs to.
       3. Location-direct — BEHAVIOR on the specific ENVI the entity currently occupies.
       4. Location-category cascade — BEHAVIOR on TYPE_OF categories of that ENVI
          (e.g. TYPE_OF(D1, HOME_SQUARE) + BEHAVIOR(HOME_SQUARE, RECHARGE, -5)).
+      5. Neighbourhood modifiers — aggregates over the EDGE neighbours of that ENVI
+         declared in meta.vars["neighbourhood"]; entities only, not SUMS stacks.
+      6. Engine hooks of a world package (backend/sim/hooks.py) — the modifiers
+         their last answer gave the entity; entities only.
 
     location_id: if provided, use this entity as the location instead of calling
                  world.location_of(). Used by _process_sums_hp to handle per-stack
@@ -160,88 +210,211 @@ def _collect_behaviors(
     behaviors: list[tuple[str, int]] = []
 
     # 1. Entity-specific behaviors
-    for r in world.relations.values():
-        if r.type == RelationType.BEHAVIOR and r.ent1 == entity_id:
-            behaviors.append((r.ent2, r.number))
+    for r in world.related(RelationType.BEHAVIOR, ent1=entity_id):
+        behaviors.append((r.ent2, r.number))
 
     # 2. Inherited via TYPE_OF categories
-    categories = [
-        r.ent2 for r in world.relations.values()
-        if r.type == RelationType.TYPE_OF and r.ent1 == entity_id
-    ]
+    categories = [r.ent2 for r in world.related(RelationType.TYPE_OF, ent1=entity_id)]
     for category in categories:
-        for r in world.relations.values():
-            if r.type == RelationType.BEHAVIOR and r.ent1 == category:
-                behaviors.append((r.ent2, r.number))
+        for r in world.related(RelationType.BEHAVIOR, ent1=category):
+            behaviors.append((r.ent2, r.number))
 
     # 3 + 4. Location-based: behaviors on the entity's current ENVI,
     #         and on the TYPE_OF categories of that ENVI.
     location = world.get(location_id) if location_id is not None else world.location_of(entity_id)
     if location is not None:
-        for r in world.relations.values():
-            if r.type == RelationType.BEHAVIOR and r.ent1 == location.id:
-                behaviors.append((r.ent2, r.number))
-        location_categories = [
-            r.ent2 for r in world.relations.values()
-            if r.type == RelationType.TYPE_OF and r.ent1 == location.id
-        ]
+        for r in world.related(RelationType.BEHAVIOR, ent1=location.id):
+            behaviors.append((r.ent2, r.number))
+        location_categories = [r.ent2 for r in world.related(RelationType.TYPE_OF, ent1=location.id)]
         for category in location_categories:
-            for r in world.relations.values():
-                if r.type == RelationType.BEHAVIOR and r.ent1 == category:
-                    behaviors.append((r.ent2, r.number))
+            for r in world.related(RelationType.BEHAVIOR, ent1=category):
+                behaviors.append((r.ent2, r.number))
+
+    # 5 + 6. Neighbourhood aggregates and package engine hooks (per-stack calls
+    #        pass location_id and get neither)
+    if location_id is None:
+        hood = neighbourhood_of(world)
+        if hood.specs:
+            behaviors += hood.behaviors(world, entity_id, location.id if location is not None else None)
+        modifiers = hooks_of(world).modifiers
+        if modifiers:
+            behaviors += modifiers.get(entity_id, ())
 
     return behaviors
 
 
+def _clamp_hp(hp: int, drain: int, cap: int) -> int:
+    """One tick of BEHAVIOR drain: hp - drain, kept within [0, cap]."""
+    return max(0, min(cap, hp - drain))
+
+
 def _process_sums_hp(world: World) -> list[str]:
     """Apply BEHAVIOR-based HP drain to per-LOCATION stacks of SUMS entities.
 
-    Iterates all LOCATION relations that carry an hp value (freshness/durability).
-    When hp reaches 0, the stack is wiped (number set to 0).
+    A stack under constant drain is anchored once (Relation.decay) and its hp
+    is derived on read from then on; see backend/sim/stacks.py. This phase
+    only visits stacks woken by a world change and stacks whose hp reaches 0
+    this tick — those are wiped (relation removed). The drain of anchored
+    stacks is logged only with stacks_of(world).log set.
     Only LOCATION relations pointing to SUMS entities are processed here;
-    CHAR/UNIQUE HP is handled in the main entity loop in tick().
+    CHAR/UNIQUE HP is handled in _process_entity_hp().
     """
-    log: list[str] = []
-    for loc_rel in list(world.relations.values()):
-        if loc_rel.type != RelationType.LOCATION:
+    lines: list[tuple[int, str]] = []
+    activity = activity_of(world)
+    clock = stacks_of(world)
+    now = world.meta.tick
+    clock.tick = now - 1   # hp as of the end of the previous tick
+
+    for loc_rel, causes in clock.due(world, now):
+        if loc_rel.id in activity.active_stacks:
+            world.set_decay(loc_rel, None)   # woken: its course may have changed — re-check below
             continue
-        if loc_rel.hp is None:
+        item = world.get(loc_rel.ent2)
+        old_hp = loc_rel.hp
+        lines.append((activity.stack_key(loc_rel.id),
+                      f"{item.name}: HP {old_hp} -> 0  [{causes}] [WIPED]"))
+        loc_rel.hp = 0
+        world.delete_relation(loc_rel.id)
+
+    for loc_rel in activity.stacks(world):
+        activity.sleep_stack(loc_rel.id)
+        if loc_rel.type != RelationType.LOCATION or loc_rel.hp is None:
             continue
         item = world.get(loc_rel.ent2)
         if item is None or item.type != EntityType.SUMS:
             continue
 
         behaviors = _collect_behaviors(world, loc_rel.ent2, location_id=loc_rel.ent1)
-        if not behaviors:
+        total_drain = sum(rate for _, rate in behaviors)
+        old_hp = loc_rel.hp
+        hp_max = item.hp_max if item.hp_max is not None else old_hp
+        decay = loc_rel.decay
+        if decay is not None and (decay.drain, decay.cap) == (total_drain, hp_max):
+            continue   # woken, but still on the same course (e.g. one eaten)
+        new_hp = _clamp_hp(old_hp, total_drain, hp_max) if total_drain else old_hp
+        if new_hp == old_hp:
+            world.set_decay(loc_rel, None)   # fixed point — keep the current value
             continue
 
+        causes = "+".join(name for name, _ in behaviors)
+        if new_hp == 0:
+            lines.append((activity.stack_key(loc_rel.id),
+                          f"{item.name}: HP {old_hp} -> 0  [{causes}] [WIPED]"))
+            loc_rel.hp = 0
+            world.delete_relation(loc_rel.id)
+            continue
+        clock.anchor(world, loc_rel, old_hp, now - 1, total_drain, hp_max, causes,
+                     activity.stack_key(loc_rel.id))
+
+    clock.tick = now
+    if clock.log:
+        for loc_rel in world.relations.values():
+            decay = loc_rel.decay
+            if decay is None or decay.at(now - 1) == decay.at(now):
+                continue
+            item = world.get(loc_rel.ent2)
+            causes = "+".join(name for name, _ in
+                              _collect_behaviors(world, loc_rel.ent2, location_id=loc_rel.ent1))
+            lines.append((activity.stack_key(loc_rel.id),
+                          f"{item.name}: HP {decay.at(now - 1)} -> {decay.at(now)}  [{causes}]"))
+    return [line for _, line in sorted(lines, key=lambda kv: kv[0])]
+
+
+def _process_entity_hp(world: World, steps: dict[str, int] | None = None) -> list[str]:
+    """Apply BEHAVIOR-based HP drain (and the graveyard rule) to active entities.
+
+    SUMS are skipped — their HP is per-LOCATION; handled by _process_sums_hp().
+    An entity whose next tick would leave its HP unchanged is put to sleep.
+
+    steps: entity id → ticks of drain to apply now, for schedulers that run
+           entities at their own rate (backend/sim/multirate.py). Active
+           entities not listed are left alone, and awake.
+    """
+    log: list[str] = []
+    activity = activity_of(world)
+    neighbourhood_of(world).update(world)
+    log += hooks_of(world).run_engine(world)
+    for entity in activity.entities(world):
+        if entity.hp is None or entity.type == EntityType.SUMS:
+            activity.sleep_entity(entity.id)
+            continue
+        ticks = 1
+        if steps is not None:
+            ticks = steps.get(entity.id, 0)
+            if not ticks:
+                continue
+
+        # Graveyard rule: any entity inside a GRAVEYARD-typed ENVI loses all HP instantly.
+        if entity.hp > 0 and _in_graveyard(world, entity.id):
+            world.set_hp(entity, 0)
+            log.append(f"{entity.name}: captured — HP -> 0  [GRAVEYARD]")
+            continue
+
+        behaviors = _collect_behaviors(world, entity.id)
         total_drain = sum(rate for _, rate in behaviors)
         if total_drain == 0:
+            activity.sleep_entity(entity.id)
             continue
 
-        old_hp = loc_rel.hp
-        hp_max = item.hp_max if item.hp_max is not None else old_hp
-        loc_rel.hp = max(0, min(hp_max, loc_rel.hp - total_drain))
-
-        if loc_rel.hp != old_hp:
-            causes = "+".join(name for name, _ in behaviors)
-            if loc_rel.hp == 0:
-                del world.relations[loc_rel.id]
-                log.append(f"{item.name}: HP {old_hp} -> 0  [{causes}] [WIPED]")
-            else:
-                log.append(f"{item.name}: HP {old_hp} -> {loc_rel.hp}  [{causes}]")
+        old_hp = entity.hp
+        cap = entity.hp_max if entity.hp_max is not None else entity.hp
+        new_hp = _clamp_hp(old_hp, total_drain, cap)
+        if new_hp == old_hp:
+            activity.sleep_entity(entity.id)
+            continue
+        for _ in range(ticks - 1):
+            new_hp = _clamp_hp(new_hp, total_drain, cap)
+
+        world.set_hp(entity, new_hp)
+        causes = "+".join(name for name, _ in behaviors)
+        span = f" ({ticks} ticks)" if ticks > 1 else ""
+        suffix = " [DEAD]" if new_hp == 0 else ""
+        log.append(f"{entity.name}: HP {old_hp} -> {new_hp}  [{causes}]{span}{suffix}")
+
+        cap = entity.hp_max if entity.hp_max is not None else new_hp
+        if _clamp_hp(new_hp, total_drain, cap) == new_hp and not (
+                new_hp > 0 and _in_graveyard(world, entity.id)):
+            activity.sleep_entity(entity.id)
     return log
 
 
-def _get_dialogue(world: World, entity_id: str | None) -> str | None:
-    """Return description of a dialogue UNIQUE entity, or None."""
-    if entity_id is None:
-        return None
-    entity = world.get(entity_id)
-    return entity.description if entity is not None else None
+def _get_dialogue(world: World, speaker: Entity, line_id: str | None, event: str) -> str | None:
+    """What speaker says for a TRIGGER firing: a template line (backend/sim/dialogue.py),
+    else the description of the line_id UNIQUE, or None."""
+    return dialogue_of(world).line(world, speaker, line_id, event)
+
 
+def _due_triggers(world: World, ambient: set[int] | None) -> list[Relation]:
+    """TRIGGERs that may fire this tick, in world.related(TRIGGER) order (by id
+    with streams: a resurrection clears the fired thresholds of its speaker, so
+    the outcome depends on which comes first).
 
-def _process_triggers(world: World) -> list[str]:
+    Speakers come from the world's HpIndex (backend/sim/hpindex.py): those at
+    or below the highest threshold any TRIGGER uses, and those at 0 HP for
+    resurrection. A resurrection only raises HP, so no TRIGGER later in the
+    same pass can become due; the rest are skipped without a random draw,
+    exactly as the full scan skips them.
+    """
+    index = hp_index_of(world)
+    triggers = index.triggers(world)
+    if ambient is None:
+        due = {i for i in triggers.ambient if triggers.all[i].lambda_ > 0}
+    else:
+        due = {triggers.position[rid] for rid in ambient if rid in triggers.position}
+    if triggers.max_threshold is not None:
+        for speaker in index.at_most(triggers.max_threshold):
+            for i in triggers.by_speaker.get(speaker.id, ()):
+                if triggers.all[i].number >= speaker.hp:
+                    due.add(i)
+    if triggers.resurrecting:
+        for speaker in index.at_most(0):
+            if speaker.id in triggers.resurrecting:
+                due.update(i for i in triggers.by_speaker[speaker.id] if triggers.all[i].number == -1)
+    found = [triggers.all[i] for i in sorted(due)]
+    return found if streams_of(world) is None else sorted(found, key=lambda r: r.id)
+
+
+def _process_triggers(world: World, ambient: set[int] | None = None) -> list[str]:
     """Fire TRIGGER relations — character dialogue driven by HP or probability.
 
     Three modes (controlled by 'number' field):
@@ -254,13 +427,20 @@ def _process_triggers(world: World) -> list[str]:
       number == -1 Resurrection: fires when ent1.hp == 0, resets hp to
                    hp_max, and clears this entity's threshold triggers from
                    fired so the arc can repeat in the next life.
+
+    ambient: ids of the ambient triggers that fire this tick, for schedulers
+             that draw the Bernoulli trials themselves. None = draw here.
+
+    With meta.vars["rng"] set, each TRIGGER draws from its own stream
+    (backend/sim/rng.py) instead of the global random module.
     """
     log: list[str] = []
+    streams = streams_of(world)
+    draws = draws_of(world)
     fired: list = world.meta.vars.setdefault("triggers_fired", [])
+    firings = firings_of(world)   # per mode, for backend/sim/metrics.py
 
-    for r in list(world.relations.values()):
-        if r.type != RelationType.TRIGGER:
-            continue
+    for r in _due_triggers(world, ambient):
         speaker = world.get(r.ent1)
         if speaker is None:
             continue
@@ -268,26 +448,31 @@ def _process_triggers(world: World) -> list[str]:
         # ── Resurrection (number == -1) ───────────────────────────
         if r.number == -1:
             if speaker.hp is not None and speaker.hp == 0 and speaker.hp_max is not None:
-                speaker.hp = speaker.hp_max
+                world.set_hp(speaker, speaker.hp_max)
                 # Reset threshold triggers so the despair arc repeats next life
                 reset_ids = [
-                    tr.id for tr in world.relations.values()
-                    if tr.type == RelationType.TRIGGER
-                    and tr.ent1 == r.ent1
-                    and tr.number > 0
+                    tr.id for tr in world.related(RelationType.TRIGGER, ent1=r.ent1)
+                    if tr.number > 0
                     and tr.id in fired
                 ]
                 for tid in reset_ids:
                     fired.remove(tid)
-                line = _get_dialogue(world, r.ent2)
+                firings["resurrect"] += 1
+                line = _get_dialogue(world, speaker, r.ent2, "resurrect")
                 suffix = f" | \"{line}\"" if line else ""
                 log.append(f"[RESURRECT] {speaker.name} 0 -> {speaker.hp_max} HP{suffix}")
             continue
 
         # ── Ambient (number == 0) ─────────────────────────────────
         if r.number == 0:
-            if r.lambda_ > 0 and random.random() < r.lambda_:
-                line = _get_dialogue(world, r.ent2)
+            if ambient is not None:
+                fires = r.id in ambient
+            else:
+                rand = draws.random if streams is None else streams.stream(world.meta.tick, "triggers", r.id).random
+                fires = r.lambda_ > 0 and rand() < r.lambda_
+            if fires:
+                firings["ambient"] += 1
+                line = _get_dialogue(world, speaker, r.ent2, "ambient")
                 if line:
                     log.append(f"{speaker.name}: \"{line}\"")
             continue
@@ -305,9 +490,11 @@ def _process_triggers(world: World) -> list[str]:
         else:
             p = 1.0  # No sigma = always fire when threshold is crossed
 
-        if random.random() < p:
+        rand = draws.random if streams is None else streams.stream(world.meta.tick, "triggers", r.id).random
+        if rand() < p:
             fired.append(r.id)
-            line = _get_dialogue(world, r.ent2)
+            firings["threshold"] += 1
+            line = _get_dialogue(world, speaker, r.ent2, "threshold")
             if line:
                 log.append(f"{speaker.name}: \"{line}\"  [HP {speaker.hp} <= {r.number}]")
 
@@ -320,9 +507,16 @@ _SURVIVAL_THRESHOLD = 0.8   # EAT when hp / hp_max falls below this
 
 
 def _find_food_in_inventory(world: World, actor_id: str) -> Entity | None:
-    """Return the first SUMS item in actor's direct inventory with nutritional value (hp_max > 0)."""
-    for entity, qty in world.children(actor_id):
-        if entity.type == EntityType.SUMS and entity.hp_max and qty > 0:
+    """Return the first SUMS item in actor's direct inventory with nutritional value (hp_max > 0).
+
+    First in index order; with meta.vars["rng"] set, in relation id order.
+    """
+    stacks = world.related(RelationType.LOCATION, ent1=actor_id)
+    if streams_of(world) is not None:
+        stacks = sorted(stacks, key=lambda r: r.id)
+    for r in stacks:
+        entity = world.get(r.ent2)
+        if entity is not None and entity.type == EntityType.SUMS and entity.hp_max and r.number > 0:
             return entity
     return None
 
@@ -330,8 +524,8 @@ def _find_food_in_inventory(world: World, actor_id: str) -> Entity | None:
 def _actor_categories(world: World, actor_id: str) -> set[str]:
     """Return the set of TYPE_OF category strings for this actor."""
     return {
-        r.ent2 for r in world.relations.values()
-        if r.type == RelationType.TYPE_OF and r.ent1 == actor_id and r.ent2 is not None
+        r.ent2 for r in world.related(RelationType.TYPE_OF, ent1=actor_id)
+        if r.ent2 is not None
     }
 
 
@@ -341,9 +535,7 @@ def _edge_allows(world: World, from_id: str, to_id: str, actor_id: str) -> bool:
     Checks direction (one_way) and deny (TYPE_OF category restriction).
     """
     actor_cats = _actor_categories(world, actor_id)
-    for r in world.relations.values():
-        if r.type != RelationType.EDGE:
-            continue
+    for r in world.touching(RelationType.EDGE, from_id):
         if r.ent1 == from_id and r.ent2 == to_id:
             pass  # forward direction
         elif r.ent2 == from_id and r.ent1 == to_id and not r.one_way:
@@ -363,6 +555,7 @@ def _find_healing_envi(world: World, actor_id: str) -> Entity | None:
     this actor (respects one_way and deny).
     Healing means: the candidate ENVI (or one of its TYPE_OF categories) has at
     least one BEHAVIOR with a negative rate (drain < 0).
+    The first EDGE in index order wins; with meta.vars["rng"] set, in id order.
     """
     current_loc = world.location_of(actor_id)
     if current_loc is None or current_loc.type != EntityType.ENVI:
@@ -370,15 +563,15 @@ def _find_healing_envi(world: World, actor_id: str) -> Entity | None:
 
     # Collect entity IDs that carry a net-healing BEHAVIOR (negative rate)
     healing_sources: set[str] = {
-        r.ent1 for r in world.relations.values()
-        if r.type == RelationType.BEHAVIOR and r.number < 0
+        r.ent1 for r in world.related(RelationType.BEHAVIOR) if r.number < 0
     }
 
     # Walk all EDGE relations touching current_loc
     actor_cats = _actor_categories(world, actor_id)
-    for r in world.relations.values():
-        if r.type != RelationType.EDGE:
-            continue
+    edges = world.touching(RelationType.EDGE, current_loc.id)
+    if streams_of(world) is not None:
+        edges = sorted(edges, key=lambda r: r.id)
+    for r in edges:
         if r.ent1 == current_loc.id:
             target_id = r.ent2
         elif r.ent2 == current_loc.id and not r.one_way:
@@ -394,8 +587,7 @@ def _find_healing_envi(world: World, actor_id: str) -> Entity | None:
             continue
         # Direct healing on this ENVI, or via its TYPE_OF categories
         candidate_sources = {candidate.id} | {
-            r2.ent2 for r2 in world.relations.values()
-            if r2.type == RelationType.TYPE_OF and r2.ent1 == candidate.id
+            r2.ent2 for r2 in world.related(RelationType.TYPE_OF, ent1=candidate.id)
         }
         if candidate_sources & healing_sources:
             return candidate
@@ -428,6 +620,18 @@ def _survival_brain(world: World, entity: Entity) -> list[Intent]:
     return []
 
 
+def _neighbours(world: World, entity: Entity) -> list[str]:
+    """ENVI ids reachable via EDGE from the entity's current ENVI (respecting one_way and deny).
+
+    The list is shared through the world's WalkCache — do not modify it.
+    """
+    current_loc = world.location_of(entity.id)
+    if current_loc is None or current_loc.type != EntityType.ENVI:
+        return []
+    cache = walkers_of(world)
+    return cache.neighbours(world, current_loc.id, cache.deny_key(world, entity.id))
+
+
 def _rand_brain(world: World, entity: Entity) -> list[Intent]:
     """Generate a random MOVE intent to any reachable ENVI.
 
@@ -435,47 +639,136 @@ def _rand_brain(world: World, entity: Entity) -> list[Intent]:
     actor's current location (respecting one_way and deny).  Returns [] if
     the actor has no current location or no reachable neighbours.
     """
-    current_loc = world.location_of(entity.id)
-    if current_loc is None or current_loc.type != EntityType.ENVI:
-        return []
+    return _rand_brains(world, [entity])[0]
 
-    actor_cats = _actor_categories(world, entity.id)
-    neighbours: list[str] = []
-    for r in world.relations.values():
-        if r.type != RelationType.EDGE:
-            continue
-        if r.ent1 == current_loc.id:
-            target_id = r.ent2
-        elif r.ent2 == current_loc.id and not r.one_way:
-            target_id = r.ent1
-        else:
-            continue
-        if r.deny is not None and r.deny in actor_cats:
-            continue
-        if target_id is None:
-            continue
-        candidate = world.get(target_id)
-        if candidate is not None and candidate.type == EntityType.ENVI:
-            neighbours.append(target_id)
 
-    if not neighbours:
-        return []
-    return [Intent(actor_id=entity.id, action="MOVE", target_id=random.choice(neighbours))]
+def _rand_brains(world: World, actors: list[Entity]) -> list[list[Intent]]:
+    """_rand_brain for a whole crowd; one intent list per actor.
+
+    Actors are grouped by (current ENVI, deny key) and each group's
+    neighbour list is looked up once (backend/sim/walkers.py). Targets are
+    then drawn in actor order — the same random.choice calls, in the same
+    order, as calling _rand_brain per actor. With meta.vars["rng"] set, each
+    actor draws from its own stream (backend/sim/rng.py) instead, out of
+    the neighbours sorted by id rather than in EDGE index order.
+    """
+    cache = walkers_of(world)
+    streams = streams_of(world)
+    groups: dict[tuple[str, frozenset[str]], list[int]] = {}
+    for i, entity in enumerate(actors):
+        current_loc = world.location_of(entity.id)
+        if current_loc is not None and current_loc.type == EntityType.ENVI:
+            groups.setdefault((current_loc.id, cache.deny_key(world, entity.id)), []).append(i)
+
+    options: list[list[str]] = [[]] * len(actors)
+    for (envi_id, deny_key), members in groups.items():
+        neighbours = cache.neighbours(world, envi_id, deny_key)
+        if streams is not None:
+            neighbours = sorted(neighbours)
+        for i in members:
+            options[i] = neighbours
+
+    if streams is None:
+        choice = draws_of(world).choice
+        return [
+            [Intent(actor_id=entity.id, action="MOVE", target_id=choice(neighbours))] if neighbours else []
+            for entity, neighbours in zip(actors, options)
+        ]
+    now = world.meta.tick
+    return [
+        [Intent(actor_id=entity.id, action="MOVE",
+                target_id=streams.stream(now, "intents", entity.id).choice(neighbours))] if neighbours else []
+        for entity, neighbours in zip(actors, options)
+    ]
+
+
+# control value → brain. "remote:<url>" CHARs are asked over HTTP (see
+# _remote_view and backend/sim/remote.py), "hook:<name>" CHARs by an intents
+# hook of the world package (backend/sim/hooks.py). Other values ("player",
+# …) are stubs for now: those CHARs generate no intents.
+BRAINS: dict[str, Callable[[World, Entity], list[Intent]]] = {
+    "survival": _survival_brain,
+    "rand":     _rand_brain,
+}
+
+REMOTE = "remote:"   # control prefix; the rest is the remote brain's URL
+HOOK = "hook:"       # control prefix; the rest is the intents hook's name
+
+
+def has_brain(entity: Entity) -> bool:
+    """True if the entity is a CHAR whose control generates intents."""
+    return entity.type == EntityType.CHAR and entity.control is not None and (
+        entity.control in BRAINS or entity.control.startswith((REMOTE, HOOK)))
+
 
+def _remote_view(world: World, entity: Entity) -> dict:
+    """What a remote brain or intents hook is told about its CHAR (see backend/sim/remote.py)."""
+    location = world.location_of(entity.id)
+    return {
+        "id": entity.id,
+        "name": entity.name,
+        "hp": entity.hp,
+        "hp_max": entity.hp_max,
+        "location": location.id if location is not None else None,
+        "neighbours": list(_neighbours(world, entity)),
+        "inventory": [[item.id, qty] for item, qty in world.children(entity.id)],
+    }
+
+
+def _collect_intents(world: World, actors: set[str] | None = None) -> list[Intent]:
+    """Ask every active CHAR for its intent this tick.
 
-def _collect_intents(world: World) -> list[Intent]:
-    """Ask every active CHAR for its intent this tick."""
+    Only CHARs are visited — the HpIndex roster, in entity order (by id with
+    meta.vars["rng"] set, so the outcome does not depend on load order) — and with
+    actors given, only those CHARs (schedulers that run brains at their own
+    rate, backend/sim/multirate.py).
+    Rand walkers are decided together (_rand_brains), remote brains and
+    package intents hooks are asked together once all local brains have run;
+    a remote or hooked CHAR whose answer misses the deadline gets the
+    survival brain instead. Intents keep entity order either way.
+    """
     intents: list[Intent] = []
-    for entity in world.entities.values():
-        if entity.type != EntityType.CHAR or entity.control is None:
+    walkers: list[Entity] = []
+    remote: dict[str, list[dict]] = {}     # endpoint → actor views
+    hooked: dict[str, list[dict]] = {}     # intents hook → actor views
+    deferred: list[tuple[int, Entity]] = []   # (position in intents, walker or remote CHAR)
+    roster = hp_index_of(world).chars()
+    if streams_of(world) is not None:
+        roster.sort(key=lambda e: e.id)
+    for entity in roster:
+        if entity.control is None or (actors is not None and entity.id not in actors):
+            continue
+        if entity.control == "rand":
+            walkers.append(entity)
+        elif entity.control.startswith(REMOTE):
+            remote.setdefault(entity.control[len(REMOTE):], []).append(_remote_view(world, entity))
+        elif entity.control.startswith(HOOK):
+            hooked.setdefault(entity.control[len(HOOK):], []).append(_remote_view(world, entity))
+        else:
+            brain = BRAINS.get(entity.control)
+            if brain is not None:
+                intents.extend(brain(world, entity))
             continue
-        match entity.control:
-            case "survival":
-                intents.extend(_survival_brain(world, entity))
-            case "rand":
-                intents.extend(_rand_brain(world, entity))
-            case "player" | _:
-                pass   # stubs — future iterations
+        deferred.append((len(intents), entity))
+
+    if not deferred:
+        return intents
+    chosen: dict[str, list[Intent]] = dict(zip(
+        (entity.id for entity in walkers), _rand_brains(world, walkers)))
+    if remote or hooked:
+        answers = remote_of(world).decide(world.name, world.meta.tick, remote) if remote else {}
+        if hooked:
+            answers.update(hooks_of(world).decide(world, hooked))
+        for _, entity in deferred:
+            if entity.id in chosen:
+                continue
+            answer = answers.get(entity.id)
+            if answer is None:
+                chosen[entity.id] = _survival_brain(world, entity)
+            else:
+                chosen[entity.id] = [Intent(actor_id=entity.id, **fields) for fields in answer]
+    for pos, entity in reversed(deferred):
+        intents[pos:pos] = chosen[entity.id]
     return intents
 
 
@@ -496,20 +789,17 @@ def _execute_intents(world: World, intents: list[Intent]) -> list[str]:
             if item is None or item.hp_max is None:
                 continue
             loc_rel = next(
-                (r for r in world.relations.values()
-                 if r.type == RelationType.LOCATION
-                 and r.ent1 == intent.actor_id and r.ent2 == intent.target_id),
-                None,
+                iter(world.related(RelationType.LOCATION, intent.actor_id, intent.target_id)), None
             )
             if loc_rel is None or loc_rel.number <= 0:
                 continue
             restore = max(1, item.hp_max // 4)
             old_hp = actor.hp
-            actor.hp = min(actor.hp_max, actor.hp + restore)
-            loc_rel.number -= 1
+            world.set_hp(actor, min(actor.hp_max, actor.hp + restore))
+            world.set_stack(loc_rel, number=loc_rel.number - 1)
             note = " [last]" if loc_rel.number == 0 else f" x{loc_rel.number} left"
             if loc_rel.number == 0:
-                del world.relations[loc_rel.id]
+                world.delete_relation(loc_rel.id)
             log.append(
                 f"{actor.name}: EAT {item.name}{note}  "
                 f"(+{restore} HP  {old_hp} -> {actor.hp})"
@@ -536,53 +826,41 @@ def _in_graveyard(world: World, entity_id: str) -> bool:
     location = world.location_of(entity_id)
     if location is None:
         return False
-    return any(
-        r.type == RelationType.TYPE_OF and r.ent1 == location.id and r.ent2 == "Graveyards"
-        for r in world.relations.values()
-    )
-
-
-def tick(world: World) -> list[str]:
-    """
-    Advance the world by one tick.
-    Returns a list of human-readable log messages describing what happened.
-    """
-    log: list[str] = []
-
-    log += _process_produce(world)
-    log += _process_sums_hp(world)
+    return bool(world.related(RelationType.TYPE_OF, location.id, "Graveyards"))
 
-    for entity in list(world.entities.values()):
-        if entity.hp is None:
-            continue  # Entity has no HP — skip
-        if entity.type == EntityType.SUMS:
-            continue  # SUMS HP is per-LOCATION; handled by _process_sums_hp
 
-        # Graveyard rule: any entity inside a GRAVEYARD-typed ENVI loses all HP instantly.
-        if entity.hp > 0 and _in_graveyard(world, entity.id):
-            entity.hp = 0
-            log.append(f"{entity.name}: captured — HP -> 0  [GRAVEYARD]")
-            continue
+def _process_intents(world: World, actors: set[str] | None = None) -> list[str]:
+    """Collect every active CHAR's intents (or those of actors) and execute them."""
+    return _execute_intents(world, _collect_intents(world, actors))
 
-        behaviors = _collect_behaviors(world, entity.id)
-        if not behaviors:
-            continue
-
-        total_drain = sum(rate for _, rate in behaviors)
-        if total_drain == 0:
-            continue
 
-        old_hp = entity.hp
-        cap = entity.hp_max if entity.hp_max is not None else entity.hp
-        entity.hp = max(0, min(cap, entity.hp - total_drain))
+# Phase order within one tick. Alternative schedulers (fast-forward, event
+# queue, …) must run phases in this order to stay tick-for-tick identical.
+PHASES: list[tuple[str, Callable[[World], list[str]]]] = [
+    ("produce",  _process_produce),
+    ("sums_hp",  _process_sums_hp),
+    ("hp",       _process_entity_hp),
+    ("intents",  _process_intents),
+    ("triggers", _process_triggers),
+]
 
-        if entity.hp != old_hp:
-            causes = "+".join(name for name, _ in behaviors)
-            suffix = " [DEAD]" if entity.hp == 0 else ""
-            log.append(f"{entity.name}: HP {old_hp} -> {entity.hp}  [{causes}]{suffix}")
 
-    intents = _collect_intents(world)
-    log += _execute_intents(world, intents)
+def tick(world: World, timings: dict[str, float] | None = None) -> list[str]:
+    """
+    Advance the world by one tick (world.meta.tick is incremented first).
+    Returns a list of human-readable log messages describing what happened.
 
-    log += _process_triggers(world)
+    timings: phase name → seconds; each phase's wall time is added to it.
+    """
+    world.meta.tick += 1
+    log: list[str] = []
+    if timings is None:
+        for _, phase in PHASES:
+            log += phase(world)
+        return log
+    clock = time.perf_counter
+    for name, phase in PHASES:
+        started = clock()
+        log += phase(world)
+        timings[name] = timings.get(name, 0.0) + clock() - started
     return log
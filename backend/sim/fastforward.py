@@ -0,0 +1,266 @@
+"""
+Closed-form fast-forward: advance(world, n) ≡ n × tick(world), minus the n ×.
+
+BEHAVIOR drains are constant per tick, so the HP of a passive entity after k
+ticks is a clamped straight line:
+
+    h1 = clamp(h0 - drain)                 first step may cut an over-cap hp
+    hk = clamp(h1 - (k - 1) × drain)       clamp = max(0, min(cap, ·))
+
+advance() lifts every such entity out of the tick loop — it "coasts": asleep
+in the ActivityTracker, its stored hp frozen as the anchor value — and hands
+it back to the regular pipeline one tick before anything needs its real HP:
+
+  - a threshold TRIGGER would see hp <= number (and start drawing random numbers)
+  - a resurrection TRIGGER would see hp == 0
+
+SUMS stacks already drain in closed form inside the engine (stacks.py); the
+only thing advance() must not skip is the tick in which one is wiped.
+
+Everything with non-constant dynamics — PRODUCE, intents and the CHARs that
+generate them, TRIGGER draws, the graveyard, anything woken by a world
+change — keeps running through tick(), so the random stream and the final
+state match n calls of tick() exactly. When no per-tick work is left at all,
+advance() jumps straight to the next hand-back or wipe.
+
+The log is condensed: coasting stretches are reported as one line each.
+"""
+
+import heapq
+from dataclasses import dataclass
+
+from backend.core.entity import Entity, EntityType
+from backend.core.relation import Relation, RelationType
+from backend.core.world import World
+from backend.sim.activity import activity_of
+from backend.sim.engine import _clamp_hp, _collect_behaviors, _in_graveyard, tick
+from backend.sim.hooks import hooks_of
+from backend.sim.neighbourhood import neighbourhood_of
+from backend.sim.stacks import stacks_of
+
+
+@dataclass
+class _Coast:
+    """Closed-form anchor of one coasting entity."""
+    since: int           # meta.tick at which the stored hp was valid
+    drain: int
+    cap: int
+    causes: str
+    until: int | None    # tick in which the regular pipeline takes over again
+
+
+def hp_after(hp: int, drain: int, cap: int, ticks: int) -> int:
+    """HP after `ticks` ticks of constant drain — equal to repeated _clamp_hp().
+
+    A zero drain leaves hp untouched, even above cap (the engine skips the clamp).
+    """
+    if ticks <= 0 or drain == 0:
+        return hp
+    h1 = _clamp_hp(hp, drain, cap)
+    return max(0, min(cap, h1 - (ticks - 1) * drain))
+
+
+def ticks_until(hp: int, drain: int, cap: int, limit: int) -> int | None:
+    """First k >= 1 with hp_after(hp, drain, cap, k) <= limit, or None if never."""
+    if limit < 0:
+        return None
+    h1 = hp_after(hp, drain, cap, 1)
+    if h1 <= limit:
+        return 1
+    if drain <= 0:
+        return None
+    return 1 + -(-(h1 - limit) // drain)
+
+
+class _FastForward:
+    """Coasting bookkeeping for one advance() call."""
+
+    def __init__(self, world: World):
+        self.world = world
+        self.activity = activity_of(world)
+        rels = list(world.relations.values())
+        self.triggers: dict[str, list[Relation]] = {}
+        for r in rels:
+            if r.type == RelationType.TRIGGER:
+                self.triggers.setdefault(r.ent1, []).append(r)
+        self.all_triggers = [r for r in rels if r.type == RelationType.TRIGGER]
+        # Work that happens every tick regardless of HP: PRODUCE draws, brains,
+        # ambient TRIGGER draws. While any exists the loop cannot jump.
+        self.busy = (
+            any(r.type == RelationType.PRODUCE for r in rels)
+            or any(e.type == EntityType.CHAR and e.control is not None
+                   for e in world.entities.values())
+            or any(r.number == 0 and r.lambda_ > 0 for r in self.all_triggers)
+        )
+        self.entities: dict[str, _Coast] = {}
+        self.handbacks: list[tuple[int, str]] = []   # (tick, entity id)
+        self.stuck: set[str] = set()     # never coastable (see _analysis)
+        # Per-id (drain, causes) or None when not coastable; behaviors of passive
+        # entities cannot change while the engine runs.
+        self._analysis: dict[str, tuple[int, str] | None] = {}
+
+    # ── Analysis ────────────────────────────────────────────────────────────
+
+    def _passive(self, entity: Entity) -> bool:
+        """True if nothing but BEHAVIOR drains (and TRIGGERs) touches entity's HP."""
+        return not (entity.type == EntityType.CHAR and entity.control is not None)
+
+    def _entity_drain(self, entity: Entity) -> tuple[int, str] | None:
+        if entity.id not in self._analysis:
+            result = None
+            if (entity.type != EntityType.SUMS and entity.hp is not None
+                    and self._passive(entity)
+                    and not neighbourhood_of(self.world).pinned(self.world, entity.id)
+                    and not hooks_of(self.world).pinned(self.world, entity.id)
+                    and not _in_graveyard(self.world, entity.id)):
+                behaviors = _collect_behaviors(self.world, entity.id)
+                result = (sum(rate for _, rate in behaviors),
+                          "+".join(name for name, _ in behaviors))
+            self._analysis[entity.id] = result
+            if result is None:
+                self.stuck.add(entity.id)
+        return self._analysis[entity.id]
+
+    def _entity_horizon(self, entity: Entity, drain: int, cap: int) -> int | None:
+        """Ticks until a TRIGGER of this speaker needs the real HP (None = never)."""
+        fired = self.world.meta.vars.get("triggers_fired", [])
+        horizon = None
+        for r in self.triggers.get(entity.id, ()):
+            if r.number == -1 and entity.hp_max is not None:
+                limit = 0
+            elif r.number > 0 and r.id not in fired:
+                limit = r.number
+            else:
+                continue
+            # The trigger phase reads the frozen anchor hp while coasting, so it
+            # must not satisfy the condition either.
+            k = 1 if entity.hp <= limit else ticks_until(entity.hp, drain, cap, limit)
+            if k is not None and (horizon is None or k < horizon):
+                horizon = k
+        return horizon
+
+    # ── Coasting ────────────────────────────────────────────────────────────
+
+    def coast_entity(self, entity: Entity) -> None:
+        analysis = self._entity_drain(entity)
+        if analysis is None:
+            return
+        drain, causes = analysis
+        cap = entity.hp_max if entity.hp_max is not None else entity.hp
+        if hp_after(entity.hp, drain, cap, 1) == entity.hp:
+            return   # fixed point — the regular pipeline puts it to sleep
+        horizon = self._entity_horizon(entity, drain, cap)
+        if horizon == 1:
+            return   # a TRIGGER is armed — stays in the pipeline for now
+        now = self.world.meta.tick
+        until = now + horizon if horizon is not None else None
+        self.entities[entity.id] = _Coast(now, drain, cap, causes, until)
+        self.activity.sleep_entity(entity.id)
+        if until is not None:
+            heapq.heappush(self.handbacks, (until, entity.id))
+
+    def coast(self) -> list[str]:
+        """Try to (re)start coasting for every awake entity."""
+        now = self.world.meta.tick
+        log: list[str] = []
+        for entity_id in sorted(self.activity.active_entities - self.stuck):
+            if entity_id in self.entities:
+                self._land_entity(entity_id, now, log)   # woken by a world change
+            entity = self.world.get(entity_id)
+            if entity is not None:
+                self.coast_entity(entity)
+        return log
+
+    # ── Hand-back ───────────────────────────────────────────────────────────
+
+    def _land_entity(self, entity_id: str, at: int, log: list[str]) -> None:
+        c = self.entities.pop(entity_id)
+        entity = self.world.get(entity_id)
+        if entity is None:
+            return
+        old_hp = entity.hp
+        new_hp = hp_after(old_hp, c.drain, c.cap, at - c.since)
+        self.world.set_hp(entity, new_hp)
+        self.activity.wake_entity(entity_id)
+        if new_hp != old_hp:
+            suffix = " [DEAD]" if new_hp == 0 else ""
+            log.append(f"{entity.name}: HP {old_hp} -> {new_hp}  [{c.causes}] "
+                       f"({at - c.since} ticks){suffix}")
+
+    def hand_back(self, tick_no: int) -> list[str]:
+        """Materialize everything due in tick_no (or woken by a world change)
+        to its HP at the end of tick_no - 1, and wake it for the pipeline."""
+        log: list[str] = []
+        landed: set[str] = set()
+        while self.handbacks and self.handbacks[0][0] <= tick_no:
+            _, entity_id = heapq.heappop(self.handbacks)
+            c = self.entities.get(entity_id)
+            if c is not None and c.until is not None and c.until <= tick_no:
+                landed.add(entity_id)
+        landed |= self.activity.active_entities & self.entities.keys()
+        for entity_id in sorted(landed):
+            self._land_entity(entity_id, tick_no - 1, log)
+        return log
+
+    def land_all(self) -> list[str]:
+        log: list[str] = []
+        now = self.world.meta.tick
+        for entity_id in list(self.entities):
+            self._land_entity(entity_id, now, log)
+        return log
+
+    # ── Jumping ─────────────────────────────────────────────────────────────
+
+    def quiet(self) -> bool:
+        """True if the next tick would be a no-op outside the coasting set."""
+        if self.busy:
+            return False
+        if self.activity.active_entities or self.activity.active_stacks:
+            return False
+        fired = self.world.meta.vars.get("triggers_fired", [])
+        for r in self.all_triggers:
+            if r.ent1 in self.entities:
+                continue   # coasting speakers are handed back before they arm
+            speaker = self.world.get(r.ent1)
+            if speaker is None or speaker.hp is None:
+                continue
+            if r.number == -1 and speaker.hp == 0 and speaker.hp_max is not None:
+                return False
+            if r.number > 0 and r.id not in fired and speaker.hp <= r.number:
+                return False
+        return True
+
+    def next_handback(self) -> int | None:
+        """Next tick that must run: an entity hand-back or a stack wipe."""
+        ticks = [self.handbacks[0][0]] if self.handbacks else []
+        wipe = stacks_of(self.world).next_wipe(self.world)
+        if wipe is not None:
+            ticks.append(wipe)
+        return min(ticks) if ticks else None
+
+
+def advance(world: World, n: int) -> list[str]:
+    """Advance the world by n ticks; same final state and RNG use as n × tick().
+
+    Returns a condensed log: regular per-tick lines for everything that still
+    runs tick by tick, one summary line per coasting stretch.
+    """
+    log: list[str] = []
+    end = world.meta.tick + n
+    ff = _FastForward(world)
+    log += ff.coast()
+
+    while world.meta.tick < end:
+        if ff.quiet():
+            target = min(ff.next_handback() or end, end)
+            if target - 1 > world.meta.tick:
+                # Ticks in between are provably empty; only bookkeeping remains.
+                world.meta.vars.setdefault("triggers_fired", [])
+                world.meta.tick = stacks_of(world).tick = target - 1
+                continue
+        log += ff.hand_back(world.meta.tick + 1)
+        log += tick(world)
+        log += ff.coast()
+
+    log += ff.land_all()
+    return log
@@ -0,0 +1,367 @@
+"""
+Bitboard layer for grid worlds (chess.json and the like).
+
+A world is a grid world when its board squares are ENVIs named by column
+letters and row digits (A1 … H8, any W × H, spreadsheet-style columns past
+Z) and every EDGE between two squares joins neighbouring cells — a king-move
+or a rook-move lattice, or one with gaps. Everything here is derived from
+those EDGEs: a square's "step east" exists only if its EDGE does, so a
+removed or one_way EDGE is respected exactly as world.move() and the engine
+respect it. An EDGE with a deny makes the board actor-dependent; such worlds
+are not treated as grids.
+
+Square i = row * width + col is bit i of a Python int, so boards of any
+size are bitboards:
+
+  occupied        squares with an occupant (CHAR, UNIQUE, SUMS stack)
+  full            squares at capacity — world.move() onto them fails
+  board(cat)      squares holding an entity TYPE_OF cat (a side, a piece type)
+  attacks(piece)  squares the piece reaches: sliders stop at the first
+                  occupied square (and see it), knights leap over blockers
+  visible(side)   fog of war: the side's own squares and everything its
+                  pieces reach — each piece type sees as far as it moves
+
+A piece is a CHAR on a square with a SKILL listed in PATTERNS; a SKILL
+number caps a slider's range. Pawns look and step towards the far side:
+the first of SIDES moves up the rows, the second down.
+
+Updates arrive through the World change feed. A move re-reads the squares
+it touched and recomputes only the moved piece and the sliders whose attack
+boards cover those squares; visible() is the union of a side's boards,
+cached until a move. EDGE, SKILL, TYPE_OF or ENVI changes rebuild the grid
+on the next grid_of().
+"""
+
+import re
+from dataclasses import dataclass, replace
+from weakref import WeakKeyDictionary
+
+from backend.core.entity import EntityType
+from backend.core.relation import Relation, RelationType
+from backend.core.world import Change, World
+
+SIDES = ("WhitePieces", "BlackPieces")
+
+ORTHOGONAL = ((1, 0), (-1, 0), (0, 1), (0, -1))
+DIAGONAL = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+_OCCUPANTS = {EntityType.CHAR, EntityType.UNIQUE, EntityType.SUMS}
+_SQUARE = re.compile(r"([A-Za-z]+)([0-9]+)")
+
+
+@dataclass(frozen=True)
+class Pattern:
+    """How a piece moves — and so how far it sees."""
+    letter: str                                   # render()
+    kind: str = "slide"                           # slide | knight | pawn
+    directions: tuple[tuple[int, int], ...] = ()
+    reach: int | None = None                      # slide steps; None = SKILL number or the board
+
+
+# SKILL ent2 → Pattern
+PATTERNS: dict[str, Pattern] = {
+    "MOVE_KING":   Pattern("K", directions=ORTHOGONAL + DIAGONAL, reach=1),
+    "MOVE_QUEEN":  Pattern("Q", directions=ORTHOGONAL + DIAGONAL),
+    "MOVE_ROOK":   Pattern("R", directions=ORTHOGONAL),
+    "MOVE_ARCHER": Pattern("A", directions=DIAGONAL),
+    "MOVE_KNIGHT": Pattern("N", kind="knight"),
+    "MOVE_PAWN":   Pattern("P", kind="pawn"),
+}
+
+
+def _column(letters: str) -> int:
+    col = 0
+    for ch in letters.upper():
+        col = col * 26 + ord(ch) - ord("A") + 1
+    return col - 1
+
+
+class Grid:
+    """Occupancy, attack and visibility bitboards of one grid world."""
+
+    def __init__(self, world: World, sides: tuple[str, str] = SIDES):
+        self.sides = sides
+        self.build(world)
+        world.subscribe(self._on_change)
+
+    # ── Building ────────────────────────────────────────────────────────────
+
+    def build(self, world: World) -> None:
+        """Detect the board and index it from scratch."""
+        self.stale = False
+        self.width = self.height = 0
+        self.squares: list[str] = []            # bit → square id
+        self.index: dict[str, int] = {}         # square id → bit
+        self.occupied = self.full = 0
+        self._boards: dict[str, int] = {}       # category → squares
+        self._stacks: dict[int, int] = {}       # LOCATION relation id → bit
+        self._count: list[int] = []             # occupants per square
+        self._capacity: list[int | None] = []
+        self._pieces: dict[str, int] = {}       # piece id → bit
+        self._attacks: dict[str, int] = {}
+        self._visible: dict[str, int] = {}
+        self._categories: dict[str, set[str]] = {}
+        self._patterns: dict[str, Pattern] = {}
+        self._types = {e.id: e.type for e in world.entities.values()}
+        if not self._detect(world):
+            return
+
+        for r in world.related(RelationType.TYPE_OF):
+            self._categories.setdefault(r.ent1, set()).add(r.ent2)
+        for r in world.related(RelationType.SKILL):
+            pattern = PATTERNS.get(r.ent2)
+            if pattern is not None and self._types.get(r.ent1) == EntityType.CHAR:
+                if pattern.kind == "slide" and pattern.reach is None:
+                    pattern = replace(pattern, reach=r.number or max(self.width, self.height))
+                self._patterns[r.ent1] = pattern
+
+        self._count = [0] * len(self.squares)
+        self._capacity = [world.entities[s].capacity for s in self.squares]
+        for square in self.squares:
+            for r in world.related(RelationType.LOCATION, ent1=square):
+                self._place(r)
+        for piece_id in self._pieces:
+            self._attacks[piece_id] = self._reach(piece_id)
+
+    def _detect(self, world: World) -> bool:
+        cells: dict[str, tuple[int, int]] = {}
+        for entity in world.entities.values():
+            if entity.type == EntityType.ENVI:
+                match = _SQUARE.fullmatch(entity.id)
+                if match:
+                    cells[entity.id] = (_column(match[1]), int(match[2]) - 1)
+        if len(cells) < 4 or min(row for _, row in cells.values()) < 0:
+            return False
+        width = max(col for col, _ in cells.values()) + 1
+        height = max(row for _, row in cells.values()) + 1
+        if width * height != len(cells):
+            return False   # not a full rectangle
+
+        # step[d]: squares with a usable EDGE to their neighbour in direction d
+        steps = {d: 0 for d in ORTHOGONAL + DIAGONAL}
+        for r in world.related(RelationType.EDGE):
+            a, b = cells.get(r.ent1), cells.get(r.ent2)
+            if a is None or b is None:
+                continue
+            d = (b[0] - a[0], b[1] - a[1])
+            if d not in steps or r.deny is not None:
+                return False   # a jump across the board, or an actor-dependent EDGE
+            steps[d] |= 1 << (a[1] * width + a[0])
+            if not r.one_way:
+                steps[-d[0], -d[1]] |= 1 << (b[1] * width + b[0])
+
+        self.width, self.height = width, height
+        self.squares = [""] * len(cells)
+        for square_id, (col, row) in cells.items():
+            self.squares[row * width + col] = square_id
+        self.index = {square_id: i for i, square_id in enumerate(self.squares)}
+        self._steps = steps
+        return True
+
+    # ── Occupancy ───────────────────────────────────────────────────────────
+
+    def _place(self, r: Relation) -> int | None:
+        """Count the LOCATION r if it puts an occupant on a square; returns the bit."""
+        bit = self.index.get(r.ent1)
+        if bit is None or self._types.get(r.ent2) not in _OCCUPANTS:
+            return None
+        mask = 1 << bit
+        self._stacks[r.id] = bit
+        self._count[bit] += 1
+        self.occupied |= mask
+        capacity = self._capacity[bit]
+        if capacity is not None and self._count[bit] >= capacity:
+            self.full |= mask
+        for category in self._categories.get(r.ent2, ()):
+            self._boards[category] = self._boards.get(category, 0) | mask
+        if r.ent2 in self._patterns:
+            self._pieces[r.ent2] = bit
+        return bit
+
+    def _lift(self, r: Relation) -> int | None:
+        bit = self._stacks.pop(r.id, None)
+        if bit is None:
+            return None
+        mask = 1 << bit
+        self._count[bit] -= 1
+        if not self._count[bit]:
+            self.occupied &= ~mask
+        self.full &= ~mask
+        for category in self._categories.get(r.ent2, ()):
+            self._boards[category] &= ~mask
+        if self._pieces.pop(r.ent2, None) is not None:
+            del self._attacks[r.ent2]
+        return bit
+
+    # ── Bitboard steps ──────────────────────────────────────────────────────
+
+    def _shift(self, board: int, d: tuple[int, int]) -> int:
+        """Every square of board moved one EDGE step in direction d (no EDGE → dropped)."""
+        board &= self._steps[d]
+        offset = d[1] * self.width + d[0]
+        return board << offset if offset > 0 else board >> -offset
+
+    def _forward(self, piece_id: str) -> int:
+        return 1 if self._side(piece_id) == self.sides[0] else -1
+
+    def _reach(self, piece_id: str) -> int:
+        pattern = self._patterns[piece_id]
+        start = 1 << self._pieces[piece_id]
+        shift = self._shift
+        if pattern.kind == "knight":
+            # a straight step and a diagonal one leading on, in either order, over any blocker
+            found = 0
+            for o in ORTHOGONAL:
+                for g in DIAGONAL:
+                    if o[0] * g[0] + o[1] * g[1] > 0:
+                        found |= shift(shift(start, o), g) | shift(shift(start, g), o)
+            return found
+        if pattern.kind == "pawn":
+            dy = self._forward(piece_id)
+            return shift(start, (0, dy)) | shift(start, (1, dy)) | shift(start, (-1, dy))
+        found = 0
+        for d in pattern.directions:
+            ray = start
+            for _ in range(pattern.reach):
+                ray = shift(ray, d)
+                if not ray:
+                    break
+                found |= ray
+                if ray & self.occupied:
+                    break
+        return found
+
+    def _side(self, entity_id: str) -> str | None:
+        categories = self._categories.get(entity_id, ())
+        return next((side for side in self.sides if side in categories), None)
+
+    # ── Change feed ─────────────────────────────────────────────────────────
+
+    def _on_change(self, change: Change, subject, old) -> None:
+        if self.stale:
+            return
+        if not self.squares:
+            # not a grid (yet): only new squares or EDGEs can make it one
+            if (change in (Change.ENTITY_ADDED, Change.ENTITY_REMOVED) and subject.type == EntityType.ENVI
+                    or change in (Change.RELATION_ADDED, Change.RELATION_REMOVED)
+                    and subject.type == RelationType.EDGE):
+                self.stale = True
+            return
+        match change:
+            case Change.RELATION_MOVED:
+                self._moved(subject, self._lift(subject), self._place(subject))
+            case Change.RELATION_ADDED if subject.type == RelationType.LOCATION:
+                self._moved(subject, None, self._place(subject))
+            case Change.RELATION_REMOVED if subject.type == RelationType.LOCATION:
+                self._moved(subject, self._lift(subject), None)
+            case Change.RELATION_ADDED | Change.RELATION_REMOVED:
+                if subject.type in (RelationType.EDGE, RelationType.TYPE_OF, RelationType.SKILL):
+                    self.stale = True
+            case Change.ENTITY_ADDED:
+                self._types[subject.id] = subject.type
+                if subject.type == EntityType.ENVI:
+                    self.stale = True
+            case Change.ENTITY_REMOVED:
+                if subject.type == EntityType.ENVI:
+                    self.stale = True
+
+    def _moved(self, r: Relation, left: int | None, entered: int | None) -> None:
+        touched = (1 << left if left is not None else 0) | (1 << entered if entered is not None else 0)
+        if not touched:
+            return
+        self._visible.clear()
+        for piece_id, attacks in self._attacks.items():
+            if attacks & touched and self._patterns[piece_id].kind == "slide":
+                self._attacks[piece_id] = self._reach(piece_id)
+        if r.ent2 in self._pieces:
+            self._attacks[r.ent2] = self._reach(r.ent2)
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+
+    def board(self, category: str) -> int:
+        """Squares holding an entity TYPE_OF category."""
+        return self._boards.get(category, 0)
+
+    def pieces(self, side: str | None = None) -> list[str]:
+        """Ids of the pieces on the board (of one side)."""
+        return [p for p in self._pieces if side is None or self._side(p) == side]
+
+    def square_of(self, piece_id: str) -> str | None:
+        bit = self._pieces.get(piece_id)
+        return self.squares[bit] if bit is not None else None
+
+    def attacks(self, piece_id: str) -> int:
+        """Squares the piece reaches from where it stands (0 if it is not on the board)."""
+        return self._attacks.get(piece_id, 0)
+
+    def moves(self, piece_id: str) -> list[str]:
+        """Squares world.move() would accept for the piece along its pattern.
+
+        A pawn only steps forward; its diagonals count for sight.
+        """
+        if piece_id not in self._pieces:
+            return []
+        targets = self._attacks[piece_id]
+        if self._patterns[piece_id].kind == "pawn":
+            targets = self._shift(1 << self._pieces[piece_id], (0, self._forward(piece_id)))
+        return self.square_ids(targets & ~self.full)
+
+    def visible(self, side: str) -> int:
+        """Fog of war: the side's own squares and all its pieces reach."""
+        seen = self._visible.get(side)
+        if seen is None:
+            seen = self.board(side)
+            for piece_id, attacks in self._attacks.items():
+                if self._side(piece_id) == side:
+                    seen |= attacks
+            self._visible[side] = seen
+        return seen
+
+    def sees(self, side: str, square_id: str) -> bool:
+        bit = self.index.get(square_id)
+        return bit is not None and bool(self.visible(side) >> bit & 1)
+
+    def square_ids(self, board: int) -> list[str]:
+        """Square ids of the bits set in board, lowest first."""
+        found = []
+        while board:
+            low = board & -board
+            found.append(self.squares[low.bit_length() - 1])
+            board ^= low
+        return found
+
+    def render(self, side: str | None = None) -> str:
+        """The board as text, top row first.
+
+        Pieces of `side` (default: the first of SIDES) upper case, the others
+        lower case, '*' another occupant, '.' empty, '?' out of side's sight.
+        """
+        seen = self.visible(side) if side is not None else -1
+        own = side or self.sides[0]
+        letters = {
+            bit: (str.upper if self._side(p) == own else str.lower)(self._patterns[p].letter)
+            for p, bit in self._pieces.items()
+        }
+        rows = []
+        for row in reversed(range(self.height)):
+            cells = []
+            for bit in range(row * self.width, (row + 1) * self.width):
+                if not seen >> bit & 1:
+                    cells.append("?")
+                else:
+                    cells.append(letters.get(bit, "*" if self.occupied >> bit & 1 else "."))
+            rows.append(f"{row + 1:>2} " + " ".join(cells))
+        return "\n".join(rows)
+
+
+_grids: "WeakKeyDictionary[World, Grid]" = WeakKeyDictionary()
+
+
+def grid_of(world: World) -> Grid | None:
+    """Return the world's Grid, or None if it is not a grid world."""
+    grid = _grids.get(world)
+    if grid is None:
+        grid = _grids[world] = Grid(world)
+    elif grid.stale:
+        grid.build(world)
+    return grid if grid.squares else None
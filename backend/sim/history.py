@@ -0,0 +1,271 @@
+"""
+Time-travel store: the world as it was at any recorded tick.
+
+History records a running world as keyframes plus per-tick deltas:
+
+  keyframe  every `every` ticks — a snapshot() (backend/core/diff.py), zlib
+            compressed JSON, with the random state at that moment
+  delta     every record() — the WorldDiff since the previous one, plus
+            meta.vars when the engine changed it (diffs do not carry vars)
+
+    history = History(world, every=100, segments=20, keyframes=64)
+    tick(world); history.record()      # after every tick (or advance() / run_events())
+    past = history.world_at(4312)      # a new World at tick 4312
+
+world_at(t) builds a replica from the last keyframe at or before t and
+applies at most `every` deltas. Ticks inside a delta that spans several
+(record() called after advance(world, n)), or whose deltas were already
+dropped, are re-simulated from the keyframe with its random state, in a
+private random.Random (backend/sim/rng.py use_random). That is exact for a
+world changed only by tick() and its relatives: edits made between ticks are
+in the deltas but not in a re-simulation. A world whose rules come partly
+from outside — package hooks (backend/sim/hooks.py) or remote brains
+(backend/sim/remote.py) — cannot be replayed, so world_at() raises
+ValueError for its ticks that need a re-simulation.
+
+A re-simulation runs up to the distance to the keyframe before it: one
+`every` inside the retained segments, twice that and more where keyframes
+were thinned. world_at(t, limit=n) refuses (ValueError) one longer than n
+ticks; the server passes `every`, so a request never holds its loop longer
+than one keyframe interval of ticks.
+
+The world returned has its stack decays settled into plain hp, so it can be
+ticked on — a replica's decays read meta.tick rather than the engine's
+StackClock and sit in no wipe queue.
+
+Retention: the newest `segments` keyframe intervals keep their deltas.
+Older keyframes stay without deltas, reachable by re-simulation; when there
+are more than `keyframes` of those, every other one is dropped (the oldest
+stays), so old history thins out instead of ending. Memory is bounded by
+(segments × every) deltas plus segments + keyframes compressed snapshots.
+
+Run:  python -m backend.sim.history worlds/nord.json --ticks 5000 --every 100 \\
+          --segments 10 --keyframes 16 --at 4312
+      records a run, then rebuilds `--at` (and random ticks) and checks them
+"""
+
+import copy
+import json
+import random
+import sys
+import time
+import zlib
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from backend.core.diff import DiffRecorder, WorldDiff, replica, snapshot
+from backend.core.world import World
+from backend.sim.engine import has_brain, tick
+from backend.sim.hooks import hooks_of
+from backend.sim.rng import draws_of, use_random
+
+KEYFRAME_LEVEL = 1   # zlib level of keyframe snapshots
+
+
+@dataclass
+class _Segment:
+    """A keyframe and the deltas recorded after it (None once dropped)."""
+    tick: int
+    keyframe: bytes                     # zlib-compressed snapshot() JSON
+    rng: tuple                          # the world's random state right after the keyframe's tick
+    deltas: list[tuple[WorldDiff, dict | None]] | None = field(default_factory=list)
+
+
+class History:
+    """Keyframes and deltas of one world; see the module docstring."""
+
+    def __init__(self, world: World, every: int = 100, segments: int = 20, keyframes: int = 64):
+        if every < 1 or segments < 1 or keyframes < 1:
+            raise ValueError("History needs every, segments and keyframes >= 1")
+        self.world = world
+        self.every = every
+        self.segments = segments
+        self.keyframes = keyframes
+        self._segments: list[_Segment] = []
+        self._ticks: list[int] = []          # keyframe tick of each segment, for bisect
+        self._vars = copy.deepcopy(world.meta.vars)
+        self.keyframe_bytes = 0
+        self.delta_count = 0
+        self._keyframe()
+        self._recorder = DiffRecorder(world)
+
+    def close(self) -> None:
+        """Stop recording (the stored history stays readable)."""
+        self._recorder.close()
+
+    # ── Recording ───────────────────────────────────────────────────────────
+
+    def _keyframe(self) -> None:
+        data = json.dumps(snapshot(self.world), ensure_ascii=False, separators=(",", ":"))
+        segment = _Segment(self.world.meta.tick, zlib.compress(data.encode("utf-8"), KEYFRAME_LEVEL),
+                           draws_of(self.world).getstate())
+        self._segments.append(segment)
+        self._ticks.append(segment.tick)
+        self.keyframe_bytes += len(segment.keyframe)
+        self._retain()
+
+    def record(self) -> None:
+        """Store the changes since the last record(); call it after every tick."""
+        diff = self._recorder.take()
+        if diff.tick == diff.since:
+            return   # no tick ran; changes in between go with the next one
+        changed = None
+        if self.world.meta.vars != self._vars:
+            changed = self._vars = copy.deepcopy(self.world.meta.vars)
+        self._segments[-1].deltas.append((diff, changed))
+        self.delta_count += 1
+        if diff.tick - self._segments[-1].tick >= self.every:
+            self._keyframe()
+
+    def _retain(self) -> None:
+        # Drop deltas beyond the newest `segments`, then thin the sparse keyframes
+        full = self._segments[-self.segments:]
+        for segment in self._segments[:-self.segments]:
+            if segment.deltas is not None:
+                self.delta_count -= len(segment.deltas)
+                segment.deltas = None
+        sparse = self._segments[:-self.segments]
+        if len(sparse) > self.keyframes:
+            kept = sparse[::2]
+            for segment in sparse[1::2]:
+                self.keyframe_bytes -= len(segment.keyframe)
+            self._segments = kept + full
+            self._ticks = [s.tick for s in self._segments]
+
+    # ── Reading ─────────────────────────────────────────────────────────────
+
+    @property
+    def first(self) -> int:
+        """Oldest tick world_at() can rebuild."""
+        return self._ticks[0]
+
+    def world_at(self, tick_no: int, resimulate: bool = True, limit: int | None = None) -> World:
+        """A new World at tick_no.
+
+        Raises ValueError outside first…now, or if tick_no needs a
+        re-simulation and resimulate is False, the world cannot be replayed
+        (hooks, remote brains) or it would run more than limit ticks.
+        """
+        now = self.world.meta.tick
+        if not self.first <= tick_no <= now:
+            raise ValueError(f"Tick {tick_no} is outside the recorded history ({self.first}…{now})")
+        segment = self._segments[bisect_right(self._ticks, tick_no) - 1]
+        data = json.loads(zlib.decompress(segment.keyframe))
+        ends = [diff.tick for diff, _ in segment.deltas] if segment.deltas is not None else []
+        if tick_no in ends:
+            world = replica(data)
+            vars = None
+            for diff, changed in segment.deltas[:ends.index(tick_no) + 1]:
+                diff.apply(world)
+                vars = changed if changed is not None else vars
+            if vars is not None:
+                world.meta.vars = copy.deepcopy(vars)
+            for r in world.relations.values():
+                if r.decay is not None:
+                    r.settle()
+            return world
+        world = World.from_dict(data)   # snapshot hp values, decays already settled
+        if tick_no == segment.tick:
+            return world
+        if not resimulate:
+            raise ValueError(f"Tick {tick_no} is not stored; it needs a re-simulation")
+        external = self._external()
+        if external:
+            raise ValueError(f"Tick {tick_no} is not stored, and the world cannot be re-simulated ({external})")
+        if limit is not None and tick_no - segment.tick > limit:
+            raise ValueError(f"Tick {tick_no} is not stored; its re-simulation would run "
+                             f"{tick_no - segment.tick} ticks (limit {limit})")
+        return self._resimulate(world, segment.rng, tick_no)
+
+    def _external(self) -> str | None:
+        """What makes the live world's ticks depend on more than its state, or None."""
+        hooks = hooks_of(self.world)
+        if hooks.engine or hooks.intents:
+            return "package hooks"
+        if any(has_brain(e) and e.control.startswith(("remote:", "hook:"))
+               for e in self.world.entities.values()):
+            return "remote brains"
+        return None
+
+    @staticmethod
+    def _resimulate(world: World, rng: tuple, tick_no: int) -> World:
+        # A private Random: the live simulation's stream is never touched, even
+        # from another thread (GET /world?tick=N while the server ticks)
+        rand = random.Random()
+        rand.setstate(rng)
+        use_random(world, rand)
+        try:
+            while world.meta.tick < tick_no:
+                tick(world)
+        finally:
+            use_random(world, None)
+        return world
+
+    def stats(self) -> dict:
+        return {
+            "first": self.first,
+            "now": self.world.meta.tick,
+            "keyframes": len(self._segments),
+            "with_deltas": sum(s.deltas is not None for s in self._segments),
+            "deltas": self.delta_count,
+            "keyframe_bytes": self.keyframe_bytes,
+        }
+
+
+def run(path: Path, ticks: int, every: int, segments: int, keyframes: int,
+        at: int | None, samples: int, seed: int) -> dict:
+    """Record `ticks` ticks, then rebuild sampled ticks and compare them with the live run."""
+    random.seed(seed)
+    world = World.load(path)
+    history = History(world, every, segments, keyframes)
+    states: dict[int, str] = {}
+    probe = set(random.Random(seed).sample(range(ticks + 1), min(samples, ticks + 1)))
+    if at is not None:
+        probe.add(at)
+    started = time.perf_counter()
+    for _ in range(ticks):
+        if world.meta.tick in probe:
+            states[world.meta.tick] = json.dumps(world.to_dict(), sort_keys=True)
+        tick(world)
+        history.record()
+    if world.meta.tick in probe:
+        states[world.meta.tick] = json.dumps(world.to_dict(), sort_keys=True)
+    recording = time.perf_counter() - started
+    rebuilt, mismatched, times = 0, [], []
+    for tick_no in sorted(states):
+        if tick_no < history.first:
+            continue
+        t0 = time.perf_counter()
+        past = history.world_at(tick_no)
+        times.append(time.perf_counter() - t0)
+        rebuilt += 1
+        if json.dumps(past.to_dict(), sort_keys=True) != states[tick_no]:
+            mismatched.append(tick_no)
+    times.sort()
+    return {"seconds": round(recording, 2), **history.stats(), "rebuilt": rebuilt,
+            "mismatched": mismatched,
+            "rebuild_ms_p50": round(times[len(times) // 2] * 1000, 2) if times else None,
+            "rebuild_ms_max": round(times[-1] * 1000, 2) if times else None}
+
+
+def parse_args() -> dict:
+    opts = {"path": Path("worlds/nord.json"), "ticks": 2000, "every": 100, "segments": 10,
+            "keyframes": 16, "at": None, "samples": 50, "seed": 1}
+    casts = {"--ticks": int, "--every": int, "--segments": int, "--keyframes": int,
+             "--at": int, "--samples": int, "--seed": int}
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in casts and i + 1 < len(args):
+            opts[args[i][2:]] = casts[args[i]](args[i + 1])
+            i += 2
+        else:
+            opts["path"] = Path(args[i])
+            i += 1
+    return opts
+
+
+if __name__ == "__main__":
+    for key, value in run(**parse_args()).items():
+        print(f"{key:>15}: {value}")
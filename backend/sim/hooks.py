@@ -0,0 +1,566 @@
+"""
+World package hooks, run in a pool of worker processes.
+
+A world package is a directory with a manifest, the world JSON and the
+package's Python hooks (IDEAS.md, World Package System):
+
+    worlds/valley/
+      world.yaml
+      world.json
+      hooks/engine.py
+      hooks/intents.py
+
+    # world.yaml
+    name: Valley
+    version: "0.1"
+    author: mrklas
+    world: world.json
+    workers: 2              # worker processes (default WORKERS)
+    budget: 0.05            # seconds per hook and tick (default BUDGET)
+    memory_mb: 256          # address-space limit of a worker (optional, POSIX)
+    hooks:
+      - name: weather
+        module: hooks/engine.py
+        function: weather
+        kind: engine        # engine | intents
+        reads: ["*"]        # engine hooks: entity ids, TYPE_OF categories or "*"
+        budget: 0.02        # overrides the package budget
+
+Two kinds of hook:
+
+  engine   called at the start of every hp phase with its slice of the world
+             {"world", "tick", "entities": [{"id", "name", "type", "hp",
+                                             "hp_max", "location"}]}
+           — the entities with hp that `reads` covers ("*": all but SUMS) —
+           and returns
+             {"behaviors": {entity_id: [[name, rate], ...]}, "log": [str]}
+           The behaviors are the sixth source of _collect_behaviors() until
+           the hook runs again; only entities of the hook's slice can get
+           them.
+  intents  the brain of CHARs with control = "hook:<name>". It is asked what
+           a remote brain is asked (backend/sim/remote.py),
+             {"world", "tick", "actors": [...]} → {"intents": [...]}
+           and a CHAR without an answer in time gets the survival brain.
+
+Hook code never runs in the simulation process. Each worker imports the
+package's hook modules once, when it starts, and then serves calls over a
+pipe. A hook gets a pickled copy of its slice, so it can read the world but
+not change it; what it returns is validated before the engine uses it. A
+tick's hook calls run at once, spread over the workers, and the tick waits
+for each at most its budget, counted from the start of the tick's calls. A
+hook that overruns is cut off: its worker is killed and replaced, and its
+answer for that tick is dropped (an engine hook's behaviors are cleared).
+Exceptions inside a hook count as failed calls. The workers isolate the
+engine from slow and buggy hooks; they are not a security boundary for
+untrusted code.
+
+Hooks.stats() reports per hook: calls, ok, late (cut off or never started in
+time), failed, and latency p50 / p95 / max in ms.
+
+Run:  python -m backend.sim.hooks worlds/valley --ticks 60
+      runs the package for n ticks and prints the per-hook stats
+"""
+
+import importlib.util
+import multiprocessing
+import signal
+import sys
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from weakref import WeakKeyDictionary, finalize
+
+from backend.core.entity import EntityType
+from backend.core.relation import RelationType
+from backend.core.world import World
+from backend.sim.activity import activity_of
+from backend.sim.remote import _intent_fields
+
+MANIFEST = "world.yaml"
+BUDGET = 0.05        # seconds per hook and tick
+WORKERS = 2
+STARTUP = 10.0       # seconds for the workers to import the hooks
+LATENCIES = 1000     # latencies kept per hook for the percentiles
+KINDS = ("engine", "intents")
+
+
+@dataclass(frozen=True)
+class HookSpec:
+    """One hook of a package manifest."""
+    name: str
+    module: Path
+    function: str
+    kind: str
+    budget: float
+    reads: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class Package:
+    """A parsed world.yaml."""
+    root: Path
+    name: str
+    version: str | None
+    author: str | None
+    world: Path
+    workers: int
+    memory_mb: int | None
+    hooks: tuple[HookSpec, ...]
+
+
+def _positive(value, what: str, kind=(int, float)) -> None:
+    if isinstance(value, bool) or not isinstance(value, kind) or value <= 0:
+        raise ValueError(f"{what} must be a positive number, got {value!r}")
+
+
+def load_manifest(path: str | Path) -> Package:
+    """Parse a package's world.yaml (path: the file or its directory); raises ValueError."""
+    path = Path(path)
+    if path.is_dir():
+        path = path / MANIFEST
+    import yaml   # only world packages need PyYAML
+
+    raw = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    if not isinstance(raw, dict):
+        raise ValueError(f"{path}: expected a mapping")
+    root = path.parent
+    budget = raw.get("budget", BUDGET)
+    _positive(budget, f"{path}: budget")
+    workers = raw.get("workers", WORKERS)
+    _positive(workers, f"{path}: workers", int)
+    memory_mb = raw.get("memory_mb")
+    if memory_mb is not None:
+        _positive(memory_mb, f"{path}: memory_mb", int)
+    hooks, names = [], set()
+    for i, entry in enumerate(raw.get("hooks") or []):
+        if not isinstance(entry, dict):
+            raise ValueError(f"{path}: hook {i} must be a mapping")
+        missing = [key for key in ("name", "module", "function", "kind") if key not in entry]
+        if missing:
+            raise ValueError(f"{path}: hook {i} is missing {missing}")
+        name = str(entry["name"])
+        if name in names:
+            raise ValueError(f"{path}: hook '{name}' is declared twice")
+        names.add(name)
+        if entry["kind"] not in KINDS:
+            raise ValueError(f"{path}: hook '{name}': kind must be one of {KINDS}")
+        module = (root / entry["module"]).resolve()
+        if not module.is_file():
+            raise ValueError(f"{path}: hook '{name}': no module {module}")
+        hook_budget = entry.get("budget", budget)
+        _positive(hook_budget, f"{path}: hook '{name}': budget")
+        reads = entry.get("reads", [])
+        if not isinstance(reads, list):
+            raise ValueError(f"{path}: hook '{name}': reads must be a list")
+        if entry["kind"] == "engine" and not reads:
+            raise ValueError(f"{path}: engine hook '{name}' reads nothing")
+        hooks.append(HookSpec(name, module, str(entry["function"]), entry["kind"],
+                              float(hook_budget), tuple(map(str, reads))))
+    return Package(root, str(raw.get("name", root.name)), raw.get("version"), raw.get("author"),
+                   root / raw.get("world", "world.json"), workers, memory_mb, tuple(hooks))
+
+
+# ── Workers ──────────────────────────────────────────────────────────────────
+
+def _serve(conn: Connection, root: str, hooks: list[tuple[str, str, str]], memory_mb: int | None) -> None:
+    """Worker process: import the hook modules, then answer (name, payload) calls."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)   # Ctrl-C is the parent's business
+    if memory_mb is not None:
+        try:
+            import resource
+            limit = memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass
+    sys.path.insert(0, root)
+    functions, modules, errors = {}, {}, []
+    for name, module_path, function in hooks:
+        try:
+            module = modules.get(module_path)
+            if module is None:
+                spec = importlib.util.spec_from_file_location(f"_hooks_{len(modules)}", module_path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                modules[module_path] = module
+            functions[name] = getattr(module, function)
+            if not callable(functions[name]):
+                raise TypeError(f"{function} is not callable")
+        except Exception as exc:
+            errors.append(f"{name}: {type(exc).__name__}: {exc}")
+    conn.send(("ready", errors))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        name, payload = message
+        try:
+            answer = (True, functions[name](payload))
+        except Exception as exc:
+            answer = (False, f"{type(exc).__name__}: {exc}")
+        try:
+            conn.send(answer)
+        except Exception as exc:   # an answer that does not pickle
+            conn.send((False, f"{type(exc).__name__}: {exc}"))
+
+
+def _context():
+    """Forkserver where there is one (a replacement starts in milliseconds), spawn elsewhere.
+
+    Never a plain fork: the server runs ticks next to other threads.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["backend.core.world", "backend.sim.remote"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe."""
+
+    def __init__(self, package: Package):
+        context = _context()
+        self.conn, child = context.Pipe()
+        hooks = [(h.name, str(h.module), h.function) for h in package.hooks]
+        self.process = context.Process(target=_serve, name="world-hooks", daemon=True,
+                                       args=(child, str(package.root), hooks, package.memory_mb))
+        self.process.start()
+        child.close()
+        self.ready = False
+        self.call: tuple[str, float] | None = None   # (hook name, started) while busy
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 2)
+
+
+class HookPool:
+    """Worker processes serving one package's hooks, with per-hook budgets."""
+
+    def __init__(self, package: Package):
+        self.package = package
+        self.budgets = {h.name: h.budget for h in package.hooks}
+        self.counts: dict[str, Counter] = {h.name: Counter() for h in package.hooks}
+        self.latencies: dict[str, deque] = {h.name: deque(maxlen=LATENCIES) for h in package.hooks}
+        self.errors: dict[str, str] = {}        # hook → its last error
+        self.restarts = 0
+        self._workers = [_Worker(package) for _ in range(package.workers)]
+        deadline = time.perf_counter() + STARTUP
+        while not all(w.ready for w in self._workers):
+            pending = [w.conn for w in self._workers if not w.ready]
+            if not wait(pending, max(0.0, deadline - time.perf_counter())):
+                self.close()
+                raise ValueError(f"{package.root}: hook workers did not start within {STARTUP} s")
+            for worker in self._workers:
+                if not worker.ready and worker.conn.poll():
+                    errors = self._receive_ready(worker)
+                    if errors:
+                        self.close()
+                        raise ValueError(f"{package.root}: cannot load hooks: {'; '.join(errors)}")
+
+    def _receive_ready(self, worker: _Worker) -> list[str]:
+        try:
+            _, errors = worker.conn.recv()
+        except (EOFError, OSError):
+            return ["worker died while importing the hooks"]
+        worker.ready = True
+        return errors
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.kill()
+        self._workers[self._workers.index(worker)] = _Worker(self.package)
+        self.restarts += 1
+
+    def call(self, calls: list[tuple[str, dict]]) -> dict[str, object]:
+        """Run hooks at once; returns hook name → answer for those that made their budget."""
+        answers: dict[str, object] = {}
+        queue = deque(calls)
+        started = time.perf_counter()
+        for name, _ in calls:
+            self.counts[name]["calls"] += 1
+        while True:
+            now = time.perf_counter()
+            while queue and started + self.budgets[queue[0][0]] <= now:
+                self.counts[queue.popleft()[0]]["late"] += 1   # never got a worker in time
+            for worker in self._workers:
+                if not queue:
+                    break
+                if worker.ready and worker.call is None:
+                    name, payload = queue.popleft()
+                    worker.conn.send((name, payload))
+                    worker.call = (name, time.perf_counter())
+            busy = [w for w in self._workers if w.call is not None]
+            if not busy and not queue:
+                return answers
+            deadlines = [started + self.budgets[w.call[0]] for w in busy]
+            deadlines += [started + self.budgets[name] for name, _ in queue]
+            timeout = max(0.0, min(deadlines) - time.perf_counter())
+            listening = busy + [w for w in self._workers if not w.ready]
+            ready = wait([w.conn for w in listening], timeout)
+            for worker in [w for w in listening if w.conn in ready]:
+                if not worker.ready:
+                    if self._receive_ready(worker):
+                        self._replace(worker)
+                    continue
+                name, sent = worker.call
+                worker.call = None
+                try:
+                    ok, answer = worker.conn.recv()
+                except (EOFError, OSError):
+                    ok, answer = False, "worker died"
+                    self._replace(worker)
+                self.latencies[name].append((time.perf_counter() - sent) * 1000)
+                if ok:
+                    self.counts[name]["ok"] += 1
+                    answers[name] = answer
+                else:
+                    self.counts[name]["failed"] += 1
+                    self.errors[name] = answer
+            now = time.perf_counter()
+            for worker in list(self._workers):
+                if worker.call is not None and started + self.budgets[worker.call[0]] <= now:
+                    self.counts[worker.call[0]]["late"] += 1
+                    self._replace(worker)
+
+    def stats(self) -> dict[str, dict]:
+        result = {}
+        for name, counts in self.counts.items():
+            latencies = list(self.latencies[name])
+            result[name] = {
+                **{key: counts[key] for key in ("calls", "ok", "late", "failed")},
+                "p50_ms": _percentile(latencies, 0.50),
+                "p95_ms": _percentile(latencies, 0.95),
+                "max_ms": round(max(latencies), 2) if latencies else None,
+            }
+            if name in self.errors:
+                result[name]["error"] = self.errors[name]
+        return result
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+
+
+# ── Per-world hooks ──────────────────────────────────────────────────────────
+
+class Hooks:
+    """A world's package hooks; without load_hooks() it has none."""
+
+    def __init__(self, package: Package | None = None):
+        self.package = package
+        self.engine = [h for h in package.hooks if h.kind == "engine"] if package else []
+        self.intents = {h.name: h for h in package.hooks if h.kind == "intents"} if package else {}
+        self.pool = HookPool(package) if package and package.hooks else None
+        self.modifiers: dict[str, list[tuple[str, int]]] = {}   # entity id → engine-hook behaviors
+        self._slices: tuple[int, dict[str, frozenset[str]]] | None = None
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    # ── Slices ──────────────────────────────────────────────────────────────
+
+    def _slice(self, world: World, hook: HookSpec) -> frozenset[str]:
+        """Ids of the entities with hp that the hook reads (cached for a tick)."""
+        if self._slices is None or self._slices[0] != world.meta.tick:
+            self._slices = (world.meta.tick, {})
+        found = self._slices[1].get(hook.name)
+        if found is None:
+            ids = set()
+            for scope in hook.reads:
+                if scope == "*":
+                    ids.update(world.entities)
+                else:
+                    ids.update(r.ent1 for r in world.related(RelationType.TYPE_OF, ent2=scope))
+                    ids.add(scope)
+            found = self._slices[1][hook.name] = frozenset(
+                entity_id for entity_id in ids
+                if (e := world.entities.get(entity_id)) is not None
+                and e.hp is not None and e.type != EntityType.SUMS)
+        return found
+
+    def pinned(self, world: World, entity_id: str) -> bool:
+        """True if an engine hook reads the entity (its drain may change any tick)."""
+        return any(entity_id in self._slice(world, hook) for hook in self.engine)
+
+    # ── Calls ───────────────────────────────────────────────────────────────
+
+    def run_engine(self, world: World) -> list[str]:
+        """Call the engine hooks and replace the modifiers with their answers (hp phase start)."""
+        if not self.engine or self.pool is None:
+            return []
+        calls, slices = [], {}
+        for hook in self.engine:
+            ids = slices[hook.name] = self._slice(world, hook)
+            entities = []
+            for entity_id in sorted(ids):
+                entity = world.entities[entity_id]
+                location = world.location_of(entity_id)
+                entities.append({"id": entity_id, "name": entity.name, "type": entity.type.value,
+                                 "hp": entity.hp, "hp_max": entity.hp_max,
+                                 "location": location.id if location is not None else None})
+            calls.append((hook.name, {"world": world.name, "tick": world.meta.tick, "entities": entities}))
+        answers = self.pool.call(calls)
+
+        log: list[str] = []
+        modifiers: dict[str, list[tuple[str, int]]] = {}
+        for hook in self.engine:
+            answer = answers.get(hook.name)
+            if not isinstance(answer, dict):
+                continue
+            try:
+                for entity_id, behaviors in (answer.get("behaviors") or {}).items():
+                    if entity_id not in slices[hook.name]:
+                        continue
+                    for behavior_name, rate in behaviors:
+                        if isinstance(rate, bool) or not isinstance(rate, int):
+                            raise ValueError(f"rate {rate!r} is not an integer")
+                        if rate:
+                            modifiers.setdefault(entity_id, []).append((str(behavior_name), rate))
+                log += [str(line) for line in answer.get("log") or []]
+            except (AttributeError, TypeError, ValueError) as exc:
+                self.pool.counts[hook.name]["malformed"] += 1
+                self.pool.errors[hook.name] = f"malformed answer: {exc}"
+        activity = activity_of(world)
+        for entity_id in self.modifiers.keys() | modifiers.keys():
+            if self.modifiers.get(entity_id) != modifiers.get(entity_id):
+                activity.wake_entity(entity_id)
+        self.modifiers = modifiers
+        return log
+
+    def decide(self, world: World, requests: dict[str, list[dict]]) -> dict[str, list[dict]]:
+        """Ask intents hooks about their actors; returns actor id → intent fields.
+
+        requests: hook name → actor views. Actors missing from the result
+        had no answer in time (or no such hook).
+        """
+        calls = [(name, {"world": world.name, "tick": world.meta.tick, "actors": actors})
+                 for name, actors in requests.items() if name in self.intents]
+        if not calls or self.pool is None:
+            return {}
+        answers: dict[str, list[dict]] = {}
+        for name, answer in self.pool.call(calls).items():
+            asked = {actor["id"] for actor in requests[name]}
+            chosen = {actor_id: [] for actor_id in asked}
+            intents = answer.get("intents", []) if isinstance(answer, dict) else []
+            for d in intents if isinstance(intents, list) else []:
+                if not isinstance(d, dict) or d.get("actor_id") not in chosen:
+                    continue
+                try:
+                    chosen[d["actor_id"]].append(_intent_fields(d))
+                except (KeyError, TypeError, ValueError):
+                    continue   # malformed intent — the rest of the answer still counts
+            answers.update(chosen)
+        return answers
+
+    def stats(self) -> dict[str, dict]:
+        return self.pool.stats() if self.pool is not None else {}
+
+
+_hooks: "WeakKeyDictionary[World, Hooks]" = WeakKeyDictionary()
+
+
+def hooks_of(world: World) -> Hooks:
+    """Return the world's Hooks; without load_hooks() it has none."""
+    hooks = _hooks.get(world)
+    if hooks is None:
+        hooks = _hooks[world] = Hooks()
+    return hooks
+
+
+def load_hooks(world: World, path: str | Path) -> Hooks:
+    """Start the package's hook workers and attach them to the world.
+
+    path: the package directory or its world.yaml. Raises ValueError for a
+    bad manifest or hooks that do not import.
+    """
+    hooks = Hooks(load_manifest(path))
+    old = _hooks.get(world)
+    if old is not None:
+        old.close()
+    _hooks[world] = hooks
+    finalize(world, hooks.close)
+    return hooks
+
+
+def open_package(path: str | Path) -> World:
+    """Load a world package: its world JSON, dialogue templates and hooks."""
+    from backend.sim.dialogue import load_dialogue
+
+    package = load_manifest(path)
+    world = World.load(package.world)
+    load_dialogue(world, package.world)
+    load_hooks(world, package.root)
+    return world
+
+
+def run(path: Path, ticks: int, seed: int) -> dict:
+    """Run a package for `ticks` ticks; returns timing and the per-hook stats."""
+    import random
+    from backend.sim.engine import tick
+
+    random.seed(seed)
+    world = open_package(path)
+    hooks = hooks_of(world)
+    lines, slowest = 0, 0.0
+    started = time.perf_counter()
+    try:
+        for _ in range(ticks):
+            t0 = time.perf_counter()
+            lines += len(tick(world))
+            slowest = max(slowest, time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+        return {"world": world.name, "ticks": ticks, "seconds": round(elapsed, 2),
+                "slowest_tick_ms": round(slowest * 1000, 1), "log_lines": lines,
+                "restarts": hooks.pool.restarts if hooks.pool else 0, **hooks.stats()}
+    finally:
+        hooks.close()
+
+
+def parse_args() -> dict:
+    opts = {"path": Path("worlds/valley"), "ticks": 60, "seed": 1}
+    casts = {"--ticks": int, "--seed": int}
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in casts and i + 1 < len(args):
+            opts[args[i][2:]] = casts[args[i]](args[i + 1])
+            i += 2
+        else:
+            opts["path"] = Path(args[i])
+            i += 1
+    return opts
+
+
+if __name__ == "__main__":
+    # The engine looks hooks up in backend.sim.hooks, not in this __main__ copy
+    from backend.sim.hooks import parse_args, run
+
+    for key, value in run(**parse_args()).items():
+        print(f"{key:>16}: {value}")
@@ -0,0 +1,259 @@
+"""
+Ordered HP index for threshold queries.
+
+Brains and triggers ask threshold questions every tick — which CHARs are
+below 80 % HP, which speakers are at or below a TRIGGER's number, who is at
+0 HP. HpIndex keeps every entity with hp in two sorted lists so those
+questions cost a bisect plus the size of the answer:
+
+  by hp      (hp, order, id)              at_most(hp)
+  by ratio   (hp / hp_max, order, id)     below_ratio(ratio)      (hp_max not 0)
+
+plus the CHAR roster and a crossing log — the hp each entity had before its
+first change since mark() — for "whose hp just crossed x" (crossed()).
+`order` is the entity's position in world.entities, so callers can restore
+iteration order.
+
+For the triggers phase it also keeps the TRIGGER relations grouped by
+speaker and mode, with each one's position in world.related(TRIGGER).
+
+Updates arrive through the World change feed (HP, entity and TRIGGER
+add/remove); HP changes are only noted and applied by the next query. The
+ratio list is built on the first below_ratio() and the crossing log started
+by the first mark(), so a world that never asks pays for neither. Writing
+entity.hp or entity.hp_max directly bypasses it; call
+hp_index_of(world).rebuild(world) afterwards.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from weakref import WeakKeyDictionary
+
+from backend.core.entity import Entity, EntityType
+from backend.core.relation import Relation, RelationType
+from backend.core.world import Change, World
+
+MOVE_FRACTION = 32   # move changed entries one by one while they are under 1/32 of a list
+
+
+class Triggers:
+    """TRIGGER relations of a world by mode, in world.related(TRIGGER) order."""
+
+    def __init__(self, world: World):
+        self.all: list[Relation] = world.related(RelationType.TRIGGER)
+        self.position: dict[int, int] = {r.id: i for i, r in enumerate(self.all)}
+        self.ambient: list[int] = []                      # positions, number == 0
+        self.by_speaker: dict[str, list[int]] = {}        # speaker id → positions
+        self.threshold: dict[str, int] = {}               # speaker id → highest threshold
+        self.resurrecting: set[str] = set()               # speakers with number == -1
+        for i, r in enumerate(self.all):
+            self.by_speaker.setdefault(r.ent1, []).append(i)
+            if r.number == 0:
+                self.ambient.append(i)
+            elif r.number == -1:
+                self.resurrecting.add(r.ent1)
+            elif r.number > 0:
+                self.threshold[r.ent1] = max(r.number, self.threshold.get(r.ent1, 0))
+        self.max_threshold = max(self.threshold.values(), default=None)
+
+
+class HpIndex:
+    """Entities with hp, sorted by hp and by hp ratio."""
+
+    def __init__(self, world: World):
+        self.rebuild(world)
+        world.subscribe(self._on_change)
+
+    def rebuild(self, world: World) -> None:
+        """Index the world from scratch (after direct writes to hp or hp_max)."""
+        self._entities = world.entities
+        self._size = len(world.entities)
+        self._order: dict[str, int] = {}
+        self._chars: dict[str, Entity] = {}
+        for order, entity in enumerate(world.entities.values()):
+            self._order[entity.id] = order
+            if entity.type == EntityType.CHAR:
+                self._chars[entity.id] = entity
+        self._next = len(self._order)
+        self._by_hp: list[tuple[int, int, str]] = sorted(
+            k for e in world.entities.values() if (k := self._hp_key(e)) is not None)
+        # Built on the first below_ratio(); the crossing log starts with mark()
+        self._by_ratio: list[tuple[float, int, str]] | None = None
+        # entity id → hp before its first change the list has not seen yet
+        self._stale_hp: dict[str, int | None] = {}
+        self._stale_ratio: dict[str, int | None] = {}
+        self._crossed: dict[str, int | None] | None = None
+        self._triggers: Triggers | None = None
+
+    def sync(self, world: World) -> None:
+        """Rebuild if entities were added or removed behind World's back."""
+        if len(world.entities) != self._size:
+            self.rebuild(world)
+
+    def _hp_key(self, entity: Entity, hp: int | None = None) -> tuple | None:
+        hp = entity.hp if hp is None else hp
+        return (hp, self._order[entity.id], entity.id) if hp is not None else None
+
+    def _ratio_key(self, entity: Entity, hp: int | None = None) -> tuple | None:
+        hp = entity.hp if hp is None else hp
+        if hp is None or not entity.hp_max:
+            return None
+        return (hp / entity.hp_max, self._order[entity.id], entity.id)
+
+    # ── Maintenance ─────────────────────────────────────────────────────────
+
+    def _refresh(self, keys: list[tuple], stale: dict, ratio: bool) -> list[tuple]:
+        """Apply the HP changes a list has not seen; returns the (new) list.
+
+        A few entries are moved one by one. When more changed (a crowd that
+        drains every tick) the stale entries are filtered out and the changed
+        ones, sorted, merged back in — sorted() sees two runs and merges them
+        in linear time.
+        """
+        entities = self._entities
+        key_of = self._ratio_key if ratio else self._hp_key
+        if len(stale) * MOVE_FRACTION < len(keys):
+            for entity_id, old in stale.items():
+                entity = entities[entity_id]
+                old_key = key_of(entity, old) if old is not None else None
+                if old_key is not None:
+                    _remove(keys, old_key)
+                key = key_of(entity)
+                if key is not None:
+                    insort(keys, key)
+            stale.clear()
+            return keys
+        order = self._order
+        if ratio:   # key_of inlined: this runs for every changed entity
+            changed = [(e.hp / e.hp_max, order[i], i) for i in stale
+                       if (e := entities[i]).hp is not None and e.hp_max]
+        else:
+            changed = [(e.hp, order[i], i) for i in stale if (e := entities[i]).hp is not None]
+        changed.sort()
+        keys = [k for k in keys if k[2] not in stale]
+        stale.clear()
+        keys += changed
+        keys.sort()
+        return keys
+
+    def _fresh(self) -> None:
+        if self._stale_hp:
+            self._by_hp = self._refresh(self._by_hp, self._stale_hp, False)
+        if self._stale_ratio:
+            self._by_ratio = self._refresh(self._by_ratio, self._stale_ratio, True)
+
+    def _lists(self, entity: Entity) -> list[tuple[list[tuple], tuple | None]]:
+        """(list, entity's key in it) for every list kept."""
+        pairs = [(self._by_hp, self._hp_key(entity))]
+        if self._by_ratio is not None:
+            pairs.append((self._by_ratio, self._ratio_key(entity)))
+        return pairs
+
+    def _on_change(self, change: Change, subject, old) -> None:
+        match change:
+            case Change.HP:
+                self._stale_hp.setdefault(subject.id, old)
+                if self._by_ratio is not None:
+                    self._stale_ratio.setdefault(subject.id, old)
+                if self._crossed is not None:
+                    self._crossed.setdefault(subject.id, old)
+            case Change.ENTITY_ADDED:
+                if subject.id in self._order:
+                    return   # already counted by a rebuild (changes replayed after a batch)
+                self._fresh()
+                self._order[subject.id] = self._next
+                self._next += 1
+                self._size += 1
+                if subject.type == EntityType.CHAR:
+                    self._chars[subject.id] = subject
+                for keys, key in self._lists(subject):
+                    if key is not None:
+                        insort(keys, key)
+            case Change.ENTITY_REMOVED:
+                if subject.id not in self._order:
+                    return
+                self._fresh()
+                for keys, key in self._lists(subject):
+                    if key is not None:
+                        _remove(keys, key)
+                del self._order[subject.id]
+                self._chars.pop(subject.id, None)
+                if self._crossed is not None:
+                    self._crossed.pop(subject.id, None)
+                self._size -= 1
+            case Change.RELATION_ADDED | Change.RELATION_REMOVED:
+                if subject.type == RelationType.TRIGGER:
+                    self._triggers = None
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+
+    def order(self, entity_id: str) -> int:
+        """Position of the entity in world.entities."""
+        return self._order[entity_id]
+
+    def chars(self) -> list[Entity]:
+        """Every CHAR, in world.entities order."""
+        return list(self._chars.values())
+
+    def _pick(self, keys, type: EntityType | None) -> list[Entity]:
+        entities = [self._entities[entity_id] for _, _, entity_id in keys]
+        return entities if type is None else [e for e in entities if e.type == type]
+
+    def at_most(self, hp: int, type: EntityType | None = None) -> list[Entity]:
+        """Entities with hp <= hp, lowest first."""
+        if self._stale_hp:
+            self._by_hp = self._refresh(self._by_hp, self._stale_hp, False)
+        end = bisect_right(self._by_hp, (hp, float("inf")))
+        return self._pick(self._by_hp[:end], type)
+
+    def below_ratio(self, ratio: float, type: EntityType | None = None) -> list[Entity]:
+        """Entities with hp / hp_max < ratio, lowest first (entities with hp_max 0 or None excluded)."""
+        if self._by_ratio is None:
+            self._by_ratio = sorted(
+                k for e in self._entities.values() if (k := self._ratio_key(e)) is not None)
+        elif self._stale_ratio:
+            self._by_ratio = self._refresh(self._by_ratio, self._stale_ratio, True)
+        end = bisect_left(self._by_ratio, (ratio,))
+        return self._pick(self._by_ratio[:end], type)
+
+    def crossed(self, hp: int, type: EntityType | None = None) -> list[Entity]:
+        """Entities whose hp went from above hp to at most hp since mark()."""
+        if self._crossed is None:
+            raise ValueError("HpIndex.crossed() needs a mark() first")
+        found = []
+        for entity_id, before in self._crossed.items():
+            entity = self._entities[entity_id]
+            if before is not None and entity.hp is not None and before > hp >= entity.hp:
+                found.append(entity)
+        return found if type is None else [e for e in found if e.type == type]
+
+    def mark(self) -> None:
+        """Start a new crossing window (and the log; HP changes before the first mark() are not kept)."""
+        self._crossed = {}
+
+    def triggers(self, world: World) -> Triggers:
+        """The world's TRIGGERs by speaker and mode, rebuilt after TRIGGER changes."""
+        if self._triggers is None:
+            self._triggers = Triggers(world)
+        return self._triggers
+
+
+def _remove(keys: list[tuple], key: tuple) -> None:
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
+    else:
+        # hp or hp_max was written directly; find the entry by id
+        keys[:] = [k for k in keys if k[2] != key[2]]
+
+
+_indexes: "WeakKeyDictionary[World, HpIndex]" = WeakKeyDictionary()
+
+
+def hp_index_of(world: World) -> HpIndex:
+    """Return the world's HpIndex, creating it on first use."""
+    index = _indexes.get(world)
+    if index is None:
+        index = _indexes[world] = HpIndex(world)
+    else:
+        index.sync(world)
+    return index
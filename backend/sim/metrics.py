@@ -0,0 +1,456 @@
+"""
+Per-tick metrics as columnar time series.
+
+Balancing a world needs numbers over time, not log lines: the HP of each
+category, the stock of each SUMS item, who stands where, how often TRIGGERs
+fire. Metrics samples them from the world after each tick, so a row costs
+the same however much the tick logged:
+
+  tick                      the tick the row was recorded at
+  count.<category>          entities with hp in the TYPE_OF category ("*": all)
+  hp.mean.<category>        their mean, min and max hp, and how many are at 0
+  hp.min.<category>
+  hp.max.<category>
+  hp.dead.<category>
+  stock.<item>              quantity of a SUMS item over all its stacks
+  pop.<envi>                CHARs standing directly in the ENVI
+  triggers.<mode>           TRIGGER firings since the previous row
+                            (threshold, ambient, resurrect)
+
+    metrics = Metrics(world, capacity=4096, path="runs/nord-metrics", chunk=10000)
+    tick(world); metrics.record()          # after every tick (or advance() / run_events())
+    hp = metrics.column("hp.mean.Humans", last=1000)
+    rolling_mean(hp, 50); downsample(hp, 10, "min"); percentile(hp, 0.05)
+
+Every column is a preallocated array('d') ring of `capacity` rows, so a live
+run keeps its latest rows at a fixed cost in memory. A column appears with
+the first row that has it (NaN before); from then on a row without its
+subject writes 0 for counts (count, stock, pop, triggers) and NaN for hp
+statistics. pop.<envi> columns only exist for ENVIs that have held a CHAR.
+
+Stock totals and populations are kept up to date from the World change feed
+rather than recounted per row, and the category roster is rebuilt only after
+an entity or TYPE_OF change. Code that writes relation.number or ent1
+directly bypasses the feed and must call resync() afterwards.
+
+With a path, every `chunk` rows are also written to
+<path>/metrics.<first tick>.col — a JSON header and then each column's
+values as raw little-endian doubles (ticks as int64) — through a temp file
+and os.replace. read_chunks() puts a directory back together, columns
+missing from a chunk as NaN. close() writes the last, partial chunk.
+
+The query helpers work on any sequence of floats, skip NaN, and run on
+builtins over array slices rather than per-row Python logic where they can.
+
+Run:  python -m backend.sim.metrics worlds/nord.json --ticks 2000 \\
+          --column hp.mean.Humans --every 100 [--out runs/nord]
+      records a run, prints record() cost against tick() cost and a
+      downsampled column
+"""
+
+import json
+import math
+import os
+import sys
+import time
+from array import array
+from collections import Counter
+from itertools import accumulate
+from pathlib import Path
+from weakref import WeakKeyDictionary
+
+from backend.core.entity import EntityType
+from backend.core.relation import RelationType
+from backend.core.world import Change, World
+from backend.sim.hpindex import hp_index_of
+
+NAN = float("nan")
+MAGIC = b"PSCOL1\n"
+MODES = ("threshold", "ambient", "resurrect")
+_COUNTS = ("count.", "stock.", "pop.", "triggers.")   # columns that read 0 when absent
+
+
+# ── Engine counters ──────────────────────────────────────────────────────────
+
+_firings: "WeakKeyDictionary[World, Counter]" = WeakKeyDictionary()
+_produced: "WeakKeyDictionary[World, Counter]" = WeakKeyDictionary()
+
+
+def firings_of(world: World) -> Counter:
+    """TRIGGER firings of the world by mode, counted by the engine since load."""
+    firings = _firings.get(world)
+    if firings is None:
+        firings = _firings[world] = Counter()
+    return firings
+
+
+def produced_of(world: World) -> Counter:
+    """Units PRODUCE added to stacks, by item id, counted by the engine since load."""
+    produced = _produced.get(world)
+    if produced is None:
+        produced = _produced[world] = Counter()
+    return produced
+
+
+# ── Query helpers ────────────────────────────────────────────────────────────
+
+def _finite(values) -> list[float]:
+    return [v for v in values if v == v]
+
+
+def downsample(values, factor: int, how: str = "mean") -> array:
+    """One value per `factor` rows: their mean, min, max or last (NaN skipped)."""
+    if factor < 1:
+        raise ValueError("downsample needs factor >= 1")
+    if how not in ("mean", "min", "max", "last"):
+        raise ValueError(f"Unknown downsample '{how}'; use mean, min, max or last")
+    out = array("d")
+    for i in range(0, len(values), factor):
+        bucket = _finite(values[i:i + factor])
+        if not bucket:
+            out.append(NAN)
+        elif how == "mean":
+            out.append(math.fsum(bucket) / len(bucket))
+        elif how == "min":
+            out.append(min(bucket))
+        elif how == "max":
+            out.append(max(bucket))
+        else:
+            out.append(bucket[-1])
+    return out
+
+
+def rolling_mean(values, window: int) -> array:
+    """Mean of each row and the window − 1 before it (NaN skipped; NaN if all are)."""
+    if window < 1:
+        raise ValueError("rolling_mean needs window >= 1")
+    sums = [0.0, *accumulate(v if v == v else 0.0 for v in values)]
+    counts = [0, *accumulate(v == v for v in values)]
+    out = array("d")
+    for i in range(1, len(sums)):
+        lo = max(0, i - window)
+        n = counts[i] - counts[lo]
+        out.append((sums[i] - sums[lo]) / n if n else NAN)
+    return out
+
+
+def percentile(values, q: float) -> float:
+    """The q-quantile (0…1, linear interpolation) of the finite values; NaN if none."""
+    return percentiles(values, (q,))[0]
+
+
+def percentiles(values, qs) -> list[float]:
+    """Several quantiles with one sort."""
+    ordered = sorted(_finite(values))
+    result = []
+    for q in qs:
+        if not 0.0 <= q <= 1.0:
+            raise ValueError(f"Quantile {q} is outside 0…1")
+        if not ordered:
+            result.append(NAN)
+            continue
+        position = q * (len(ordered) - 1)
+        lo = int(position)
+        hi = min(lo + 1, len(ordered) - 1)
+        result.append(ordered[lo] + (ordered[hi] - ordered[lo]) * (position - lo))
+    return result
+
+
+# ── Chunk files ──────────────────────────────────────────────────────────────
+
+def _to_le(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_chunk(path: Path, ticks: array, columns: dict[str, array]) -> None:
+    """One chunk file, written to a temp file and renamed into place."""
+    header = json.dumps({"rows": len(ticks), "columns": list(columns)}).encode("utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        f.write(_to_le(ticks))
+        for column in columns.values():
+            f.write(_to_le(column))
+    os.replace(tmp, path)
+
+
+def read_chunk(path: Path) -> tuple[array, dict[str, array]]:
+    """(ticks, name → values) of one chunk file."""
+    data = Path(path).read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path}: not a metrics chunk")
+    at = len(MAGIC) + 4
+    size = int.from_bytes(data[len(MAGIC):at], "little")
+    header = json.loads(data[at:at + size])
+    at += size
+    rows = header["rows"]
+
+    def take(typecode: str) -> array:
+        nonlocal at
+        column = array(typecode)
+        column.frombytes(data[at:at + rows * column.itemsize])
+        at += rows * column.itemsize
+        if sys.byteorder == "big":
+            column.byteswap()
+        return column
+
+    ticks = take("q")
+    return ticks, {name: take("d") for name in header["columns"]}
+
+
+def read_chunks(directory: str | Path) -> tuple[array, dict[str, array]]:
+    """All chunks of a directory in tick order, as one set of columns."""
+    ticks = array("q")
+    columns: dict[str, array] = {}
+    for path in sorted(Path(directory).glob("metrics.*.col")):
+        chunk_ticks, chunk = read_chunk(path)
+        for name in chunk.keys() - columns.keys():
+            columns[name] = array("d", [NAN]) * len(ticks)
+        for name, column in columns.items():
+            column.extend(chunk.get(name) or array("d", [NAN]) * len(chunk_ticks))
+        ticks.extend(chunk_ticks)
+    return ticks, columns
+
+
+# ── Recorder ─────────────────────────────────────────────────────────────────
+
+class Metrics:
+    """Columnar per-tick aggregates of one world; see the module docstring."""
+
+    def __init__(self, world: World, capacity: int = 4096, path: str | Path | None = None,
+                 chunk: int = 10000):
+        if capacity < 1 or chunk < 1:
+            raise ValueError("Metrics needs capacity and chunk >= 1")
+        self.world = world
+        self.capacity = capacity
+        self.path = Path(path) if path is not None else None
+        self.chunk = chunk
+        self.rows = 0                            # rows recorded so far
+        self._ticks = array("q", [0]) * capacity
+        self._columns: dict[str, array] = {}
+        self._fill: dict[str, float] = {}        # value of a row without the column's subject
+        self._head = 0                           # next ring slot
+        self._pending_ticks = array("q")         # rows not yet in a chunk file
+        self._pending: dict[str, array] = {}
+        self._firings = Counter(firings_of(world))
+        self._roster: list[tuple] | None = None  # (entity, its categories + "*")
+        self._stocks: Counter | None = None      # SUMS id → quantity, kept from the change feed
+        self._population: Counter | None = None  # ENVI id → CHARs directly in it, likewise
+        self.record_times: list[float] = []
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+        world.subscribe(self._on_change)
+
+    def close(self) -> None:
+        """Stop recording and write the pending rows (if writing chunks)."""
+        self.world.unsubscribe(self._on_change)
+        self.flush()
+
+    def _on_change(self, change: Change, subject, old) -> None:
+        match change:
+            case Change.ENTITY_ADDED | Change.ENTITY_REMOVED:
+                self._roster = self._stocks = self._population = None
+            case Change.RELATION_ADDED | Change.RELATION_REMOVED:
+                if subject.type == RelationType.TYPE_OF:
+                    self._roster = None
+                elif subject.type == RelationType.LOCATION:
+                    sign = 1 if change == Change.RELATION_ADDED else -1
+                    self._count(subject, subject.ent1, sign)
+                    if self._stocks is not None and subject.ent2 in self._stocks:
+                        self._stocks[subject.ent2] += sign * subject.number
+            case Change.RELATION_MOVED:
+                self._count(subject, old, -1)
+                self._count(subject, subject.ent1, 1)
+            case Change.STACK:
+                if self._stocks is not None and subject.ent2 in self._stocks:
+                    self._stocks[subject.ent2] += subject.number - old[0]
+
+    def _count(self, relation, parent_id: str, sign: int) -> None:
+        """Population change for a CHAR entering (+1) or leaving (-1) parent_id."""
+        if self._population is None:
+            return
+        entities = self.world.entities
+        child, parent = entities.get(relation.ent2), entities.get(parent_id)
+        if (child is not None and child.type == EntityType.CHAR
+                and parent is not None and parent.type == EntityType.ENVI):
+            self._population[parent_id] += sign
+
+    def resync(self) -> None:
+        """Recount everything on the next record()."""
+        self._roster = self._stocks = self._population = None
+
+    # ── Sampling ────────────────────────────────────────────────────────────
+
+    def _sample(self) -> dict[str, float]:
+        world = self.world
+        if self._roster is None:
+            self._roster = [
+                (e, (*(r.ent2 for r in world.related(RelationType.TYPE_OF, ent1=e.id)), "*"))
+                for e in world.entities.values() if e.hp is not None and e.type != EntityType.SUMS]
+        if self._stocks is None:
+            self._stocks = Counter({
+                e.id: sum(r.number for r in world.related(RelationType.LOCATION, ent2=e.id))
+                for e in world.entities.values() if e.type == EntityType.SUMS})
+        if self._population is None:
+            self._population = Counter()
+            for char in hp_index_of(world).chars():
+                location = world.location_of(char.id)
+                if location is not None and location.type == EntityType.ENVI:
+                    self._population[location.id] += 1
+
+        stats: dict[str, list] = {}   # category → [count, sum, min, max, dead]
+        for entity, categories in self._roster:
+            hp = entity.hp
+            for category in categories:
+                s = stats.get(category)
+                if s is None:
+                    stats[category] = [1, hp, hp, hp, hp == 0]
+                else:
+                    s[0] += 1
+                    s[1] += hp
+                    if hp < s[2]:
+                        s[2] = hp
+                    if hp > s[3]:
+                        s[3] = hp
+                    s[4] += hp == 0
+        row: dict[str, float] = {}
+        for category, (count, total, low, high, dead) in stats.items():
+            row[f"count.{category}"] = count
+            row[f"hp.mean.{category}"] = total / count
+            row[f"hp.min.{category}"] = low
+            row[f"hp.max.{category}"] = high
+            row[f"hp.dead.{category}"] = dead
+        for item, quantity in self._stocks.items():
+            row[f"stock.{item}"] = quantity
+        for envi_id, count in self._population.items():
+            if count:
+                row[f"pop.{envi_id}"] = count
+        firings = firings_of(world)
+        for mode in MODES:
+            row[f"triggers.{mode}"] = firings[mode] - self._firings[mode]
+        self._firings = Counter(firings)
+        return row
+
+    def record(self) -> None:
+        """Append one row for the world as it is now; call it after every tick."""
+        started = time.perf_counter()
+        row = self._sample()
+        for name in row.keys() - self._columns.keys():
+            self._columns[name] = array("d", [NAN]) * self.capacity
+            self._fill[name] = 0.0 if name.startswith(_COUNTS) else NAN
+            if self.path is not None:
+                self._pending[name] = array("d", [NAN]) * len(self._pending_ticks)
+        slot = self._head
+        self._ticks[slot] = self.world.meta.tick
+        fill = self._fill
+        for name, column in self._columns.items():
+            column[slot] = row.get(name, fill[name])
+        self._head = (slot + 1) % self.capacity
+        self.rows += 1
+        if self.path is not None:
+            self._pending_ticks.append(self.world.meta.tick)
+            for name, column in self._pending.items():
+                column.append(row.get(name, fill[name]))
+            if len(self._pending_ticks) >= self.chunk:
+                self.flush()
+        self.record_times.append(time.perf_counter() - started)
+
+    def flush(self) -> None:
+        """Write the pending rows as a chunk file."""
+        if self.path is None or not self._pending_ticks:
+            return
+        write_chunk(self.path / f"metrics.{self._pending_ticks[0]:010d}.col",
+                    self._pending_ticks, self._pending)
+        self._pending_ticks = array("q")
+        self._pending = {name: array("d") for name in self._pending}
+
+    # ── Reading ─────────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        """Rows held in the ring."""
+        return min(self.rows, self.capacity)
+
+    @property
+    def names(self) -> list[str]:
+        return sorted(self._columns)
+
+    def _window(self, ring: array, last: int | None) -> array:
+        n = len(self) if last is None else max(0, min(last, len(self)))
+        start = (self._head - n) % self.capacity
+        if start + n <= self.capacity:
+            return ring[start:start + n]
+        return ring[start:] + ring[:self._head]
+
+    def ticks(self, last: int | None = None) -> array:
+        """Tick numbers of the newest `last` rows in the ring (all by default), oldest first."""
+        return self._window(self._ticks, last)
+
+    def column(self, name: str, last: int | None = None) -> array:
+        """Values of a column for the same rows as ticks(last); raises KeyError for an unknown name."""
+        return self._window(self._columns[name], last)
+
+
+def run(path: Path, ticks: int, capacity: int, chunk: int, column: str | None,
+        every: int, out: Path | None, seed: int) -> dict:
+    """Record `ticks` ticks; report record() cost against tick() cost and one column."""
+    import random
+    from backend.sim.engine import tick
+
+    random.seed(seed)
+    world = World.load(path)
+    metrics = Metrics(world, capacity, out, chunk)
+    tick_time = 0.0
+    for _ in range(ticks):
+        started = time.perf_counter()
+        tick(world)
+        tick_time += time.perf_counter() - started
+        metrics.record()
+    metrics.close()
+    record_time = sum(metrics.record_times)
+    column = column or next((n for n in metrics.names if n.startswith("hp.mean.")), "triggers.ambient")
+    values = metrics.column(column)
+    p05, p50, p95 = percentiles(values, (0.05, 0.5, 0.95))
+    result = {
+        "rows": metrics.rows,
+        "columns": len(metrics.names),
+        "tick_us": round(tick_time / ticks * 1e6, 1),
+        "record_us": round(record_time / ticks * 1e6, 1),
+        "column": column,
+        "p05/p50/p95": [round(p05, 2), round(p50, 2), round(p95, 2)],
+        "every": [round(v, 2) for v in downsample(values, every)],
+        "rolling": [round(v, 2) for v in downsample(rolling_mean(values, every), every, "last")],
+    }
+    if out is not None:
+        stored, columns = read_chunks(out)
+        result["on_disk"] = f"{len(stored)} rows, {len(columns)} columns"
+    return result
+
+
+def parse_args() -> dict:
+    opts = {"path": Path("worlds/nord.json"), "ticks": 2000, "capacity": 4096, "chunk": 10000,
+            "column": None, "every": 100, "out": None, "seed": 1}
+    casts = {"--ticks": int, "--capacity": int, "--chunk": int, "--column": str,
+             "--every": int, "--out": Path, "--seed": int}
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in casts and i + 1 < len(args):
+            opts[args[i][2:]] = casts[args[i]](args[i + 1])
+            i += 2
+        else:
+            opts["path"] = Path(args[i])
+            i += 1
+    return opts
+
+
+if __name__ == "__main__":
+    # The engine counts firings in backend.sim.metrics, not in this __main__ copy
+    from backend.sim.metrics import parse_args, run
+
+    for key, value in run(**parse_args()).items():
+        print(f"{key:>12}: {value}")
@@ -0,0 +1,334 @@
+"""
+Multi-rate scheduling: each subsystem and each region at its own tick rate.
+
+tick() runs every phase for every entity every tick. Far from where anyone
+is looking that is more precision than a story needs: a village across the
+map can drain and trade every ten ticks, and producers can deliver in
+batches. MultiRate runs a tick like tick(), but
+
+  per phase    a phase with period P runs only on ticks divisible by P
+               (produce, hp, intents, triggers; sums_hp runs every tick —
+               stack decay is already closed-form, see stacks.py)
+  per region   a Region — a set of ENVIs with a period — runs its share of
+               a phase every `period` ticks; an entity belongs to the first
+               region holding the nearest ENVI above it, entities outside
+               every region run at `default`
+
+    near = around(world, "D4", hops=2)                 # ENVIs within 2 EDGEs
+    plan = MultiRate(world, phases={"triggers": 5},
+                     regions=[Region("near", 1, near)], default=10)
+    for _ in range(n):
+        log = plan.step()
+    plan.focus([Region("near", 1, around(world, "F6", 2))])   # the camera moved
+    plan.close()                                              # done with the plan
+
+A region whose period is not a multiple of the phase period is rounded up to
+one. Regions are staggered (region i runs one phase run after region i − 1),
+so the slow parts of the world do not all catch up on the same tick.
+
+A slow part catches up with the aggregate of the ticks it skipped, k ticks at
+once:
+
+  produce    one Poisson(k × lambda) draw capped at k × number, or
+             k × number for deterministic producers — the stock cap applies
+             once, to the total. Type-based producers run at `default`.
+  hp         k drain steps, clamped each step, with the drain of the due tick
+  intents    the brain acts once per period (one move, one meal)
+  triggers   an ambient TRIGGER fires with 1 − (1 − lambda)^k; threshold and
+             resurrection TRIGGERs are checked whenever the phase runs
+
+Between its runs a slow entity does not change, so whatever reads it (brains,
+neighbourhood aggregates, TRIGGER thresholds) sees it as of its last run;
+drains that change in between, and entities that move between regions, are
+caught up with the drain they have on the due tick. With every period 1
+step() is tick(), draw for draw. With meta.vars["rng"] set, catch-up draws
+come from the due tick's streams (backend/sim/rng.py). An entity's region is
+looked up once and kept until the world's change feed reports a LOCATION
+change at or above it.
+
+Run:  python -m backend.sim.multirate worlds/chess.json --ticks 500 \\
+          --focus D4 --hops 2 --period 10 --phases triggers=5
+      times n × tick() against the same run with the multi-rate plan
+"""
+
+import random
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+
+from backend.core.entity import EntityType
+from backend.core.relation import RelationType
+from backend.core.world import Change, World
+from backend.sim.activity import activity_of
+from backend.sim.engine import (
+    PHASES, _poisson, _process_entity_hp, _process_intents, _process_produce,
+    _process_triggers, tick,
+)
+from backend.sim.hpindex import hp_index_of
+from backend.sim.rng import rng_for
+
+RATED = ("produce", "hp", "intents", "triggers")   # phases that take a period
+
+
+@dataclass(frozen=True)
+class Region:
+    """A set of ENVIs run at one period."""
+    name: str
+    period: int
+    envis: frozenset[str]
+
+
+# ── Regions ──────────────────────────────────────────────────────────────────
+
+def subtree(world: World, root_id: str) -> frozenset[str]:
+    """ENVIs in the LOCATION subtree of root_id (root_id included if an ENVI)."""
+    found, stack = set(), [root_id]
+    while stack:
+        entity_id = stack.pop()
+        entity = world.get(entity_id)
+        if entity is None or entity_id in found:
+            continue
+        if entity.type == EntityType.ENVI:
+            found.add(entity_id)
+        stack.extend(child.id for child, _ in world.children(entity_id))
+    return frozenset(found)
+
+
+def around(world: World, envi_id: str, hops: int | None = None) -> frozenset[str]:
+    """ENVIs within `hops` EDGEs of envi_id, either direction; None = the whole component."""
+    seen = {envi_id}
+    frontier = deque([(envi_id, 0)])
+    while frontier:
+        current, depth = frontier.popleft()
+        if hops is not None and depth >= hops:
+            continue
+        for r in world.touching(RelationType.EDGE, current):
+            other = r.ent2 if r.ent1 == current else r.ent1
+            if other not in seen:
+                seen.add(other)
+                frontier.append((other, depth + 1))
+    return frozenset(envi_id for envi_id in seen
+                     if (e := world.get(envi_id)) is not None and e.type == EntityType.ENVI)
+
+
+def component(world: World, envi_id: str) -> frozenset[str]:
+    """ENVIs EDGE-connected to envi_id."""
+    return around(world, envi_id)
+
+
+# ── Scheduler ────────────────────────────────────────────────────────────────
+
+def _check_period(what: str, period) -> None:
+    if isinstance(period, bool) or not isinstance(period, int) or period < 1:
+        raise ValueError(f"{what}: period must be an integer >= 1, got {period!r}")
+
+
+class MultiRate:
+    """Runs a world's ticks with per-phase and per-region periods; see the module docstring."""
+
+    def __init__(self, world: World, phases: dict[str, int] | None = None,
+                 regions: list[Region] = (), default: int = 1):
+        phases = dict(phases or {})
+        unknown = set(phases) - set(RATED)
+        if unknown:
+            raise ValueError(f"Unknown or unrated phases {sorted(unknown)}; rated phases are {RATED}")
+        for name, period in phases.items():
+            _check_period(f"Phase {name}", period)
+        _check_period("Default", default)
+        self.world = world
+        self.phases = {name: phases.get(name, 1) for name in RATED}
+        self.default = default
+        self.focus(regions)
+        world.subscribe(self._on_change)
+
+    def close(self) -> None:
+        """Stop following the world's changes (the plan is not used any more)."""
+        self.world.unsubscribe(self._on_change)
+
+    def focus(self, regions: list[Region]) -> None:
+        """Replace the regions (first match wins for an ENVI in several)."""
+        for region in regions:
+            _check_period(f"Region {region.name}", region.period)
+        self.regions = list(regions)
+        self._envi_region: dict[str, int] = {}
+        for i, region in enumerate(self.regions):
+            for envi_id in region.envis:
+                self._envi_region.setdefault(envi_id, i)
+        self._regions: dict[str, int | None] = {}   # entity id → region, until it moves
+
+    def _on_change(self, change: Change, subject, old) -> None:
+        # An entity's region follows its LOCATION chain: a move, a new or a
+        # removed LOCATION re-files the contained entity and what it holds
+        if change in (Change.RELATION_ADDED, Change.RELATION_REMOVED, Change.RELATION_MOVED):
+            if subject.type == RelationType.LOCATION and self._regions:
+                stack = [subject.ent2]
+                while stack:
+                    entity_id = stack.pop()
+                    self._regions.pop(entity_id, None)
+                    stack.extend(child.id for child, _ in self.world.children(entity_id))
+        elif change == Change.ENTITY_REMOVED:
+            self._regions.pop(subject.id, None)
+
+    def _region(self, entity_id: str) -> int | None:
+        """Index of the region of the nearest ENVI at or above entity_id."""
+        if entity_id in self._regions:
+            return self._regions[entity_id]
+        found, current, seen = None, entity_id, set()
+        while current is not None and current not in seen:
+            found = self._envi_region.get(current)
+            if found is not None:
+                break
+            seen.add(current)
+            parent = self.world.location_of(current)
+            current = parent.id if parent is not None else None
+        self._regions[entity_id] = found
+        return found
+
+    def _flat(self, name: str) -> bool:
+        return (self.phases[name] == 1 and self.default == 1
+                and all(region.period == 1 for region in self.regions))
+
+    def _ticks(self, name: str, entity_id: str | None) -> int:
+        """Ticks entity_id's share of phase `name` covers this tick; 0 if not due."""
+        period = self.phases[name]
+        i = self._region(entity_id) if entity_id is not None else None
+        rate = self.default if i is None else self.regions[i].period
+        runs = -(-rate // period)
+        offset = 0 if i is None else i + 1
+        if (self.world.meta.tick // period + offset) % runs:
+            return 0
+        return runs * period
+
+    # ── Phases ──────────────────────────────────────────────────────────────
+
+    def _produce_due(self) -> dict[int, int]:
+        due = {}
+        for r in self.world.related(RelationType.PRODUCE):
+            producer = self.world.get(r.ent1)
+            direct = producer is not None and producer.type != EntityType.UNIQUE
+            k = self._ticks("produce", r.ent1 if direct else None)
+            if k:
+                if r.lambda_ > 0:
+                    rand = rng_for(self.world, "produce", r.id).random
+                    due[r.id] = _poisson(k * r.lambda_, k * r.number, rand)
+                else:
+                    due[r.id] = k * r.number
+        return due
+
+    def _hp_steps(self) -> dict[str, int]:
+        steps = {}
+        for entity_id in activity_of(self.world).active_entities:
+            k = self._ticks("hp", entity_id)
+            if k:
+                steps[entity_id] = k
+        return steps
+
+    def _actors(self) -> set[str]:
+        return {entity.id for entity in hp_index_of(self.world).chars()
+                if entity.control is not None and self._ticks("intents", entity.id)}
+
+    def _ambient(self) -> set[int]:
+        triggers = hp_index_of(self.world).triggers(self.world)
+        ambient = set()
+        for i in triggers.ambient:
+            r = triggers.all[i]
+            if r.lambda_ <= 0:
+                continue
+            k = self._ticks("triggers", r.ent1)
+            if k and (rng_for(self.world, "triggers", r.id).random()
+                      < 1.0 - (1.0 - min(r.lambda_, 1.0)) ** k):
+                ambient.add(r.id)
+        return ambient
+
+    def step(self) -> list[str]:
+        """Advance one tick (meta.tick is incremented first), phases in PHASES order."""
+        world = self.world
+        world.meta.tick += 1
+        log: list[str] = []
+        for name, phase in PHASES:
+            if name == "sums_hp" or self._flat(name):
+                log += phase(world)
+                continue
+            if world.meta.tick % self.phases[name]:
+                continue
+            if name == "produce":
+                log += _process_produce(world, self._produce_due())
+            elif name == "hp":
+                log += _process_entity_hp(world, self._hp_steps())
+            elif name == "intents":
+                log += _process_intents(world, self._actors())
+            else:
+                log += _process_triggers(world, self._ambient())
+        return log
+
+
+def run_multirate(world: World, n: int, phases: dict[str, int] | None = None,
+                  regions: list[Region] = (), default: int = 1) -> list[str]:
+    """Advance the world by n ticks with a MultiRate plan; returns the log."""
+    plan = MultiRate(world, phases, regions, default)
+    log: list[str] = []
+    try:
+        for _ in range(n):
+            log += plan.step()
+    finally:
+        plan.close()
+    return log
+
+
+def _phase_periods(text: str) -> dict[str, int]:
+    """'produce=10,triggers=5' → {"produce": 10, "triggers": 5}"""
+    periods = {}
+    for item in filter(None, text.split(",")):
+        name, _, period = item.partition("=")
+        periods[name.strip()] = int(period)
+    return periods
+
+
+def run(path: Path, ticks: int, focus: str | None, hops: int, period: int,
+        phases: dict[str, int], seed: int) -> dict:
+    """Time n × tick() against the same n ticks with the multi-rate plan."""
+    random.seed(seed)
+    world = World.load(path)
+    started = time.perf_counter()
+    plain_log = sum((tick(world) for _ in range(ticks)), [])
+    plain = time.perf_counter() - started
+
+    random.seed(seed)
+    world = World.load(path)
+    regions = [Region("focus", 1, around(world, focus, hops))] if focus is not None else []
+    started = time.perf_counter()
+    log = run_multirate(world, ticks, phases, regions, period)
+    multi = time.perf_counter() - started
+    return {
+        "ticks": ticks,
+        "focus_envis": len(regions[0].envis) if regions else 0,
+        "tick_seconds": round(plain, 3),
+        "multirate_seconds": round(multi, 3),
+        "speedup": round(plain / multi, 2) if multi else None,
+        "tick_log_lines": len(plain_log),
+        "multirate_log_lines": len(log),
+    }
+
+
+def parse_args() -> dict:
+    opts = {"path": Path("worlds/chess.json"), "ticks": 500, "focus": None, "hops": 2,
+            "period": 10, "phases": {}, "seed": 1}
+    casts = {"--ticks": int, "--focus": str, "--hops": int, "--period": int,
+             "--phases": _phase_periods, "--seed": int}
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in casts and i + 1 < len(args):
+            opts[args[i][2:]] = casts[args[i]](args[i + 1])
+            i += 2
+        else:
+            opts["path"] = Path(args[i])
+            i += 1
+    return opts
+
+
+if __name__ == "__main__":
+    for key, value in run(**parse_args()).items():
+        print(f"{key:>20}: {value}")
@@ -0,0 +1,311 @@
+"""
+Neighbourhood aggregates over the EDGE graph.
+
+Some drains depend on who stands next to an entity: a formation bonus for a
+piece with its own side around it, crowding in a busy district. A world
+declares such aggregates in meta.vars["neighbourhood"]:
+
+    "neighbourhood": [
+      {"name": "FORMATION", "target": "WhitePieces", "source": "WhitePieces", "rate": -1},
+      {"name": "CROWDING", "target": "VILLAGER", "source": "*", "weight": "number",
+       "self": true, "rate": 0.5, "cap": 10}
+    ]
+
+For every ENVI the aggregate sums `value` over the source occupants of the
+ENVIs one EDGE away (and of the ENVI itself with "self": true):
+
+  source  entity id, TYPE_OF category (direct members) or "*" (any CHAR /
+          UNIQUE / SUMS occupant)
+  value   "count" (1 per occupant, default), "number" (the LOCATION number,
+          i.e. stack quantity), "hp" (per-stack hp for SUMS), "hp_max"
+  weight  "one" (default) or "number" — each neighbour scaled by the EDGE number
+
+A target — the entity `target` itself or a direct TYPE_OF member, standing
+in an ENVI — gets the behavior `name` at round(rate × aggregate), clamped to
+±cap, as a fifth source in the engine's _collect_behaviors(). A modifier of
+0 is left out, so the log only names the ones that act. SUMS stacks are not
+targets. Neighbours follow movement: a one_way EDGE links ent1 to ent2 only;
+deny is ignored (it stops walkers, not influence).
+
+The EDGE graph is kept as a CSR matrix over the ENVIs (row pointers, column
+indices, EDGE numbers) and rebuilt only when an EDGE or ENVI is added or
+removed. update() runs at the start of the hp phase: each distinct
+(source, value) vector is gathered from the LOCATION relations and each
+distinct product computed with one pass over the matrix, instead of relation
+lookups per target and neighbour. Count, number and hp_max aggregates are
+only recomputed after a LOCATION, stack, TYPE_OF or entity change; hp
+aggregates every tick.
+
+Targets never sleep (ActivityTracker.held) and, like the sources of hp
+aggregates, are never coasted by advance() or run_events(): their drains
+follow other entities. Specs are read on first use; after editing
+meta.vars["neighbourhood"] call neighbourhood_of(world).reload(world).
+"""
+
+from dataclasses import dataclass
+from operator import mul
+from weakref import WeakKeyDictionary
+
+from backend.core.entity import EntityType
+from backend.core.relation import RelationType
+from backend.core.world import Change, World
+from backend.sim.activity import activity_of
+from backend.sim.rng import streams_of
+
+VALUES = ("count", "number", "hp", "hp_max")
+WEIGHTS = ("one", "number")
+_REQUIRED = ("name", "target", "source", "rate")
+_KEYS = set(_REQUIRED) | {"value", "weight", "self", "cap"}
+_OCCUPANTS = (EntityType.CHAR, EntityType.UNIQUE, EntityType.SUMS)
+
+
+@dataclass(frozen=True)
+class Spec:
+    """One neighbourhood aggregate of meta.vars["neighbourhood"]."""
+    name: str
+    target: str
+    source: str
+    rate: float
+    value: str = "count"
+    weight: str = "one"
+    self_: bool = False
+    cap: int | None = None
+
+
+def parse_specs(raw) -> list[Spec]:
+    """Specs from meta.vars["neighbourhood"]; raises ValueError on a malformed entry."""
+    if not isinstance(raw, list):
+        raise ValueError("meta.vars.neighbourhood must be a list of aggregates")
+    specs = []
+    for i, entry in enumerate(raw):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Neighbourhood aggregate {i} must be an object")
+        unknown = set(entry) - _KEYS
+        if unknown:
+            raise ValueError(f"Neighbourhood aggregate {i}: unknown keys {sorted(unknown)}")
+        missing = [key for key in _REQUIRED if key not in entry]
+        if missing:
+            raise ValueError(f"Neighbourhood aggregate {i}: missing {missing}")
+        value, weight = entry.get("value", "count"), entry.get("weight", "one")
+        if value not in VALUES:
+            raise ValueError(f"Neighbourhood aggregate {i}: value must be one of {VALUES}")
+        if weight not in WEIGHTS:
+            raise ValueError(f"Neighbourhood aggregate {i}: weight must be one of {WEIGHTS}")
+        rate, cap = entry["rate"], entry.get("cap")
+        if isinstance(rate, bool) or not isinstance(rate, (int, float)):
+            raise ValueError(f"Neighbourhood aggregate {i}: rate must be a number")
+        if cap is not None and (isinstance(cap, bool) or not isinstance(cap, int) or cap < 0):
+            raise ValueError(f"Neighbourhood aggregate {i}: cap must be a non-negative integer")
+        specs.append(Spec(str(entry["name"]), str(entry["target"]), str(entry["source"]),
+                          rate, value, weight, bool(entry.get("self", False)), cap))
+    return specs
+
+
+class Adjacency:
+    """CSR matrix of the EDGE graph: row i holds the neighbours of ENVI ids[i]."""
+
+    def __init__(self, world: World):
+        self.ids = [e.id for e in world.entities.values() if e.type == EntityType.ENVI]
+        self.index = {envi_id: i for i, envi_id in enumerate(self.ids)}
+        rows: list[dict[int, int]] = [{} for _ in self.ids]
+        edges = world.related(RelationType.EDGE)
+        if streams_of(world) is not None:   # the first EDGE of a pair by id, not index order
+            edges = sorted(edges, key=lambda r: r.id)
+        for r in edges:
+            a, b = self.index.get(r.ent1), self.index.get(r.ent2)
+            if a is None or b is None or a == b:
+                continue
+            rows[a].setdefault(b, r.number)
+            if not r.one_way:
+                rows[b].setdefault(a, r.number)
+        self.indptr = [0]
+        self.indices: list[int] = []
+        self.weights: list[int] = []
+        for row in rows:
+            for j in sorted(row):
+                self.indices.append(j)
+                self.weights.append(row[j])
+            self.indptr.append(len(self.indices))
+
+    def multiply(self, x: list[float], weighted: bool, diagonal: bool) -> list[float]:
+        """A·x, with EDGE numbers as weights or all ones, plus x itself if diagonal."""
+        indptr, indices, weights, get = self.indptr, self.indices, self.weights, x.__getitem__
+        y = []
+        for i in range(len(self.ids)):
+            lo, hi = indptr[i], indptr[i + 1]
+            if weighted:
+                total = sum(map(mul, weights[lo:hi], map(get, indices[lo:hi])))
+            else:
+                total = sum(map(get, indices[lo:hi]))
+            y.append(total + x[i] if diagonal else total)
+        return y
+
+
+class Neighbourhood:
+    """A world's neighbourhood aggregates, recomputed once per tick when needed."""
+
+    def __init__(self, world: World):
+        self.specs: list[Spec] = []
+        self.reload(world)
+        world.subscribe(self._on_change)
+
+    def reload(self, world: World) -> None:
+        """Re-read meta.vars["neighbourhood"] and start over."""
+        self.specs = parse_specs(world.meta.vars.get("neighbourhood", []))
+        self._adjacency: Adjacency | None = None
+        self._members: dict[str, frozenset[str]] = {}      # source / target → entity ids
+        self._targets: dict[str, list[Spec]] | None = None  # entity id → its specs
+        self._sums: dict[Spec, list[float]] = {}
+        self._dirty = True
+        self._every_tick = any(spec.value == "hp" for spec in self.specs)
+        activity_of(world).held = set()
+
+    # ── Change feed ─────────────────────────────────────────────────────────
+
+    def _on_change(self, change: Change, subject, old) -> None:
+        if not self.specs:
+            return
+        match change:
+            case Change.RELATION_ADDED | Change.RELATION_REMOVED:
+                if subject.type == RelationType.EDGE:
+                    self._adjacency = None
+                elif subject.type == RelationType.TYPE_OF:
+                    self._members.clear()
+                    self._targets = None
+                elif subject.type != RelationType.LOCATION:
+                    return
+            case Change.ENTITY_ADDED | Change.ENTITY_REMOVED:
+                if subject.type == EntityType.ENVI:
+                    self._adjacency = None
+                self._members.clear()
+                self._targets = None
+            case Change.RELATION_MOVED | Change.STACK:
+                pass
+            case _:
+                return
+        self._dirty = True
+
+    # ── Aggregation ─────────────────────────────────────────────────────────
+
+    def _members_of(self, world: World, scope: str) -> frozenset[str]:
+        members = self._members.get(scope)
+        if members is None:
+            members = {r.ent1 for r in world.related(RelationType.TYPE_OF, ent2=scope)}
+            if scope in world.entities:
+                members.add(scope)
+            members = self._members[scope] = frozenset(members)
+        return members
+
+    def targets(self, world: World) -> dict[str, list[Spec]]:
+        """Entity id → the specs that target it (entities with hp, SUMS excepted)."""
+        if self._targets is None:
+            self._targets = {}
+            for spec in self.specs:
+                for entity_id in self._members_of(world, spec.target):
+                    entity = world.entities.get(entity_id)
+                    if entity is not None and entity.hp is not None and entity.type != EntityType.SUMS:
+                        self._targets.setdefault(entity_id, []).append(spec)
+            activity = activity_of(world)
+            activity.held = set(self._targets)
+            for entity_id in self._targets:
+                activity.wake_entity(entity_id)
+        return self._targets
+
+    def pinned(self, world: World, entity_id: str) -> bool:
+        """True if the entity's drain, or an aggregate, follows its neighbours' state."""
+        if not self.specs:
+            return False
+        if entity_id in self.targets(world):
+            return True
+        return any(spec.value == "hp" and (spec.source == "*" or entity_id in self._members_of(world, spec.source))
+                   for spec in self.specs)
+
+    def reads_stock(self, world: World, item_id: str) -> bool:
+        """True if an aggregate sums the number or hp of stacks of this item."""
+        return any(spec.value in ("number", "hp")
+                   and (spec.source == "*" or item_id in self._members_of(world, spec.source))
+                   for spec in self.specs)
+
+    def _vector(self, world: World, adjacency: Adjacency, source: str, value: str) -> list[float]:
+        """Per-ENVI sum of `value` over the source occupants standing in it."""
+        x = [0] * len(adjacency.ids)
+        index, entities = adjacency.index, world.entities
+        if source == "*":
+            locations = [r for r in world.related(RelationType.LOCATION)
+                         if entities[r.ent2].type in _OCCUPANTS]
+        else:
+            locations = [r for member in self._members_of(world, source)
+                         for r in world.related(RelationType.LOCATION, ent2=member)]
+        for r in locations:
+            i = index.get(r.ent1)
+            if i is None:
+                continue
+            if value == "count":
+                x[i] += 1
+            elif value == "number":
+                x[i] += r.number
+            else:
+                entity = entities[r.ent2]
+                if value == "hp":
+                    amount = r.hp if entity.type == EntityType.SUMS else entity.hp
+                else:
+                    amount = entity.hp_max
+                x[i] += amount or 0
+        return x
+
+    def update(self, world: World) -> None:
+        """Recompute the aggregates if anything they read has changed (hp phase start)."""
+        if not self.specs or not (self._dirty or self._every_tick):
+            return
+        self.targets(world)
+        if self._adjacency is None:
+            self._adjacency = Adjacency(world)
+        adjacency = self._adjacency
+        vectors: dict[tuple[str, str], list[float]] = {}
+        products: dict[tuple, list[float]] = {}
+        self._sums = {}
+        for spec in self.specs:
+            key = (spec.source, spec.value)
+            if key not in vectors:
+                vectors[key] = self._vector(world, adjacency, spec.source, spec.value)
+            product = key + (spec.weight, spec.self_)
+            if product not in products:
+                products[product] = adjacency.multiply(
+                    vectors[key], spec.weight == "number", spec.self_)
+            self._sums[spec] = products[product]
+        self._dirty = False
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+
+    def aggregate(self, world: World, spec: Spec, envi_id: str) -> float:
+        """The spec's aggregate at an ENVI, as of the last update()."""
+        if spec not in self._sums:
+            self.update(world)
+        adjacency = self._adjacency
+        i = adjacency.index.get(envi_id) if adjacency is not None else None
+        return self._sums[spec][i] if i is not None else 0
+
+    def behaviors(self, world: World, entity_id: str, location_id: str | None) -> list[tuple[str, int]]:
+        """(name, rate) modifiers for entity_id standing at location_id."""
+        specs = self.targets(world).get(entity_id)
+        if not specs or location_id is None:
+            return []
+        result = []
+        for spec in specs:
+            rate = round(spec.rate * self.aggregate(world, spec, location_id))
+            if spec.cap is not None:
+                rate = max(-spec.cap, min(spec.cap, rate))
+            if rate:
+                result.append((spec.name, rate))
+        return result
+
+
+_neighbourhoods: "WeakKeyDictionary[World, Neighbourhood]" = WeakKeyDictionary()
+
+
+def neighbourhood_of(world: World) -> Neighbourhood:
+    """Return the world's Neighbourhood, creating it on first use."""
+    hood = _neighbourhoods.get(world)
+    if hood is None:
+        hood = _neighbourhoods[world] = Neighbourhood(world)
+    return hood
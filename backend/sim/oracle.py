@@ -0,0 +1,344 @@
+"""
+Differential oracle: the reference engine against the optimized one.
+
+Every optimization of the engine (indexes, sleeping entities, lazy stacks,
+batched brains, fast-forward) promises the same game as the plain rules in
+reference.py. The oracle checks the promise: both engines step their own copy
+of a world from the same random state, and after every tick (or every
+`step` ticks of advance() or run_events()) the full state is compared —
+
+    meta.tick, every entity's hp, every relation (id, type, ent1, ent2,
+    number, hp — LOCATION stacks included), meta.vars["triggers_fired"]
+
+Each engine keeps its own random state, so a divergence in how many numbers
+one of them draws shows up as a difference, not as noise in the other.
+
+A divergence is shrunk to a minimal failing world: entities (with the
+relations touching them) and then relations are dropped in halving chunks
+(ddmin) for as long as the smaller world still diverges. A drop that makes
+the world invalid counts as passing. The result is written as an ordinary
+world file, ready for World.load and a debugger.
+
+Worlds with remote or hook brains are skipped — their answers come from
+outside, not from the rules. run_events() matches the rules draw for draw only
+where nothing is drawn, so the events engine checks deterministic() copies of
+the worlds.
+
+Run:  python -m backend.sim.oracle --ticks 300 --seeds 3 --generated 20 --shrink /tmp/oracle
+      every file in worlds/ plus 20 generated worlds, 3 seeds each
+      python -m backend.sim.oracle worlds/nord.json --engine advance --step 25
+      python -m backend.sim.oracle --engine events --step 25
+      python -m backend.sim.oracle --streams      draws from meta.vars["rng"] streams
+"""
+
+import copy
+import random
+import sys
+from pathlib import Path
+
+from backend.core.entity import Entity, EntityType
+from backend.core.relation import Relation, RelationType
+from backend.core.world import World
+from backend.sim import reference
+from backend.sim.engine import tick
+from backend.sim.fastforward import advance
+from backend.sim.scheduler import run_events
+
+ENGINES = ("tick", "advance", "events")
+_CATEGORIES = ("Hot", "Cold", "Graveyards", "Humans", "Food", "Ghosts")
+
+
+# ── Generated worlds ─────────────────────────────────────────────────────────
+
+def random_world(seed: int, rooms: int = 20, chars: int = 30, stacks: int = 40,
+                 neighbourhood: bool = True) -> dict:
+    """A random world file (dict) that exercises every phase of the rules."""
+    rnd = random.Random(seed)
+    world = World(f"oracle-{seed}", "Generated by backend.sim.oracle")
+    ids = iter(range(1, 10**9))
+
+    def relate(*args, **kwargs) -> None:
+        try:
+            world.add_relation(Relation(next(ids), *args, **kwargs))
+        except ValueError:
+            pass   # containment, capacity, duplicates — just fewer relations
+
+    for category in _CATEGORIES:
+        world.add_entity(Entity(category, EntityType.UNIQUE, id=category))
+    relate(RelationType.BEHAVIOR, "Hot", "HEAT", 2)
+    relate(RelationType.BEHAVIOR, "Cold", "REST", -3)
+    relate(RelationType.BEHAVIOR, "Humans", "HUNGER", 1)
+    relate(RelationType.BEHAVIOR, "Food", "DECAY", 1)
+
+    for i in range(rooms):
+        world.add_entity(Entity(f"room{i}", EntityType.ENVI, id=f"E{i}",
+                                capacity=rnd.choice([None, None, 3])))
+        category = rnd.choice(["Hot", "Cold", None, None, "Graveyards" if i % 11 == 5 else None])
+        if category:
+            relate(RelationType.TYPE_OF, f"E{i}", category)
+    for i in range(rooms):
+        for j in rnd.sample(range(rooms), min(3, rooms)):
+            if j != i:
+                relate(RelationType.EDGE, f"E{i}", f"E{j}", rnd.randint(1, 3),
+                       one_way=rnd.random() < 0.2,
+                       deny="Ghosts" if rnd.random() < 0.2 else None)
+
+    kinds = max(1, stacks // 3)
+    for k in range(kinds):
+        world.add_entity(Entity(f"food{k}", EntityType.SUMS, id=f"F{k}",
+                                hp_max=rnd.choice([None, 20, 50]), capacity=rnd.choice([None, 10])))
+        relate(RelationType.TYPE_OF, f"F{k}", "Food")
+
+    for i in range(chars):
+        world.add_entity(Entity(f"char{i}", EntityType.CHAR, id=f"C{i}", hp=rnd.randint(0, 120),
+                                hp_max=rnd.choice([None, 100]),
+                                control=rnd.choice([None, None, "rand", "survival"])))
+        relate(RelationType.LOCATION, f"E{rnd.randrange(rooms)}", f"C{i}")
+        if rnd.random() < 0.7:
+            relate(RelationType.TYPE_OF, f"C{i}", rnd.choice(["Humans", "Ghosts"]))
+        if rnd.random() < 0.3:
+            relate(RelationType.TRIGGER, f"C{i}", "Food", rnd.choice([-1, 0, 30, 60]),
+                   lambda_=rnd.choice([0, 0.3, 5]))
+
+    for _ in range(stacks):
+        holder = rnd.choice([f"E{rnd.randrange(rooms)}", f"C{rnd.randrange(chars)}"] if chars else [f"E{rnd.randrange(rooms)}"])
+        relate(RelationType.LOCATION, holder, f"F{rnd.randrange(kinds)}",
+               rnd.randint(1, 5), hp=rnd.randint(0, 50))
+
+    produced = set()
+    for _ in range(4):
+        pair = (rnd.choice([f"E{rnd.randrange(rooms)}", "Cold"]), f"F{rnd.randrange(kinds)}")
+        if pair not in produced:
+            produced.add(pair)
+            relate(RelationType.PRODUCE, *pair, rnd.randint(1, 4), lambda_=rnd.choice([0, 0.5]))
+
+    if neighbourhood and rnd.random() < 0.5:
+        world.meta.vars["neighbourhood"] = [
+            {"name": "CROWDING", "target": "Humans", "source": "*", "self": True,
+             "rate": 0.5, "cap": 4},
+            {"name": "COMFORT", "target": "Humans", "source": "Food", "value": "number",
+             "weight": "number", "rate": -0.25},
+        ]
+    return world.to_dict()
+
+
+def deterministic(data: dict) -> dict:
+    """The world file with every random draw taken out: no lambdas, no
+    type-based producers, no ambient TRIGGERs, survival instead of rand."""
+    kinds = {e["id"]: e["type"] for e in data["entities"]}
+    relations = []
+    for r in data["relations"]:
+        if r["type"] == "PRODUCE" and kinds.get(r["ent1"]) in (None, "UNIQUE"):
+            continue
+        if r["type"] == "TRIGGER" and r.get("number") == 0:
+            continue
+        relations.append({k: v for k, v in r.items() if k != "lambda"})
+    entities = [{**e, "control": "survival"} if e.get("control") == "rand" else e
+                for e in data["entities"]]
+    return {**data, "entities": entities, "relations": relations}
+
+
+# ── Comparison ───────────────────────────────────────────────────────────────
+
+def state(world: World) -> dict:
+    """Everything the oracle compares, keyed for readable differences."""
+    snapshot = {"tick": world.meta.tick,
+                "triggers_fired": sorted(world.meta.vars.get("triggers_fired", []))}
+    for entity in world.entities.values():
+        snapshot[f"hp {entity.id}"] = entity.hp
+    for r in world.relations.values():
+        snapshot[f"relation {r.id}"] = (r.type.value, r.ent1, r.ent2, r.number, r.hp)
+    return snapshot
+
+
+def differences(expected: dict, actual: dict, limit: int = 10) -> list[str]:
+    """Human-readable differences between two state() snapshots, reference first."""
+    found = []
+    for key in sorted(expected.keys() | actual.keys()):
+        a, b = expected.get(key, "—"), actual.get(key, "—")
+        if a != b:
+            found.append(f"{key}: reference {a}, engine {b}")
+            if len(found) == limit:
+                break
+    return found
+
+
+def _external(data: dict) -> bool:
+    return any(str(e.get("control") or "").startswith(("remote:", "hook:")) for e in data["entities"])
+
+
+def diverge(data: dict, ticks: int, seed: int, engine_name: str = "tick", step: int = 1) -> dict | None:
+    """Run both engines on a world file (dict); the first divergence, or None.
+
+    Raises ValueError if the world file itself is invalid.
+    """
+    if engine_name not in ENGINES:
+        raise ValueError(f"Unknown engine {engine_name!r}; expected one of {ENGINES}")
+    expected_world = World.from_dict(copy.deepcopy(data))
+    actual_world = World.from_dict(copy.deepcopy(data))
+    step = 1 if engine_name == "tick" else step
+
+    saved = random.getstate()
+    random.seed(seed)
+    expected_rng = actual_rng = random.getstate()
+    try:
+        done = 0
+        while done < ticks:
+            n = min(step, ticks - done)
+            random.setstate(expected_rng)
+            for _ in range(n):
+                reference.tick(expected_world)
+            expected_rng = random.getstate()
+            random.setstate(actual_rng)
+            if engine_name == "tick":
+                tick(actual_world)
+            elif engine_name == "advance":
+                advance(actual_world, n)
+            else:
+                run_events(actual_world, n)
+            actual_rng = random.getstate()
+            done += n
+            expected, actual = state(expected_world), state(actual_world)
+            if expected != actual or expected_rng != actual_rng:
+                found = differences(expected, actual)
+                if expected_rng != actual_rng:
+                    found.append("random state: the engines drew different amounts")
+                return {"tick": expected_world.meta.tick, "differences": found}
+    finally:
+        random.setstate(saved)
+    return None
+
+
+# ── Shrinking ────────────────────────────────────────────────────────────────
+
+def _without(data: dict, entity_ids: set[str] = frozenset(), relation_ids: set[int] = frozenset()) -> dict:
+    smaller = dict(data)
+    smaller["entities"] = [e for e in data["entities"] if e["id"] not in entity_ids]
+    smaller["relations"] = [r for r in data["relations"]
+                            if r["id"] not in relation_ids
+                            and r["ent1"] not in entity_ids and r["ent2"] not in entity_ids]
+    return smaller
+
+
+def _ddmin(data: dict, items: list, drop, fails) -> dict:
+    """Drop chunks of items while the world still fails, halving the chunk size."""
+    chunk = max(1, len(items) // 2)
+    while items:
+        i, progressed = 0, False
+        while i < len(items):
+            candidate = drop(data, set(items[i:i + chunk]))
+            if fails(candidate):
+                data, items, progressed = candidate, items[:i] + items[i + chunk:], True
+            else:
+                i += chunk
+        if chunk == 1 and not progressed:
+            break
+        chunk = max(1, chunk // 2)
+    return data
+
+
+def shrink(data: dict, ticks: int, seed: int, engine_name: str = "tick", step: int = 1) -> dict:
+    """The smallest world (by entities, then relations) that still diverges."""
+    def fails(candidate: dict) -> bool:
+        try:
+            return diverge(candidate, ticks, seed, engine_name, step) is not None
+        except ValueError:
+            return False
+
+    while True:
+        size = (len(data["entities"]), len(data["relations"]))
+        data = _ddmin(data, [e["id"] for e in data["entities"]],
+                      lambda d, ids: _without(d, entity_ids=ids), fails)
+        data = _ddmin(data, [r["id"] for r in data["relations"]],
+                      lambda d, ids: _without(d, relation_ids=ids), fails)
+        if (len(data["entities"]), len(data["relations"])) == size:
+            return data
+
+
+# ── Runner ───────────────────────────────────────────────────────────────────
+
+def _worlds(paths: list[Path], generated: int) -> list[tuple[str, dict]]:
+    import json
+
+    worlds = [(str(path), json.loads(path.read_text(encoding="utf-8"))) for path in paths]
+    worlds += [(f"generated:{seed}", random_world(seed)) for seed in range(generated)]
+    return worlds
+
+
+def _with_streams(data: dict, seed: int) -> dict:
+    """The world file with meta.vars["rng"] seeded (backend/sim/rng.py)."""
+    meta = dict(data.get("meta", {}))
+    meta["vars"] = {**meta.get("vars", {}), "rng": {"seed": seed}}
+    return {**data, "meta": meta}
+
+
+def run(paths: list[Path], ticks: int, seeds: int, generated: int, engine: str,
+        step: int, shrink_dir: Path | None, streams: bool = False) -> dict:
+    """Check every world for every seed; shrink and save the divergences.
+
+    streams: draw from per-site streams (meta.vars["rng"] seeded with the run's seed).
+    engine "events" runs the deterministic() copy of every world.
+    """
+    checked = skipped = 0
+    failures = []
+    for name, data in _worlds(paths, generated):
+        if _external(data):
+            skipped += 1
+            continue
+        for seed in range(seeds):
+            checked += 1
+            if engine == "events":
+                data = deterministic(data)
+            if streams:
+                data = _with_streams(data, seed)
+            found = diverge(data, ticks, seed, engine, step)
+            if found is None:
+                continue
+            failure = f"{name} seed {seed} tick {found['tick']}: " + "; ".join(found["differences"][:3])
+            if shrink_dir is not None:
+                smaller = shrink(data, ticks, seed, engine, step)
+                shrink_dir.mkdir(parents=True, exist_ok=True)
+                target = shrink_dir / f"{Path(name).stem.replace(':', '-')}.seed{seed}.json"
+                World.from_dict(smaller).save(target)
+                failure += f" → {target} ({len(smaller['entities'])} entities, {len(smaller['relations'])} relations)"
+            failures.append(failure)
+            break   # one divergence per world is enough to go on
+    return {
+        "worlds": len(paths) + generated,
+        "skipped": skipped,
+        "runs": checked,
+        "engine": engine if engine == "tick" else f"{engine} (step {step})",
+        "draws": "streams" if streams else "global random",
+        "divergences": len(failures),
+        **{f"divergence {i + 1}": failure for i, failure in enumerate(failures)},
+    }
+
+
+def parse_args() -> dict:
+    opts = {"paths": [], "ticks": 300, "seeds": 3, "generated": 10, "engine": "tick",
+            "step": 25, "shrink_dir": None, "streams": False}
+    casts = {"--ticks": int, "--seeds": int, "--generated": int, "--engine": str,
+             "--step": int, "--shrink": Path}
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in casts and i + 1 < len(args):
+            key = "shrink_dir" if args[i] == "--shrink" else args[i][2:]
+            opts[key] = casts[args[i]](args[i + 1])
+            i += 2
+        elif args[i] == "--streams":
+            opts["streams"] = True
+            i += 1
+        else:
+            opts["paths"].append(Path(args[i]))
+            i += 1
+    if not opts["paths"]:
+        opts["paths"] = sorted(Path("worlds").glob("*.json"))
+    return opts
+
+
+if __name__ == "__main__":
+    from backend.sim.oracle import parse_args, run   # the module's own copy, not __main__'s
+
+    for key, value in run(**parse_args()).items():
+        print(f"{key:>14}: {value}")
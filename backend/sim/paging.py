@@ -0,0 +1,561 @@
+"""
+Lazy region paging: only the ENVI subtrees near active CHARs stay in memory.
+
+World.load() materializes every entity and relation, although at any moment
+only the surroundings of the controlled CHARs matter. A paged world keeps the
+rest on disk:
+
+  core      always resident — every entity outside the ENVI trees: archetypes
+            (TYPE_OF targets, BEHAVIOR sources), SUMS kinds, dialogue lines,
+            unplaced entities — with the relations among them, plus meta
+  regions   one per root ENVI: its LOCATION subtree (child ENVIs, CHARs,
+            stacks, items) and every relation touching it, one file each;
+            a relation between two regions (an EDGE) is in both files
+  skeleton  which ENVI belongs to which region and the EDGE graph between
+            ENVIs, for deciding what is near — ids only
+
+    store = build_store(World.load("worlds/big.json"), "state/big/")
+    paged = PagedWorld(store, hops=2, linger=50)
+    for _ in range(n):
+        log = paged.tick()           # engine tick, then page in / out
+    paged.save()                     # every region back to disk, core too
+    paged.stats()
+
+After every tick the regions within `hops` EDGEs of an anchor are paged in —
+the anchors are the CHARs with a brain (engine.has_brain), or the ids given.
+A region nobody has needed for `linger` ticks is written back and dropped.
+The engine sees an ordinary World throughout: paging goes through the World
+API (add_entity, insert_relation, remove), so its indexes and caches follow
+the change feed as they do for any edit. Regions come back in id order, but
+after the rest of the world: the entity and relation order is not the one
+the whole world would have. With streams the engine takes its order-sensitive
+lists by id (backend/sim/rng.py), and a paged world with every region
+resident runs state for state like the plain one.
+
+A region paged out at tick t0 and paged in at t1 is caught up first: it runs
+t1 − t0 ticks in isolation — the region and the archetypes it refers to,
+fast-forwarded with advance() (at most max_catch_up ticks) — and comes back
+as it would have become on its own. What crosses a region border does not
+happen while it is out: no neighbourhood aggregate from outside, no
+type-based PRODUCE into it, no walker through it. EDGEs between regions are
+paged in once both ends are resident, so the edge of the loaded area is
+closed to walkers; an EDGE whose other end is out is held in memory only
+until its own region goes out too. With meta.vars["rng"]
+(backend/sim/rng.py) a caught-up region draws exactly what it would have
+drawn resident; with the global random module the catch-up draws come out of
+the main stream.
+
+Relation ids stay unique within the resident world: PRODUCE numbers a new
+stack after the resident relations, so it may take the id of one paged out.
+When both meet again the stack is renumbered — PRODUCE and TRIGGER ids key
+the random streams and triggers_fired and keep theirs.
+
+Run:  python -m backend.sim.paging worlds/chess.json --ticks 500 --hops 1 \\
+          --linger 20 --anchors D4,E5
+      the same n ticks on the whole world and paged, with paging stats
+"""
+
+import copy
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+
+from backend.core.entity import EntityType
+from backend.core.relation import Relation, RelationType
+from backend.core.world import World, _dict_to_entity, _dict_to_relation, _entity_to_dict, _relation_to_dict
+from backend.sim.engine import has_brain, tick
+from backend.sim.fastforward import advance
+
+CORE = "core.json"
+MAX_CATCH_UP = 100_000   # ticks
+
+
+def _write(path: Path, data: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)   # a crash mid-write leaves the previous file
+
+
+def _region_path(store: Path, key: int) -> Path:
+    return store / f"region.{key}.json"
+
+
+def _subtree(world: World, root_id: str) -> list[str]:
+    """root_id and everything located in it, parents before children.
+
+    SUMS kinds are left out: a stack is a LOCATION relation, the kind itself
+    belongs to the core.
+    """
+    order, frontier = [root_id], deque([root_id])
+    while frontier:
+        for child, _ in world.children(frontier.popleft()):
+            if child.type == EntityType.SUMS:
+                continue
+            order.append(child.id)
+            frontier.append(child.id)
+    return order
+
+
+def _root(world: World, entity_id: str) -> str:
+    """The outermost container of entity_id (itself if it is not located anywhere)."""
+    seen = {entity_id}
+    parent = world.location_of(entity_id)
+    while parent is not None and parent.id not in seen:
+        seen.add(parent.id)
+        entity_id = parent.id
+        parent = world.location_of(entity_id)
+    return entity_id
+
+
+# ── Store ────────────────────────────────────────────────────────────────────
+
+def build_store(world: World, store: str | Path, anchors: list[str] | None = None) -> Path:
+    """Write a world as a paged store: core.json plus one file per root ENVI subtree.
+
+    The regions holding an anchor (default: the CHARs with a brain) are the
+    ones PagedWorld pages in first.
+    """
+    store = Path(store)
+    store.mkdir(parents=True, exist_ok=True)
+    roots = [e.id for e in world.entities.values()
+             if e.type == EntityType.ENVI and world.location_of(e.id) is None]
+    owner: dict[str, int] = {}
+    members: list[list[str]] = []
+    for key, root_id in enumerate(roots):
+        members.append(_subtree(world, root_id))
+        owner.update((entity_id, key) for entity_id in members[key])
+
+    region_relations: list[list[dict]] = [[] for _ in roots]
+    borders: list[list[dict]] = [[] for _ in roots]
+    core_relations = []
+    for r in world.relations.values():
+        keys = sorted({owner[end] for end in (r.ent1, r.ent2) if end in owner})
+        if not keys:
+            core_relations.append(_relation_to_dict(r))
+        elif len(keys) == 1:
+            region_relations[keys[0]].append(_relation_to_dict(r))
+        else:
+            for key in keys:
+                borders[key].append({"regions": keys, "relation": _relation_to_dict(r)})
+
+    fired = world.meta.vars.get("triggers_fired", [])
+    for key, ids in enumerate(members):
+        triggers = {d["id"] for d in region_relations[key] if d["type"] == RelationType.TRIGGER.value}
+        _write(_region_path(store, key), {
+            "tick": world.meta.tick,
+            "entities": [_entity_to_dict(world.entities[entity_id]) for entity_id in ids],
+            "relations": region_relations[key],
+            "fired": [rid for rid in fired if rid in triggers],
+            "borders": borders[key],
+        })
+
+    header = world.to_dict()
+    header["entities"] = [_entity_to_dict(e) for e in world.entities.values() if e.id not in owner]
+    header["relations"] = core_relations
+    region_ids = {d["id"] for relations in region_relations for d in relations}
+    if fired:
+        header["meta"]["vars"] = {**header["meta"]["vars"],
+                                  "triggers_fired": [rid for rid in fired if rid not in region_ids]}
+    if anchors is None:
+        anchors = [e.id for e in world.entities.values() if has_brain(e)]
+    envis = {entity_id: owner[entity_id] for entity_id in owner
+             if world.entities[entity_id].type == EntityType.ENVI}
+    _write(store / CORE, {
+        "world": header,
+        "regions": roots,
+        "envis": envis,
+        "edges": sorted({(r.ent1, r.ent2) for r in world.related(RelationType.EDGE)
+                         if r.ent1 in envis and r.ent2 in envis and r.ent1 != r.ent2}),
+        "homes": {entity_id: key for entity_id, key in owner.items()
+                  if world.entities[entity_id].type == EntityType.CHAR},
+        "active": sorted({owner[a] for a in anchors if a in owner}),
+        "sizes": [[len(ids), len(relations)] for ids, relations in zip(members, region_relations)],
+        "high": max(world.relations, default=0),
+    })
+    return store
+
+
+# ── Paged world ──────────────────────────────────────────────────────────────
+
+class PagedWorld:
+    """A world whose regions are paged in around the anchors; see the module docstring."""
+
+    def __init__(self, store: str | Path, hops: int = 2, linger: int = 50,
+                 anchors: list[str] | None = None, max_catch_up: int = MAX_CATCH_UP):
+        if hops < 1:
+            raise ValueError("hops must be >= 1, or anchors would walk off the loaded area")
+        self.store = Path(store)
+        self.hops = hops
+        self.linger = linger
+        self.anchors = anchors
+        self.max_catch_up = max_catch_up
+        core = json.loads((self.store / CORE).read_text(encoding="utf-8"))
+        self.world = World.from_dict(core["world"])
+        self.core = set(self.world.entities)
+        self.roots: list[str] = core["regions"]
+        self.root_region = {root_id: key for key, root_id in enumerate(self.roots)}
+        self.envi_region: dict[str, int] = core["envis"]
+        self.adjacency: dict[str, list[str]] = {}
+        for a, b in core["edges"]:
+            self.adjacency.setdefault(a, []).append(b)
+            self.adjacency.setdefault(b, []).append(a)
+        # resident region → border relations to regions that are out: id → (regions, relation)
+        self.pending: dict[int, dict[int, tuple[list[int], dict]]] = {}
+        self.homes: dict[str, int] = core["homes"]      # CHAR id → region, CHARs paged out
+        self.high = core["high"]                        # highest relation id handed out
+        self.resident: dict[int, int] = {}              # region → last tick it was needed
+        self.sizes = [tuple(size) for size in core["sizes"]]   # region → (entities, relations) on disk
+        self._wanted: tuple[frozenset[str], set[int]] | None = None
+        self.page_ins = self.page_outs = self.caught_up = 0
+        for key in core["active"]:
+            self.page_in(key)
+        self.sync()
+
+    # ── Regions ─────────────────────────────────────────────────────────────
+
+    def region_of(self, entity_id: str) -> int | None:
+        """Region of a resident entity, or of a paged-out CHAR; None for core."""
+        entity = self.world.entities.get(entity_id)
+        if entity is not None:
+            if entity.type == EntityType.SUMS:
+                return None
+            return self.root_region.get(_root(self.world, entity_id))
+        return self.homes.get(entity_id)
+
+    def _insert(self, relation: Relation, remap: dict[int, int]) -> None:
+        """Insert a paged-in relation; on an id clash the stack (LOCATION) gets a new id.
+
+        Stream keys (backend/sim/rng.py) are PRODUCE and TRIGGER ids, so those
+        keep theirs; a clash always involves a stack numbered while the other
+        relation was paged out.
+        """
+        world = self.world
+        taken = world.relations.get(relation.id)
+        if taken is not None:
+            new_id = max(self.high, max(world.relations)) + 1
+            if taken.type == RelationType.LOCATION and relation.type != RelationType.LOCATION:
+                world.delete_relation(taken.id)
+                taken.settle()   # its decay anchor is queued under the old id
+                taken.id = new_id
+                world.insert_relation(taken)
+            else:
+                remap[relation.id] = relation.id = new_id
+        self.high = max(self.high, relation.id)
+        world.insert_relation(relation)
+
+    def _capture(self, key: int) -> tuple[dict, list[tuple[list[int], dict]], list[str]]:
+        """A resident region as its file, its resident border relations, its entity ids."""
+        world = self.world
+        ids = _subtree(world, self.roots[key])
+        members = set(ids)
+        relations: dict[int, dict] = {}
+        borders: dict[int, tuple[list[int], dict]] = {}
+        for entity_id in ids:
+            for type in RelationType:
+                for r in world.touching(type, entity_id):
+                    if r.id in relations or r.id in borders:
+                        continue
+                    keys = {key}
+                    for end in (r.ent1, r.ent2):
+                        if end not in members and end in world.entities:
+                            other = self.region_of(end)
+                            if other is not None:
+                                keys.add(other)
+                    if len(keys) == 1:
+                        relations[r.id] = _relation_to_dict(r)
+                    else:
+                        borders[r.id] = (sorted(keys), _relation_to_dict(r))
+        relations = [relations[rid] for rid in sorted(relations)]
+        triggers = {d["id"] for d in relations if d["type"] == RelationType.TRIGGER.value}
+        data = {
+            "tick": world.meta.tick,
+            "entities": [_entity_to_dict(world.entities[entity_id]) for entity_id in ids],
+            "relations": relations,
+            "fired": [rid for rid in world.meta.vars.get("triggers_fired", []) if rid in triggers],
+            "borders": [{"regions": regions, "relation": relation}
+                        for regions, relation in [*borders.values(), *self.pending.get(key, {}).values()]],
+        }
+        return data, list(borders.values()), ids
+
+    def page_out(self, key: int) -> None:
+        """Write a resident region to its file and drop it from the world."""
+        world = self.world
+        data, borders, ids = self._capture(key)
+        _write(_region_path(self.store, key), data)
+        for regions, relation in borders:   # the regions on the other side keep them pending
+            for other in regions:
+                if other != key:
+                    self.pending.setdefault(other, {})[relation["id"]] = (regions, relation)
+        self.pending.pop(key, None)
+        fired = world.meta.vars.get("triggers_fired")
+        if fired and data["fired"]:
+            gone = set(data["fired"])
+            fired[:] = [rid for rid in fired if rid not in gone]
+        for entity in data["entities"]:
+            if entity["type"] == EntityType.CHAR.value:
+                self.homes[entity["id"]] = key
+        for entity_id in reversed(ids):   # children first: no one becomes a root on the way
+            world.remove(entity_id)
+        del self.resident[key]
+        self.sizes[key] = (len(data["entities"]), len(data["relations"]))
+        self.page_outs += 1
+
+    def page_in(self, key: int) -> None:
+        """Load a region, caught up to the world's tick, and the borders it completes."""
+        if key in self.resident:
+            return
+        world = self.world
+        data = json.loads(_region_path(self.store, key).read_text(encoding="utf-8"))
+        elapsed = world.meta.tick - data["tick"]
+        if elapsed > 0:
+            data = self._catch_up(key, data, elapsed)
+        for entity in data["entities"]:
+            world.add_entity(_dict_to_entity(entity))
+            self.homes.pop(entity["id"], None)
+        remap: dict[int, int] = {}
+        for relation in sorted(data["relations"], key=lambda d: d["id"]):
+            self._insert(_dict_to_relation(relation), remap)
+        if data["fired"]:
+            world.meta.vars.setdefault("triggers_fired", []).extend(remap.get(rid, rid) for rid in data["fired"])
+        self.resident[key] = world.meta.tick
+        pending = self.pending.setdefault(key, {})
+        for border in sorted(data["borders"], key=lambda d: d["relation"]["id"]):
+            regions, relation = border["regions"], border["relation"]
+            if not all(other in self.resident for other in regions):
+                pending[relation["id"]] = (regions, relation)
+                continue
+            for other in regions:   # the side that stayed in has the newer copy
+                newer = self.pending.get(other, {}).pop(relation["id"], None) if other != key else None
+                if newer is not None:
+                    relation = newer[1]
+            self._insert(_dict_to_relation(relation), remap)
+        self.page_ins += 1
+
+    def _archetypes(self, relations: list[dict]) -> tuple[list[dict], list[dict]]:
+        """The core entities a region refers to, up their TYPE_OF chains, with their
+        TYPE_OF and BEHAVIOR relations — what its rules read besides the region."""
+        world = self.world
+        needed: dict[str, None] = {}
+        frontier = [end for d in relations for end in (d["ent1"], d.get("ent2")) if end in self.core]
+        while frontier:
+            entity_id = frontier.pop()
+            if entity_id in needed or entity_id not in world.entities:
+                continue
+            needed[entity_id] = None
+            frontier.extend(r.ent2 for r in world.related(RelationType.TYPE_OF, ent1=entity_id))
+        found = []
+        for entity_id in needed:
+            for type in (RelationType.TYPE_OF, RelationType.BEHAVIOR):
+                found += [r for r in world.related(type, ent1=entity_id)
+                          if r.ent2 in needed or r.ent2 not in world.entities]
+        found.sort(key=lambda r: r.id)
+        return ([_entity_to_dict(world.entities[entity_id]) for entity_id in needed],
+                [_relation_to_dict(r) for r in found])
+
+    def _catch_up(self, key: int, data: dict, elapsed: int) -> dict:
+        """Run a paged-out region alone (with its archetypes) for the ticks it missed."""
+        world = self.world
+        entities, relations = self._archetypes(data["relations"])
+        vars = copy.deepcopy(world.meta.vars)
+        vars["triggers_fired"] = list(data["fired"])
+        sub = World.from_dict({
+            "name": world.name,
+            "meta": {"tick": data["tick"], "vars": vars},
+            "entities": entities + data["entities"],
+            "relations": relations + data["relations"],
+        })
+        ticks = min(elapsed, self.max_catch_up)
+        advance(sub, ticks)
+        self.caught_up += ticks
+
+        members = {entity["id"] for entity in data["entities"]}
+        ids = [entity["id"] for entity in data["entities"]]
+        ids += [entity_id for entity_id in _subtree(sub, self.roots[key]) if entity_id not in members]
+        members.update(ids)
+        relations = [_relation_to_dict(r) for r in sub.relations.values()
+                     if r.ent1 in members or r.ent2 in members]
+        triggers = {d["id"] for d in relations if d["type"] == RelationType.TRIGGER.value}
+        return {
+            "tick": sub.meta.tick,
+            "entities": [_entity_to_dict(sub.entities[entity_id]) for entity_id in ids if entity_id in sub.entities],
+            "relations": relations,
+            "fired": [rid for rid in sub.meta.vars.get("triggers_fired", []) if rid in triggers],
+            "borders": data["borders"],
+        }
+
+    # ── Residency ───────────────────────────────────────────────────────────
+
+    def _starts(self) -> frozenset[str]:
+        """ENVIs the anchors stand in (nearest ENVI at or above each)."""
+        world = self.world
+        if self.anchors is None:
+            anchors = [e.id for e in world.entities.values() if has_brain(e)]
+        else:
+            anchors = self.anchors
+        starts = set()
+        for anchor in anchors:
+            if anchor not in world.entities:
+                key = self.homes.get(anchor)
+                if key is not None:
+                    starts.add(self.roots[key])
+                continue
+            current, seen = world.entities[anchor], set()
+            while current is not None and current.id not in seen and current.type != EntityType.ENVI:
+                seen.add(current.id)
+                current = world.location_of(current.id)
+            if current is not None and current.type == EntityType.ENVI:
+                starts.add(current.id)
+        return frozenset(starts)
+
+    def wanted(self) -> set[int]:
+        """Regions with an ENVI within `hops` EDGEs of an anchor."""
+        starts = self._starts()
+        if self._wanted is not None and self._wanted[0] == starts:
+            return self._wanted[1]
+        seen = set(starts)
+        frontier = deque((envi_id, 0) for envi_id in starts)
+        while frontier:
+            current, depth = frontier.popleft()
+            if depth >= self.hops:
+                continue
+            for other in self.adjacency.get(current, ()):
+                if other not in seen:
+                    seen.add(other)
+                    frontier.append((other, depth + 1))
+        regions = {self.envi_region[envi_id] for envi_id in seen if envi_id in self.envi_region}
+        self._wanted = (starts, regions)
+        return regions
+
+    def sync(self) -> None:
+        """Page in what the anchors need now, page out what nobody needed for `linger` ticks."""
+        now = self.world.meta.tick
+        wanted = self.wanted()
+        for key in sorted(wanted):
+            self.page_in(key)
+            self.resident[key] = now
+        for key, needed in list(self.resident.items()):
+            if key not in wanted and now - needed >= self.linger:
+                self.page_out(key)
+
+    def tick(self) -> list[str]:
+        """One engine tick on the resident world, then sync()."""
+        log = tick(self.world)
+        self.sync()
+        return log
+
+    def materialize(self) -> World:
+        """Page in every region (caught up) and return the now complete world."""
+        for key in range(len(self.roots)):
+            self.page_in(key)
+            self.resident[key] = self.world.meta.tick
+        return self.world
+
+    def save(self) -> None:
+        """Write every resident region and the core, so the store holds the whole world."""
+        world = self.world
+        region_fired = set()
+        for key in self.resident:
+            data, _, _ = self._capture(key)
+            _write(_region_path(self.store, key), data)
+            self.sizes[key] = (len(data["entities"]), len(data["relations"]))
+            region_fired.update(data["fired"])
+        header = world.to_dict()
+        header["entities"] = [_entity_to_dict(world.entities[entity_id]) for entity_id in self.core
+                              if entity_id in world.entities]
+        header["relations"] = [
+            _relation_to_dict(r) for r in world.relations.values()
+            if all(end is None or end in self.core or end not in world.entities for end in (r.ent1, r.ent2))
+        ]
+        if "triggers_fired" in header["meta"].get("vars", {}):
+            header["meta"]["vars"] = {**header["meta"]["vars"], "triggers_fired": [
+                rid for rid in world.meta.vars["triggers_fired"] if rid not in region_fired]}
+        homes = dict(self.homes)
+        for key in self.resident:
+            homes.update((entity_id, key) for entity_id in _subtree(world, self.roots[key])
+                         if world.entities[entity_id].type == EntityType.CHAR)
+        _write(self.store / CORE, {
+            "world": header,
+            "regions": self.roots,
+            "envis": self.envi_region,
+            "edges": sorted({tuple(sorted((a, b))) for a, others in self.adjacency.items() for b in others}),
+            "homes": homes,
+            "active": sorted(self.resident),
+            "sizes": [list(size) for size in self.sizes],
+            "high": max(self.high, max(world.relations, default=0)),
+        })
+
+    # ── Metrics ─────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        stored = [size for key, size in enumerate(self.sizes) if key not in self.resident]
+        stored_entities = sum(entities for entities, _ in stored)
+        stored_relations = sum(relations for _, relations in stored)
+        return {
+            "regions": len(self.roots),
+            "resident_regions": len(self.resident),
+            "resident_entities": len(self.world.entities),
+            "resident_relations": len(self.world.relations),
+            "paged_out_entities": stored_entities,
+            "paged_out_relations": stored_relations,
+            "pending_borders": sum(len(pending) for pending in self.pending.values()),
+            "page_ins": self.page_ins,
+            "page_outs": self.page_outs,
+            "catch_up_ticks": self.caught_up,
+        }
+
+
+def run(path: Path, ticks: int, hops: int, linger: int, anchors: list[str] | None, seed: int) -> dict:
+    """Time n ticks of the whole world against the same n ticks paged."""
+    world = World.load(path)
+    random.seed(seed)
+    started = time.perf_counter()
+    for _ in range(ticks):
+        tick(world)
+    plain = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = build_store(World.load(path), tmp, anchors)
+        random.seed(seed)
+        started = time.perf_counter()
+        paged = PagedWorld(store, hops, linger, anchors)
+        resident = 0
+        for _ in range(ticks):
+            paged.tick()
+            resident += len(paged.world.entities)
+        elapsed = time.perf_counter() - started
+        paged.save()
+        return {
+            "ticks": ticks,
+            "tick_seconds": round(plain, 3),
+            "paged_seconds": round(elapsed, 3),
+            "world_entities": len(world.entities),
+            "mean_resident": round(resident / ticks, 1) if ticks else 0,
+            **paged.stats(),
+        }
+
+
+def parse_args() -> dict:
+    opts = {"path": Path("worlds/chess.json"), "ticks": 500, "hops": 2, "linger": 50,
+            "anchors": None, "seed": 1}
+    casts = {"--ticks": int, "--hops": int, "--linger": int,
+             "--anchors": lambda text: [a for a in text.split(",") if a], "--seed": int}
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in casts and i + 1 < len(args):
+            opts[args[i][2:]] = casts[args[i]](args[i + 1])
+            i += 2
+        else:
+            opts["path"] = Path(args[i])
+            i += 1
+    return opts
+
+
+if __name__ == "__main__":
+    for key, value in run(**parse_args()).items():
+        print(f"{key:>20}: {value}")
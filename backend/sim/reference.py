@@ -0,0 +1,627 @@
+"""
+Reference engine: the game rules of tick(), written the plain way.
+
+backend/sim/engine.py has grown indexes, caches, sleeping entities, lazy
+stack decay, batched brains and phase extension points. Each of those must
+leave the rules alone: from the same world and random state, tick() has to
+end in the same state as this module's tick(). backend/sim/oracle.py checks
+that, tick by tick.
+
+This module is the pre-optimization engine (backend/sim/engine.py as of the
+baseline commit), kept as it was: full scans over world.entities and
+world.relations, in the order the rules are stated. Two mechanical changes
+only — worlds are changed through the World API (set_hp, set_stack,
+insert_relation, delete_relation, move) so a world ticked here is an
+ordinary World afterwards, and draws go through rng_for() so the oracle can
+give each engine its own random state.
+
+Rules added since, each marked where it is applied:
+
+  tick       meta.tick is advanced at the start of every tick
+  remote     control "remote:<url>" / "hook:<name>" CHARs: the survival
+             brain, as the engine falls back to when no answer arrives
+             (external answers are not rules)
+  hood       neighbourhood aggregates (meta.vars["neighbourhood"]) as a
+             fifth BEHAVIOR source for entities
+  streams    with meta.vars["rng"] every draw site has its own stream, and
+             lists whose order decides the outcome are taken by id
+
+Frozen: change this module only when a rule changes, in the same commit as
+the engine, and add the rule to the list above. An optimization of the
+engine never touches it. Not covered: package hooks and log wording
+(dialogue templates, coalesced lines).
+"""
+
+import math
+from dataclasses import dataclass
+
+from backend.core.world import World
+from backend.core.entity import Entity, EntityType
+from backend.core.relation import Relation, RelationType
+from backend.sim.rng import rng_for, streams_of
+
+
+@dataclass
+class Intent:
+    actor_id: str
+    action: str
+    target_id: str | None = None
+
+
+def _by_id(world: World, items: list, key=lambda x: x.id) -> list:
+    """[streams] Items whose order decides the outcome: by id with streams, as found otherwise."""
+    return sorted(items, key=key) if streams_of(world) is not None else items
+
+
+def _poisson(lam: float, max_yield: int, rand) -> int:
+    """Draw a sample from Poisson(lam), capped at max_yield. Uses Knuth's algorithm."""
+    L = math.exp(-lam)
+    k, p = 0, 1.0
+    while p > L:
+        k += 1
+        p *= rand()
+    return min(k - 1, max_yield)
+
+
+def _process_produce(world: World) -> list[str]:
+    """Apply all PRODUCE relations (see engine._process_produce)."""
+    log: list[str] = []
+    produce_rels = _by_id(world, [r for r in world.relations.values() if r.type == RelationType.PRODUCE])
+    for r in produce_rels:
+        if r.lambda_ > 0:
+            amount = _poisson(r.lambda_, r.number, rng_for(world, "produce", r.id).random)
+        else:
+            amount = r.number
+        if amount == 0:
+            continue
+
+        item = world.get(r.ent2)
+
+        # Resolve producer: direct entity or type-based (pick random empty ENVI).
+        # UNIQUE entities are archetypes/type-names — treat them as type-based producers.
+        producer = world.get(r.ent1)
+        if producer is None or producer.type == EntityType.UNIQUE:
+            # Type-based: find all ENVI entities with TYPE_OF(x, r.ent1).
+            candidates = [
+                world.get(rel.ent1) for rel in world.relations.values()
+                if rel.type == RelationType.TYPE_OF and rel.ent2 == r.ent1
+                and world.get(rel.ent1) is not None
+                and world.get(rel.ent1).type == EntityType.ENVI
+            ]
+            # Exclude ENVIs that already hold a CHAR child (occupied squares).
+            occupied = {
+                rel.ent1 for rel in world.relations.values()
+                if rel.type == RelationType.LOCATION
+                and world.get(rel.ent2) is not None
+                and world.get(rel.ent2).type == EntityType.CHAR
+            }
+            candidates = [e for e in candidates if e.id not in occupied]
+            if not candidates:
+                continue
+            producer = rng_for(world, "produce.site", r.id).choice(_by_id(world, candidates))
+
+        # Find existing LOCATION(producer.id → ent2) to read current stock.
+        loc = next(
+            (l for l in world.relations.values()
+             if l.type == RelationType.LOCATION and l.ent1 == producer.id and l.ent2 == r.ent2),
+            None,
+        )
+        current = loc.number if loc is not None else 0
+
+        # Cap: producer.capacity × item.capacity (only when both are defined).
+        if (item is not None
+                and producer.capacity is not None and item.capacity is not None):
+            stock_cap = producer.capacity * item.capacity
+            amount = min(amount, stock_cap - current)
+
+        if amount <= 0:
+            continue
+
+        if loc is not None:
+            # HP: blend existing stack with freshly produced items (weighted average).
+            blended = None
+            if item is not None and item.hp_max is not None and loc.hp is not None:
+                total = current + amount
+                blended = round((current * loc.hp + amount * item.hp_max) / total)
+            world.set_stack(loc, number=loc.number + amount, hp=blended)
+        else:
+            new_id = max(world.relations.keys(), default=0) + 1
+            init_hp = item.hp_max if (item is not None and item.hp_max is not None) else None
+            world.insert_relation(Relation(
+                id=new_id,
+                type=RelationType.LOCATION,
+                ent1=producer.id,
+                ent2=r.ent2,
+                number=amount,
+                hp=init_hp,
+            ))
+        log.append(f"{producer.name}: +{amount} {item.name}")
+    return log
+
+
+def _collect_behaviors(
+    world: World,
+    entity_id: str,
+    location_id: str | None = None,
+    modifiers: list[tuple[str, int]] = (),
+) -> list[tuple[str, int]]:
+    """All (behavior_name, rate) pairs active for entity_id: the entity, its
+    categories, its location, the location's categories — then [hood] modifiers."""
+    behaviors: list[tuple[str, int]] = []
+
+    # 1. Entity-specific behaviors
+    for r in world.relations.values():
+        if r.type == RelationType.BEHAVIOR and r.ent1 == entity_id:
+            behaviors.append((r.ent2, r.number))
+
+    # 2. Inherited via TYPE_OF categories
+    categories = [
+        r.ent2 for r in world.relations.values()
+        if r.type == RelationType.TYPE_OF and r.ent1 == entity_id
+    ]
+    for category in categories:
+        for r in world.relations.values():
+            if r.type == RelationType.BEHAVIOR and r.ent1 == category:
+                behaviors.append((r.ent2, r.number))
+
+    # 3 + 4. Location-based: behaviors on the entity's current ENVI,
+    #         and on the TYPE_OF categories of that ENVI.
+    location = world.get(location_id) if location_id is not None else world.location_of(entity_id)
+    if location is not None:
+        for r in world.relations.values():
+            if r.type == RelationType.BEHAVIOR and r.ent1 == location.id:
+                behaviors.append((r.ent2, r.number))
+        location_categories = [
+            r.ent2 for r in world.relations.values()
+            if r.type == RelationType.TYPE_OF and r.ent1 == location.id
+        ]
+        for category in location_categories:
+            for r in world.relations.values():
+                if r.type == RelationType.BEHAVIOR and r.ent1 == category:
+                    behaviors.append((r.ent2, r.number))
+
+    # 5. [hood] Neighbourhood modifiers
+    return behaviors + list(modifiers)
+
+
+def _process_sums_hp(world: World) -> list[str]:
+    """Apply BEHAVIOR-based HP drain to per-LOCATION stacks of SUMS entities."""
+    log: list[str] = []
+    for loc_rel in list(world.relations.values()):
+        if loc_rel.type != RelationType.LOCATION:
+            continue
+        if loc_rel.hp is None:
+            continue
+        item = world.get(loc_rel.ent2)
+        if item is None or item.type != EntityType.SUMS:
+            continue
+
+        behaviors = _collect_behaviors(world, loc_rel.ent2, location_id=loc_rel.ent1)
+        if not behaviors:
+            continue
+
+        total_drain = sum(rate for _, rate in behaviors)
+        if total_drain == 0:
+            continue
+
+        old_hp = loc_rel.hp
+        hp_max = item.hp_max if item.hp_max is not None else old_hp
+        new_hp = max(0, min(hp_max, loc_rel.hp - total_drain))
+
+        if new_hp != old_hp:
+            causes = "+".join(name for name, _ in behaviors)
+            if new_hp == 0:
+                world.delete_relation(loc_rel.id)
+                log.append(f"{item.name}: HP {old_hp} -> 0  [{causes}] [WIPED]")
+            else:
+                world.set_stack(loc_rel, hp=new_hp)
+                log.append(f"{item.name}: HP {old_hp} -> {new_hp}  [{causes}]")
+    return log
+
+
+# ── [hood] Neighbourhood aggregates ──────────────────────────────────────────
+
+_OCCUPANTS = (EntityType.CHAR, EntityType.UNIQUE, EntityType.SUMS)
+
+
+def _members(world: World, scope: str) -> set[str]:
+    """Direct TYPE_OF members of scope, plus scope itself if it is an entity."""
+    members = {r.ent1 for r in world.relations.values()
+               if r.type == RelationType.TYPE_OF and r.ent2 == scope}
+    if scope in world.entities:
+        members.add(scope)
+    return members
+
+
+def _neighbourhood(world: World) -> dict[str, list[tuple[str, int]]]:
+    """Entity id → neighbourhood modifiers, from the world as it is now."""
+    from backend.sim.neighbourhood import parse_specs   # the spec format, not the algorithm
+
+    specs = parse_specs(world.meta.vars.get("neighbourhood", []))
+    if not specs:
+        return {}
+    envis = {e.id for e in world.entities.values() if e.type == EntityType.ENVI}
+    weights: dict[tuple[str, str], int] = {}   # (ENVI, neighbour) → number of the first EDGE linking them
+    edges = _by_id(world, [r for r in world.relations.values() if r.type == RelationType.EDGE])
+    for r in edges:
+        if r.ent1 in envis and r.ent2 in envis and r.ent1 != r.ent2:
+            weights.setdefault((r.ent1, r.ent2), r.number)
+            if not r.one_way:
+                weights.setdefault((r.ent2, r.ent1), r.number)
+
+    def occupants_value(envi_id: str, source: str, value: str) -> float:
+        total = 0
+        members = None if source == "*" else _members(world, source)
+        for r in world.relations.values():
+            if r.type != RelationType.LOCATION or r.ent1 != envi_id or r.ent2 not in world.entities:
+                continue
+            entity = world.entities[r.ent2]
+            if members is None and entity.type not in _OCCUPANTS:
+                continue
+            if members is not None and r.ent2 not in members:
+                continue
+            if value == "count":
+                total += 1
+            elif value == "number":
+                total += r.number
+            elif value == "hp":
+                total += (r.hp if entity.type == EntityType.SUMS else entity.hp) or 0
+            else:
+                total += entity.hp_max or 0
+        return total
+
+    modifiers: dict[str, list[tuple[str, int]]] = {}
+    for spec in specs:
+        for entity_id in _members(world, spec.target):
+            entity = world.entities.get(entity_id)
+            if entity is None or entity.hp is None or entity.type == EntityType.SUMS:
+                continue
+            modifiers.setdefault(entity_id, [])
+    for entity_id in list(modifiers):
+        location = world.location_of(entity_id)
+        for spec in specs:
+            if entity_id not in _members(world, spec.target):
+                continue
+            aggregate = 0
+            if location is not None and location.id in envis:
+                for (a, b), weight in weights.items():
+                    if a == location.id:
+                        amount = occupants_value(b, spec.source, spec.value)
+                        aggregate += amount * weight if spec.weight == "number" else amount
+                if spec.self_:
+                    aggregate += occupants_value(location.id, spec.source, spec.value)
+            rate = round(spec.rate * aggregate)
+            if spec.cap is not None:
+                rate = max(-spec.cap, min(spec.cap, rate))
+            if rate:
+                modifiers[entity_id].append((spec.name, rate))
+    return modifiers
+
+
+# ── Triggers ─────────────────────────────────────────────────────────────────
+
+def _get_dialogue(world: World, entity_id: str | None) -> str | None:
+    """Return description of a dialogue UNIQUE entity, or None."""
+    if entity_id is None:
+        return None
+    entity = world.get(entity_id)
+    return entity.description if entity is not None else None
+
+
+def _process_triggers(world: World) -> list[str]:
+    """Fire TRIGGER relations (see engine._process_triggers)."""
+    log: list[str] = []
+    fired: list = world.meta.vars.setdefault("triggers_fired", [])
+
+    for r in _by_id(world, list(world.relations.values())):
+        if r.type != RelationType.TRIGGER:
+            continue
+        speaker = world.get(r.ent1)
+        if speaker is None:
+            continue
+
+        # ── Resurrection (number == -1) ───────────────────────────
+        if r.number == -1:
+            if speaker.hp is not None and speaker.hp == 0 and speaker.hp_max is not None:
+                world.set_hp(speaker, speaker.hp_max)
+                # Reset threshold triggers so the despair arc repeats next life
+                reset_ids = [
+                    tr.id for tr in world.relations.values()
+                    if tr.type == RelationType.TRIGGER
+                    and tr.ent1 == r.ent1
+                    and tr.number > 0
+                    and tr.id in fired
+                ]
+                for tid in reset_ids:
+                    fired.remove(tid)
+                line = _get_dialogue(world, r.ent2)
+                suffix = f" | \"{line}\"" if line else ""
+                log.append(f"[RESURRECT] {speaker.name} 0 -> {speaker.hp_max} HP{suffix}")
+            continue
+
+        # ── Ambient (number == 0) ─────────────────────────────────
+        if r.number == 0:
+            if r.lambda_ > 0 and rng_for(world, "triggers", r.id).random() < r.lambda_:
+                line = _get_dialogue(world, r.ent2)
+                if line:
+                    log.append(f"{speaker.name}: \"{line}\"")
+            continue
+
+        # ── HP-threshold, fire-once (number > 0) ─────────────────
+        if r.id in fired:
+            continue
+        if speaker.hp is None or speaker.hp > r.number:
+            continue
+
+        # Probability via normal CDF: p = Phi((threshold - hp) / sigma)
+        if r.lambda_ > 0:
+            z = (r.number - speaker.hp) / r.lambda_
+            p = 0.5 * (1.0 + math.erf(z / math.sqrt(2.0)))
+        else:
+            p = 1.0  # No sigma = always fire when threshold is crossed
+
+        if rng_for(world, "triggers", r.id).random() < p:
+            fired.append(r.id)
+            line = _get_dialogue(world, r.ent2)
+            if line:
+                log.append(f"{speaker.name}: \"{line}\"  [HP {speaker.hp} <= {r.number}]")
+
+    return log
+
+
+# ── Intent pipeline ──────────────────────────────────────────────────────────
+
+_SURVIVAL_THRESHOLD = 0.8   # EAT when hp / hp_max falls below this
+
+
+def _find_food_in_inventory(world: World, actor_id: str) -> Entity | None:
+    """Return the first SUMS item in actor's direct inventory with nutritional value (hp_max > 0)."""
+    stacks = _by_id(world, [r for r in world.relations.values()
+                            if r.type == RelationType.LOCATION and r.ent1 == actor_id])
+    for r in stacks:
+        entity = world.get(r.ent2)
+        if entity is not None and entity.type == EntityType.SUMS and entity.hp_max and r.number > 0:
+            return entity
+    return None
+
+
+def _actor_categories(world: World, actor_id: str) -> set[str]:
+    """Return the set of TYPE_OF category strings for this actor."""
+    return {
+        r.ent2 for r in world.relations.values()
+        if r.type == RelationType.TYPE_OF and r.ent1 == actor_id and r.ent2 is not None
+    }
+
+
+def _edge_allows(world: World, from_id: str, to_id: str, actor_id: str) -> bool:
+    """Return True if at least one EDGE permits actor to move from from_id to to_id."""
+    actor_cats = _actor_categories(world, actor_id)
+    for r in world.relations.values():
+        if r.type != RelationType.EDGE:
+            continue
+        if r.ent1 == from_id and r.ent2 == to_id:
+            pass  # forward direction
+        elif r.ent2 == from_id and r.ent1 == to_id and not r.one_way:
+            pass  # reverse direction, bidirectional edge
+        else:
+            continue
+        if r.deny is not None and r.deny in actor_cats:
+            continue  # this edge denies the actor — try next
+        return True
+    return False
+
+
+def _find_healing_envi(world: World, actor_id: str) -> Entity | None:
+    """Return a reachable ENVI (via EDGE) that provides net healing for this actor."""
+    current_loc = world.location_of(actor_id)
+    if current_loc is None or current_loc.type != EntityType.ENVI:
+        return None
+
+    # Collect entity IDs that carry a net-healing BEHAVIOR (negative rate)
+    healing_sources: set[str] = {
+        r.ent1 for r in world.relations.values()
+        if r.type == RelationType.BEHAVIOR and r.number < 0
+    }
+
+    # Walk all EDGE relations touching current_loc
+    actor_cats = _actor_categories(world, actor_id)
+    for r in _by_id(world, list(world.relations.values())):
+        if r.type != RelationType.EDGE:
+            continue
+        if r.ent1 == current_loc.id:
+            target_id = r.ent2
+        elif r.ent2 == current_loc.id and not r.one_way:
+            target_id = r.ent1
+        else:
+            continue
+        if r.deny is not None and r.deny in actor_cats:
+            continue  # actor denied on this edge
+        if target_id is None:
+            continue
+        candidate = world.get(target_id)
+        if candidate is None or candidate.type != EntityType.ENVI:
+            continue
+        # Direct healing on this ENVI, or via its TYPE_OF categories
+        candidate_sources = {candidate.id} | {
+            r2.ent2 for r2 in world.relations.values()
+            if r2.type == RelationType.TYPE_OF and r2.ent1 == candidate.id
+        }
+        if candidate_sources & healing_sources:
+            return candidate
+    return None
+
+
+def _survival_brain(world: World, entity: Entity) -> list[Intent]:
+    """EAT food in inventory, else MOVE towards a healing ENVI — below the threshold only."""
+    if entity.hp is None or entity.hp_max is None or entity.hp_max == 0:
+        return []
+    if entity.hp / entity.hp_max >= _SURVIVAL_THRESHOLD:
+        return []
+
+    food = _find_food_in_inventory(world, entity.id)
+    if food is not None:
+        return [Intent(actor_id=entity.id, action="EAT", target_id=food.id)]
+
+    healing = _find_healing_envi(world, entity.id)
+    if healing is not None:
+        return [Intent(actor_id=entity.id, action="MOVE", target_id=healing.id)]
+
+    return []
+
+
+def _rand_brain(world: World, entity: Entity) -> list[Intent]:
+    """A MOVE to a random ENVI one allowed EDGE away."""
+    current_loc = world.location_of(entity.id)
+    if current_loc is None or current_loc.type != EntityType.ENVI:
+        return []
+
+    actor_cats = _actor_categories(world, entity.id)
+    neighbours: list[str] = []
+    for r in world.relations.values():
+        if r.type != RelationType.EDGE:
+            continue
+        if r.ent1 == current_loc.id:
+            target_id = r.ent2
+        elif r.ent2 == current_loc.id and not r.one_way:
+            target_id = r.ent1
+        else:
+            continue
+        if r.deny is not None and r.deny in actor_cats:
+            continue
+        if target_id is None:
+            continue
+        candidate = world.get(target_id)
+        if candidate is not None and candidate.type == EntityType.ENVI:
+            neighbours.append(target_id)
+
+    if not neighbours:
+        return []
+    neighbours = _by_id(world, neighbours, key=lambda envi_id: envi_id)
+    return [Intent(actor_id=entity.id, action="MOVE",
+                   target_id=rng_for(world, "intents", entity.id).choice(neighbours))]
+
+
+def _collect_intents(world: World) -> list[Intent]:
+    """Ask every active CHAR for its intent this tick."""
+    intents: list[Intent] = []
+    for entity in _by_id(world, list(world.entities.values())):
+        if entity.type != EntityType.CHAR or entity.control is None:
+            continue
+        match entity.control:
+            case "survival":
+                intents.extend(_survival_brain(world, entity))
+            case "rand":
+                intents.extend(_rand_brain(world, entity))
+            case control if control.startswith(("remote:", "hook:")):
+                intents.extend(_survival_brain(world, entity))   # [remote]
+            case "player" | _:
+                pass   # stubs — future iterations
+    return intents
+
+
+def _execute_intents(world: World, intents: list[Intent]) -> list[str]:
+    """EAT — 1 unit, restores hp_max // 4 HP; MOVE — world.move() along an allowed EDGE."""
+    log: list[str] = []
+    for intent in intents:
+        actor = world.get(intent.actor_id)
+        if actor is None:
+            continue
+
+        if intent.action == "EAT":
+            item = world.get(intent.target_id)
+            if item is None or item.hp_max is None:
+                continue
+            loc_rel = next(
+                (r for r in world.relations.values()
+                 if r.type == RelationType.LOCATION
+                 and r.ent1 == intent.actor_id and r.ent2 == intent.target_id),
+                None,
+            )
+            if loc_rel is None or loc_rel.number <= 0:
+                continue
+            restore = max(1, item.hp_max // 4)
+            old_hp = actor.hp
+            world.set_hp(actor, min(actor.hp_max, actor.hp + restore))
+            world.set_stack(loc_rel, number=loc_rel.number - 1)
+            note = " [last]" if loc_rel.number == 0 else f" x{loc_rel.number} left"
+            if loc_rel.number == 0:
+                world.delete_relation(loc_rel.id)
+            log.append(
+                f"{actor.name}: EAT {item.name}{note}  "
+                f"(+{restore} HP  {old_hp} -> {actor.hp})"
+            )
+
+        elif intent.action == "MOVE":
+            target = world.get(intent.target_id)
+            if target is None:
+                continue
+            current_loc = world.location_of(intent.actor_id)
+            if current_loc is None or not _edge_allows(world, current_loc.id, intent.target_id, intent.actor_id):
+                continue  # no valid EDGE or actor denied
+            try:
+                world.move(intent.actor_id, intent.target_id)
+                log.append(f"{actor.name}: MOVE -> {target.name}")
+            except ValueError:
+                pass   # containment or capacity violation — silently skip
+
+    return log
+
+
+def _in_graveyard(world: World, entity_id: str) -> bool:
+    """Return True if entity_id resides in an ENVI marked TYPE_OF GRAVEYARD."""
+    location = world.location_of(entity_id)
+    if location is None:
+        return False
+    return any(
+        r.type == RelationType.TYPE_OF and r.ent1 == location.id and r.ent2 == "Graveyards"
+        for r in world.relations.values()
+    )
+
+
+def tick(world: World) -> list[str]:
+    """
+    Advance the world by one tick.
+    Returns a list of human-readable log messages describing what happened.
+    """
+    world.meta.tick += 1   # [tick]
+    log: list[str] = []
+
+    log += _process_produce(world)
+    log += _process_sums_hp(world)
+
+    modifiers = _neighbourhood(world)   # [hood]
+    for entity in list(world.entities.values()):
+        if entity.hp is None:
+            continue  # Entity has no HP — skip
+        if entity.type == EntityType.SUMS:
+            continue  # SUMS HP is per-LOCATION; handled by _process_sums_hp
+
+        # Graveyard rule: any entity inside a GRAVEYARD-typed ENVI loses all HP instantly.
+        if entity.hp > 0 and _in_graveyard(world, entity.id):
+            world.set_hp(entity, 0)
+            log.append(f"{entity.name}: captured — HP -> 0  [GRAVEYARD]")
+            continue
+
+        behaviors = _collect_behaviors(world, entity.id, modifiers=modifiers.get(entity.id, ()))
+        if not behaviors:
+            continue
+
+        total_drain = sum(rate for _, rate in behaviors)
+        if total_drain == 0:
+            continue
+
+        old_hp = entity.hp
+        cap = entity.hp_max if entity.hp_max is not None else entity.hp
+        new_hp = max(0, min(cap, entity.hp - total_drain))
+
+        if new_hp != old_hp:
+            world.set_hp(entity, new_hp)
+            causes = "+".join(name for name, _ in behaviors)
+            suffix = " [DEAD]" if new_hp == 0 else ""
+            log.append(f"{entity.name}: HP {old_hp} -> {new_hp}  [{causes}]{suffix}")
+
+    intents = _collect_intents(world)
+    log += _execute_intents(world, intents)
+
+    log += _process_triggers(world)
+    return log
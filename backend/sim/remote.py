@@ -0,0 +1,163 @@
+"""
+Remote brains: decisions for CHARs with control = "remote:<url>".
+
+An external decision source (REST service, chess engine, LLM gateway …) may
+take far longer than a tick. RemoteBrains asks all of them at once and waits
+at most `deadline` seconds per tick, no matter how many CHARs or endpoints:
+
+  - one POST per endpoint (split into chunks of batch_size actors), all in
+    flight concurrently over one pooled HTTP client
+  - answers that are not back when the deadline passes are dropped; the
+    engine falls back to the survival brain for those CHARs
+
+Request body (one per endpoint chunk):
+  {"world": name, "tick": 42,
+   "actors": [{"id", "name", "hp", "hp_max", "location",
+               "neighbours": [ENVI ids reachable via EDGE],
+               "inventory": [[entity id, quantity]]}]}
+
+Response body:
+  {"intents": [{"actor_id", "action", "target_id"?, "amount"?, "weight"?}]}
+
+An actor listed in the request but absent from "intents" chose to do nothing;
+intents for actors not in the request are ignored. Intents are validated by
+the engine like any other (_execute_intents), so a remote cannot do more than
+a local brain could.
+
+The HTTP client lives on an event loop in a daemon thread, so the tick
+engine stays synchronous and the executor works the same from a script, the
+console or inside the async server (where a tick then blocks the server's
+loop for at most one deadline).
+"""
+
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import TimeoutError as FutureTimeout
+from weakref import WeakKeyDictionary, finalize
+
+from backend.core.world import World
+
+DEADLINE = 0.25          # seconds per tick for all remote answers together
+BATCH_SIZE = 64          # actors per request
+MAX_CONNECTIONS = 32     # pooled connections, over all endpoints
+
+
+def _intent_fields(d: dict) -> dict:
+    """Keyword arguments for Intent from one wire intent; raises on malformed input."""
+    fields = {"action": str(d["action"]).upper()}
+    if d.get("target_id") is not None:
+        fields["target_id"] = str(d["target_id"])
+    if "amount" in d:
+        fields["amount"] = int(d["amount"])
+    if "weight" in d:
+        fields["weight"] = float(d["weight"])
+    return fields
+
+
+class RemoteBrains:
+    """Concurrent, deadline-bounded decision requests to remote brains."""
+
+    def __init__(self, deadline: float = DEADLINE, batch_size: int = BATCH_SIZE,
+                 max_connections: int = MAX_CONNECTIONS):
+        self.deadline = deadline
+        self.batch_size = batch_size
+        self.max_connections = max_connections
+        # actors asked / answered in time / missed the deadline / request failed
+        self.stats: Counter = Counter()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._client = None   # httpx.AsyncClient, opened on the first decide()
+
+    # ── Lifecycle ───────────────────────────────────────────────────────────
+
+    def _start(self) -> None:
+        import httpx   # only worlds with remote brains need it
+
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name="remote-brains", daemon=True).start()
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_connections)
+
+        async def open_client() -> httpx.AsyncClient:
+            return httpx.AsyncClient(limits=limits, timeout=None)
+
+        self._client = asyncio.run_coroutine_threadsafe(open_client(), loop).result()
+        self._loop = loop
+
+    def close(self) -> None:
+        """Close the pooled connections and stop the loop thread."""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = self._client = None
+
+    # ── Decisions ───────────────────────────────────────────────────────────
+
+    def decide(self, world_name: str, tick_no: int,
+               requests: dict[str, list[dict]]) -> dict[str, list[dict]]:
+        """Ask every endpoint about its actors; returns actor id → intent fields.
+
+        requests: endpoint URL → actor views (see the module docstring).
+        Actors missing from the result did not answer within the deadline.
+        """
+        if not requests:
+            return {}
+        if self._loop is None:
+            self._start()
+        future = asyncio.run_coroutine_threadsafe(
+            self._gather(world_name, tick_no, requests), self._loop)
+        try:
+            # The coroutine enforces the deadline; the margin covers thread hand-over.
+            return future.result(self.deadline + 1.0)
+        except FutureTimeout:
+            future.cancel()
+            return {}
+
+    async def _gather(self, world_name: str, tick_no: int,
+                      requests: dict[str, list[dict]]) -> dict[str, list[dict]]:
+        tasks: dict[asyncio.Task, int] = {}   # task → actors in its chunk
+        for url, actors in requests.items():
+            for i in range(0, len(actors), self.batch_size):
+                chunk = actors[i:i + self.batch_size]
+                body = {"world": world_name, "tick": tick_no, "actors": chunk}
+                tasks[asyncio.create_task(self._ask(url, body))] = len(chunk)
+            self.stats["asked"] += len(actors)
+
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        answers: dict[str, list[dict]] = {}
+        for task in pending:
+            task.cancel()
+            self.stats["late"] += tasks[task]
+        for task in done:
+            if task.exception() is None:
+                answers.update(task.result())
+            else:
+                self.stats["failed"] += tasks[task]
+        self.stats["answered"] += len(answers)
+        return answers
+
+    async def _ask(self, url: str, body: dict) -> dict[str, list[dict]]:
+        response = await self._client.post(url, json=body)
+        response.raise_for_status()
+        answers: dict[str, list[dict]] = {actor["id"]: [] for actor in body["actors"]}
+        for d in response.json().get("intents", []):
+            if not isinstance(d, dict) or d.get("actor_id") not in answers:
+                continue
+            try:
+                answers[d["actor_id"]].append(_intent_fields(d))
+            except (KeyError, TypeError, ValueError):
+                continue   # malformed intent — the rest of the answer still counts
+        return answers
+
+
+_brains: "WeakKeyDictionary[World, RemoteBrains]" = WeakKeyDictionary()
+
+
+def remote_of(world: World) -> RemoteBrains:
+    """Return the world's RemoteBrains, creating it on first use."""
+    brains = _brains.get(world)
+    if brains is None:
+        brains = _brains[world] = RemoteBrains()
+        finalize(world, brains.close)
+    return brains
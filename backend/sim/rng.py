@@ -0,0 +1,201 @@
+"""
+Counter-based random streams: draws that do not depend on processing order.
+
+The engine draws from the process-global random module — PRODUCE yields,
+type-based producer sites, TRIGGER trials, rand walkers — one after another
+in world order. Every draw shifts all later ones, so the outcome of a tick
+depends on the order entities are visited in, and no phase can be reordered,
+split or run in parallel without changing the game.
+
+A world with meta.vars["rng"] set draws from streams instead:
+
+    "rng": {"seed": 7}
+
+Each draw site gets its own stream, keyed by (seed, tick, subsystem, key):
+
+    produce        PRODUCE relation id      Poisson yield
+    produce.site   PRODUCE relation id      the ENVI a type-based producer fills
+    triggers       TRIGGER relation id      ambient and threshold trials
+    intents        CHAR id                  rand walker's next ENVI
+
+The n-th number of a stream is a hash of its key and n (BLAKE2b keyed with
+the seed), so a stream costs nothing to set up, needs no state carried from
+tick to tick and gives the same numbers whatever else was drawn before it.
+The whole RNG state is the seed plus meta.tick — saving the world saves it,
+and a loaded world continues bit for bit.
+
+A choice out of a list still depends on the list's order, and the relation
+index keeps insertion order. With streams on, the engine takes every such
+list by id instead — producer sites, walker neighbours, PRODUCE relations,
+due TRIGGERs, the EDGE or stack a first-match search settles on, the CHAR
+roster — so the same world runs the same whatever order it was loaded or
+pieced together in.
+
+Without meta.vars["rng"] nothing changes: the global random module is used in
+the same order as always (backend/sim/oracle.py relies on that) — unless the
+world was given a private random.Random with use_random(), as
+backend/sim/history.py does for a re-simulation that must not draw from the
+live simulation's module state. The event queue (backend/sim/scheduler.py)
+still draws its waiting times from the global module; it matches tick() in
+distribution either way.
+
+    seed_streams(world, 7)
+    rng = rng_for(world, "triggers", r.id)    # a Stream, or the random module
+    if rng.random() < p: ...
+
+Run:  python -m backend.sim.rng worlds/nord.json --ticks 500 --seed 7
+      a run with streams stopped halfway, saved, reloaded and continued
+      against the same run straight through; global draws against streams
+"""
+
+import hashlib
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Sequence, TypeVar
+from weakref import WeakKeyDictionary
+
+from backend.core.world import World
+
+T = TypeVar("T")
+SUBSYSTEMS = ("produce", "produce.site", "triggers", "intents")
+_SCALE = 2.0 ** -53
+
+
+class Stream:
+    """The draws of one (seed, tick, subsystem, key); random.random / random.choice alike."""
+
+    __slots__ = ("_base", "_counter")
+
+    def __init__(self, base: "hashlib.blake2b"):
+        self._base = base
+        self._counter = 0
+
+    def random(self) -> float:
+        """The next float in [0, 1), 53 bits as random.random() gives."""
+        h = self._base.copy()
+        h.update(self._counter.to_bytes(4, "little"))
+        self._counter += 1
+        return (int.from_bytes(h.digest(), "little") >> 11) * _SCALE
+
+    def choice(self, seq: Sequence[T]) -> T:
+        if not seq:
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[min(int(self.random() * len(seq)), len(seq) - 1)]
+
+
+class Streams:
+    """Stream factory for one seed."""
+
+    def __init__(self, seed: int):
+        if isinstance(seed, bool) or not isinstance(seed, int):
+            raise ValueError(f"meta.vars.rng.seed must be an integer, got {seed!r}")
+        self.seed = seed
+        self._key = seed.to_bytes(16, "little", signed=True)
+
+    def stream(self, tick: int, subsystem: str, key) -> Stream:
+        base = hashlib.blake2b(digest_size=8, key=self._key)
+        base.update(f"{tick}\x00{subsystem}\x00{key}".encode())
+        return Stream(base)
+
+
+_streams: "WeakKeyDictionary[World, Streams]" = WeakKeyDictionary()
+_randoms: "WeakKeyDictionary[World, random.Random]" = WeakKeyDictionary()
+
+
+def streams_of(world: World) -> Streams | None:
+    """The world's Streams if meta.vars["rng"] has a seed, else None (global random)."""
+    config = world.meta.vars.get("rng")
+    if config is None:
+        return None
+    if not isinstance(config, dict) or "seed" not in config:
+        raise ValueError('meta.vars.rng must be an object like {"seed": 7}')
+    streams = _streams.get(world)
+    if streams is None or streams.seed != config["seed"]:
+        streams = _streams[world] = Streams(config["seed"])
+    return streams
+
+
+def seed_streams(world: World, seed: int | None) -> None:
+    """Switch the world to streams with this seed; None goes back to global random."""
+    if seed is None:
+        world.meta.vars.pop("rng", None)
+        return
+    Streams(seed)   # validates
+    world.meta.vars["rng"] = {"seed": seed}
+
+
+def use_random(world: World, rand: random.Random | None) -> None:
+    """Draw the world's non-stream draws from rand; None goes back to the random module."""
+    if rand is None:
+        _randoms.pop(world, None)
+    else:
+        _randoms[world] = rand
+
+
+def draws_of(world: World):
+    """Where the world draws from without streams: its private Random, or the random module."""
+    return _randoms.get(world, random)
+
+
+def rng_for(world: World, subsystem: str, key):
+    """Where one draw site draws from this tick: its Stream, or draws_of(world)."""
+    streams = streams_of(world)
+    return draws_of(world) if streams is None else streams.stream(world.meta.tick, subsystem, key)
+
+
+def run(path: Path, ticks: int, seed: int) -> dict:
+    """Stop a streams run halfway, save and reload it, finish; compare with a straight run."""
+    from backend.sim.engine import tick
+    from backend.sim.oracle import state
+
+    world = World.load(path)
+    random.seed(seed)
+    started = time.perf_counter()
+    for _ in range(ticks):
+        tick(world)
+    plain = time.perf_counter() - started
+
+    straight = World.load(path)
+    seed_streams(straight, seed)
+    started = time.perf_counter()
+    for _ in range(ticks):
+        tick(straight)
+    streamed = time.perf_counter() - started
+
+    resumed = World.load(path)
+    seed_streams(resumed, seed)
+    for _ in range(ticks // 2):
+        tick(resumed)
+    resumed = World.from_dict(resumed.to_dict())
+    random.seed(seed + 1)   # streams never read the global state
+    for _ in range(ticks - ticks // 2):
+        tick(resumed)
+
+    return {
+        "ticks": ticks,
+        "global_seconds": round(plain, 3),
+        "streams_seconds": round(streamed, 3),
+        "resumed_identical": state(straight) == state(resumed),
+    }
+
+
+def parse_args() -> dict:
+    opts = {"path": Path("worlds/nord.json"), "ticks": 500, "seed": 7}
+    casts = {"--ticks": int, "--seed": int}
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        if args[i] in casts and i + 1 < len(args):
+            opts[args[i][2:]] = casts[args[i]](args[i + 1])
+            i += 2
+        else:
+            opts["path"] = Path(args[i])
+            i += 1
+    return opts
+
+
+if __name__ == "__main__":
+    for key, value in run(**parse_args()).items():
+        print(f"{key:>18}: {value}")
@@ -0,0 +1,276 @@
+"""
+Discrete-event scheduler: run_events(world, n) — an alternative to n × tick().
+
+The tick loop visits every subsystem every tick. Most ticks of a sparse world
+change nothing, though: a PRODUCE with lambda 0.05 yields once in ~20 ticks,
+an ambient TRIGGER with lambda 0.02 speaks once in ~50, and passive entities
+drain along the straight lines fastforward.py already knows how to jump.
+
+EventScheduler keeps a priority queue of the next tick in which something
+happens and jumps straight to it:
+
+  HP threshold crossing   coasting entity handed back (fastforward.py)
+  stack expiry            next wipe in the engine's expiry heap (stacks.py)
+  PRODUCE arrival         lambda > 0: next tick with a non-zero Poisson draw
+  ambient TRIGGER         next success of the per-tick Bernoulli(lambda)
+  brain wake-up           a survival CHAR's HP falling below the EAT threshold
+
+Deterministic producers into a stack that stays at a fixed HP "flow": their
+yield is added in one go when the stack is next looked at. Everything else
+(rand brains, armed threshold TRIGGERs, awake entities) still runs every tick.
+
+An event tick runs the phases in PHASES order, like tick(). Draws happen per
+event rather than per tick: inter-arrival gaps are geometric and PRODUCE
+yields are drawn conditioned on being non-zero. Worlds without random draws
+end in exactly the state n × tick() leaves them in; stochastic parts match in
+distribution, not draw for draw. Both gap distributions are memoryless, so
+stopping a run and starting a new one does not bias anything.
+"""
+
+import heapq
+import math
+import random
+from dataclasses import dataclass
+
+from backend.core.entity import Entity, EntityType
+from backend.core.relation import Relation, RelationType
+from backend.core.world import World
+from backend.sim.engine import (
+    PHASES, _SURVIVAL_THRESHOLD, has_brain,
+    _collect_behaviors, _process_produce, _process_triggers,
+)
+from backend.sim.fastforward import _FastForward, ticks_until
+from backend.sim.neighbourhood import neighbourhood_of
+from backend.sim.stacks import stacks_of
+
+_PRODUCE, _AMBIENT = 0, 1   # event kinds
+
+
+def _gap(p: float) -> int:
+    """Ticks until the next success of a per-tick Bernoulli(p): Geometric(p) on 1, 2, …"""
+    if p >= 1.0:
+        return 1
+    return 1 + int(math.log(1.0 - random.random()) / math.log1p(-p))
+
+
+def _poisson_positive(lam: float, max_yield: int) -> int:
+    """Poisson(lam) conditioned on >= 1, capped at max_yield (inverse CDF)."""
+    p = math.exp(-lam)
+    u = random.uniform(p, 1.0)
+    k, p = 1, p * lam
+    cdf = math.exp(-lam) + p
+    while cdf < u and k < max_yield:
+        k += 1
+        p *= lam / k
+        cdf += p
+    return k
+
+
+def _survival_limit(hp_max: int) -> int:
+    """Highest HP at which the survival brain acts (hp / hp_max < threshold)."""
+    limit = math.ceil(hp_max * _SURVIVAL_THRESHOLD)
+    while limit / hp_max >= _SURVIVAL_THRESHOLD:
+        limit -= 1
+    while (limit + 1) / hp_max < _SURVIVAL_THRESHOLD:
+        limit += 1
+    return limit
+
+
+@dataclass
+class _Flow:
+    """A deterministic PRODUCE whose yield is accumulated instead of applied."""
+    since: int           # meta.tick up to which the yield is already in the stack
+    stack_id: int
+
+
+class EventScheduler(_FastForward):
+    """Event queue for one run_events() call, on top of fast-forward coasting."""
+
+    def __init__(self, world: World):
+        super().__init__(world)
+        self.busy = False   # replaced by the per-event checks in quiet()
+        self.events: list[tuple[int, int, int]] = []   # (tick, kind, relation id)
+        self.producers: list[Relation] = []            # deterministic PRODUCE
+        self.flows: dict[int, _Flow] = {}
+        self.brain_chars = [e for e in world.entities.values() if has_brain(e)]
+        now = world.meta.tick
+        for r in world.related(RelationType.PRODUCE):
+            if r.number <= 0:
+                continue   # never yields anything
+            if r.lambda_ > 0:
+                self._schedule(now, _PRODUCE, r)
+            else:
+                self.producers.append(r)
+        for r in self.all_triggers:
+            if r.number == 0 and r.lambda_ > 0:
+                self._schedule(now, _AMBIENT, r)
+
+    def _schedule(self, after: int, kind: int, r: Relation) -> None:
+        p = -math.expm1(-r.lambda_) if kind == _PRODUCE else r.lambda_
+        heapq.heappush(self.events, (after + _gap(p), kind, r.id))
+
+    # ── Brains ──────────────────────────────────────────────────────────────
+
+    def _passive(self, entity: Entity) -> bool:
+        # A survival CHAR is always passive here: its brain only acts below the
+        # EAT threshold, and _entity_horizon() hands it back before it gets there
+        # (at once if it already is).
+        if entity.type == EntityType.CHAR and entity.control == "survival":
+            return True
+        return not has_brain(entity)
+
+    def _entity_drain(self, entity: Entity) -> tuple[int, str] | None:
+        if entity.type == EntityType.CHAR and entity.control == "survival":
+            # The brain moves its CHAR around: drains are only valid where it
+            # stands now, and a graveyard is not forever.
+            self._analysis.pop(entity.id, None)
+            result = super()._entity_drain(entity)
+            self.stuck.discard(entity.id)
+            return result
+        return super()._entity_drain(entity)
+
+    def _entity_horizon(self, entity: Entity, drain: int, cap: int) -> int | None:
+        horizon = super()._entity_horizon(entity, drain, cap)
+        if entity.type == EntityType.CHAR and entity.control == "survival" and entity.hp_max:
+            limit = _survival_limit(entity.hp_max)
+            k = 1 if entity.hp <= limit else ticks_until(entity.hp, drain, cap, limit)
+            if k is not None and (horizon is None or k < horizon):
+                horizon = k
+        return horizon
+
+    def _brain_due(self, entity: Entity) -> bool:
+        """True if the CHAR's brain may produce an intent next tick."""
+        if entity.id in self.entities or entity.id not in self.world.entities:
+            return False
+        if entity.control == "survival":
+            return not (entity.hp is None or not entity.hp_max
+                        or entity.hp / entity.hp_max >= _SURVIVAL_THRESHOLD)
+        return True
+
+    # ── Flows ───────────────────────────────────────────────────────────────
+
+    def _start_flow(self, r: Relation) -> None:
+        """Let a deterministic PRODUCE accumulate if its stack's HP cannot move.
+
+        Blending hp_max-fresh items into a stack already at hp_max keeps it at
+        hp_max, so k ticks of yield equal one yield of k × number (the stock
+        cap is applied to the sum the same way it is applied per tick). A
+        stack a neighbourhood aggregate reads the number or hp of never flows:
+        the aggregate must see every tick's yield.
+        """
+        world = self.world
+        producer = world.get(r.ent1)
+        item = world.get(r.ent2)
+        if producer is None or producer.type == EntityType.UNIQUE or item is None:
+            return   # type-based producers pick a random ENVI every tick
+        if neighbourhood_of(world).reads_stock(world, item.id):
+            return
+        loc = next(iter(world.related(RelationType.LOCATION, producer.id, r.ent2)), None)
+        if loc is None:
+            return   # the first yield creates the stack
+        if loc.hp is not None:
+            if item.hp_max is not None and loc.hp != item.hp_max:
+                return
+            behaviors = _collect_behaviors(world, r.ent2, location_id=producer.id)
+            if sum(rate for _, rate in behaviors) > 0:
+                return
+        self.flows[r.id] = _Flow(world.meta.tick, loc.id)
+        self.activity.sleep_stack(loc.id)
+
+    def _land_flow(self, rel_id: int, at: int) -> list[str]:
+        flow = self.flows.pop(rel_id)
+        r = self.world.relations.get(rel_id)
+        ticks = at - flow.since
+        if r is None or ticks <= 0:
+            return []
+        return [f"{line} ({ticks} ticks)"
+                for line in _process_produce(self.world, {rel_id: ticks * r.number})]
+
+    # ── Event loop ──────────────────────────────────────────────────────────
+
+    def coast(self) -> list[str]:
+        now = self.world.meta.tick
+        log: list[str] = []
+        for rel_id, flow in list(self.flows.items()):
+            # The stack was touched by something else: settle the yield first.
+            if (flow.stack_id in self.activity.active_stacks
+                    or flow.stack_id not in self.world.relations):
+                log += self._land_flow(rel_id, now)
+        for r in self.producers:
+            if r.id not in self.flows:
+                self._start_flow(r)
+        return log + super().coast()
+
+    def land_all(self) -> list[str]:
+        log: list[str] = []
+        now = self.world.meta.tick
+        for rel_id in list(self.flows):
+            log += self._land_flow(rel_id, now)
+        return log + super().land_all()
+
+    def quiet(self) -> bool:
+        if any(r.id not in self.flows for r in self.producers):
+            return False
+        if any(self._brain_due(e) for e in self.brain_chars):
+            return False
+        return super().quiet()
+
+    def next_event(self) -> int | None:
+        ticks = [self.events[0][0]] if self.events else []
+        handback = self.next_handback()
+        if handback is not None:
+            ticks.append(handback)
+        return min(ticks) if ticks else None
+
+    def step(self, tick_no: int) -> list[str]:
+        """Run tick tick_no: due events only, phases in PHASES order."""
+        world = self.world
+        log = self.hand_back(tick_no)
+        world.meta.tick = tick_no
+
+        due = {r.id: r.number for r in self.producers if r.id not in self.flows}
+        ambient: set[int] = set()
+        while self.events and self.events[0][0] <= tick_no:
+            _, kind, rel_id = heapq.heappop(self.events)
+            r = world.relations.get(rel_id)
+            if r is None:
+                continue   # relation removed meanwhile
+            if kind == _PRODUCE:
+                due[rel_id] = _poisson_positive(r.lambda_, r.number)
+            else:
+                ambient.add(rel_id)
+            self._schedule(tick_no, kind, r)
+
+        for name, phase in PHASES:
+            if name == "produce":
+                log += _process_produce(world, due)
+            elif name == "triggers":
+                log += _process_triggers(world, ambient)
+            else:
+                log += phase(world)
+        return log + self.coast()
+
+
+def run_events(world: World, n: int) -> list[str]:
+    """Advance the world by n ticks through the event queue.
+
+    Same final state as n × tick() for worlds without random draws; stochastic
+    PRODUCE and ambient TRIGGERs are equal in distribution. Returns a condensed
+    log like advance().
+    """
+    log: list[str] = []
+    end = world.meta.tick + n
+    scheduler = EventScheduler(world)
+    log += scheduler.coast()
+
+    while world.meta.tick < end:
+        if scheduler.quiet():
+            target = min(scheduler.next_event() or end, end)
+            if target - 1 > world.meta.tick:
+                world.meta.vars.setdefault("triggers_fired", [])
+                world.meta.tick = stacks_of(world).tick = target - 1
+                continue
+        log += scheduler.step(world.meta.tick + 1)
+
+    log += scheduler.land_all()
+    return log
@@ -0,0 +1,82 @@
+"""
+Expiry heap for SUMS stacks.
+
+A SUMS stack (LOCATION relation with hp) drains at a constant rate as long as
+it stays where it is: the rate depends only on the item and its location.
+Instead of writing relation.hp every tick, _process_sums_hp() anchors such a
+stack once — Relation.decay = (hp after tick t0, drain, cap) — and relation.hp
+is derived on read from the world's StackClock. The tick in which the stack
+reaches 0 goes into a min-heap; the engine only visits stacks that expire this
+tick or were woken by a world change (new, blended by PRODUCE, eaten from,
+moved, re-categorized).
+
+The clock lags meta.tick by one until the SUMS phase of a tick has run, so
+phases before it (PRODUCE blending) read last tick's hp, exactly as before.
+Writing relation.hp (World.set_stack) drops the anchor; the stack is woken and
+re-anchored in the next SUMS phase. Anchoring and settling go through
+World.set_decay(), so change-feed subscribers (backend/core/diff.py) can keep
+deriving the hp themselves.
+
+An anchored stack is not visited, so by default its tick-by-tick drain is not
+logged — only the wipe. Set stacks_of(world).log = True for the old per-stack
+"HP a -> b" lines; the SUMS phase then scans every anchored stack each tick.
+"""
+
+import heapq
+import itertools
+from weakref import WeakKeyDictionary
+
+from backend.core.relation import Decay, Relation
+from backend.core.world import World
+
+
+class StackClock:
+    """Ticks of drain applied so far, plus the wipe queue of decaying stacks."""
+
+    def __init__(self, world: World):
+        self.tick = world.meta.tick
+        # (wipe tick, stack order, seq, relation id, decay, causes) — an entry
+        # is stale once the relation dropped or replaced that Decay.
+        self.wipes: list[tuple[int, int, int, int, Decay, str]] = []
+        self._seq = itertools.count()
+        self.log = False   # log every anchored stack's drain each tick (costs a scan)
+
+    def anchor(self, world: World, rel: Relation, hp: int, t0: int, drain: int,
+               cap: int, causes: str, order: int) -> None:
+        """Let rel drain from hp (its value after tick t0) without further visits."""
+        decay = Decay(hp, t0, drain, cap, self)
+        world.set_decay(rel, decay)
+        zero = decay.zero_at()
+        if zero is not None:
+            heapq.heappush(self.wipes, (zero, order, next(self._seq), rel.id, decay, causes))
+
+    def due(self, world: World, tick_no: int) -> list[tuple[Relation, str]]:
+        """Pop the stacks that reach 0 in tick_no (or earlier), in stack order."""
+        out: list[tuple[Relation, str]] = []
+        while self.wipes and self.wipes[0][0] <= tick_no:
+            _, _, _, rel_id, decay, causes = heapq.heappop(self.wipes)
+            rel = world.relations.get(rel_id)
+            if rel is not None and rel.decay is decay:
+                out.append((rel, causes))
+        return out
+
+    def next_wipe(self, world: World) -> int | None:
+        """Tick of the next pending wipe, or None."""
+        while self.wipes:
+            _, _, _, rel_id, decay, _ = self.wipes[0]
+            rel = world.relations.get(rel_id)
+            if rel is not None and rel.decay is decay:
+                return self.wipes[0][0]
+            heapq.heappop(self.wipes)
+        return None
+
+
+_clocks: "WeakKeyDictionary[World, StackClock]" = WeakKeyDictionary()
+
+
+def stacks_of(world: World) -> StackClock:
+    """Return the world's StackClock, creating it on first use."""
+    clock = _clocks.get(world)
+    if clock is None:
+        clock = _clocks[world] = StackClock(world)
+    return clock
@@ -0,0 +1,94 @@
+"""
+Neighbour cache for random walkers (control = "rand").
+
+A rand brain picks uniformly among the ENVIs reachable via EDGE from its
+CHAR's current ENVI. Which ENVIs those are depends only on the ENVI and on
+the actor's TYPE_OF categories that some EDGE denies — so a crowd of walkers
+shares a handful of neighbour lists. WalkCache keeps them, keyed by
+(ENVI id, deny key), together with each actor's deny key:
+
+  deny key     frozenset of the actor's categories that appear as an EDGE deny
+  neighbours   ENVI ids in the order the EDGE scan finds them (world.touching)
+
+Both stay valid until the world changes underneath (World.subscribe()):
+
+  EDGE added / removed          → everything
+  TYPE_OF added / removed       → deny keys
+  entity added / removed        → neighbour lists (an end may have appeared)
+
+Code that edits relations or entity types directly must call
+walkers_of(world).clear().
+"""
+
+from weakref import WeakKeyDictionary
+
+from backend.core.entity import EntityType
+from backend.core.relation import RelationType
+from backend.core.world import Change, World
+
+
+class WalkCache:
+    """Neighbour lists per (ENVI, deny key) and deny keys per actor."""
+
+    def __init__(self, world: World):
+        self.clear()
+        world.subscribe(self._on_change)
+
+    def clear(self) -> None:
+        self._denies: frozenset[str] | None = None                    # every EDGE deny value
+        self._keys: dict[str, frozenset[str]] = {}                     # actor id → deny key
+        self._neighbours: dict[tuple[str, frozenset[str]], list[str]] = {}
+
+    def _on_change(self, change: Change, subject, old) -> None:
+        if change in (Change.RELATION_ADDED, Change.RELATION_REMOVED):
+            if subject.type == RelationType.EDGE:
+                self.clear()
+            elif subject.type == RelationType.TYPE_OF:
+                self._keys.clear()
+        elif change in (Change.ENTITY_ADDED, Change.ENTITY_REMOVED):
+            self._neighbours.clear()
+            self._keys.pop(subject.id, None)
+
+    def deny_key(self, world: World, actor_id: str) -> frozenset[str]:
+        key = self._keys.get(actor_id)
+        if key is None:
+            if self._denies is None:
+                self._denies = frozenset(
+                    r.deny for r in world.related(RelationType.EDGE) if r.deny is not None)
+            key = self._keys[actor_id] = frozenset(
+                r.ent2 for r in world.related(RelationType.TYPE_OF, ent1=actor_id)
+                if r.ent2 in self._denies)
+        return key
+
+    def neighbours(self, world: World, envi_id: str, deny_key: frozenset[str]) -> list[str]:
+        """ENVI ids reachable from envi_id for an actor with this deny key."""
+        group = (envi_id, deny_key)
+        found = self._neighbours.get(group)
+        if found is None:
+            found = self._neighbours[group] = []
+            for r in world.touching(RelationType.EDGE, envi_id):
+                if r.ent1 == envi_id:
+                    target_id = r.ent2
+                elif r.ent2 == envi_id and not r.one_way:
+                    target_id = r.ent1
+                else:
+                    continue
+                if r.deny is not None and r.deny in deny_key:
+                    continue
+                if target_id is None:
+                    continue
+                candidate = world.get(target_id)
+                if candidate is not None and candidate.type == EntityType.ENVI:
+                    found.append(target_id)
+        return found
+
+
+_caches: "WeakKeyDictionary[World, WalkCache]" = WeakKeyDictionary()
+
+
+def walkers_of(world: World) -> WalkCache:
+    """Return the world's WalkCache, creating it on first use."""
+    cache = _caches.get(world)
+    if cache is None:
+        cache = _caches[world] = WalkCache(world)
+    return cache
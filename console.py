@@ -1,20 +1,25 @@
+import random
 import sys
 import time
 from pathlib import Path
-from collections import deque
+from collections import Counter, deque
 
 from rich.columns import Columns
 from rich.console import Console, Group
 from rich.live import Live
 from rich.panel import Panel
 from rich.rule import Rule
+from rich.table import Table
 from rich.tree import Tree
 from rich.text import Text
 
 from backend.core.entity import Entity, EntityType
 from backend.core.relation import RelationType
-from backend.core.world import World
-from backend.sim.engine import tick
+from backend.core.world import Change, World
+from backend.sim.dialogue import load_dialogue
+from backend.sim.engine import PHASES, tick
+from backend.sim.metrics import firings_of, produced_of
+from backend.sim.stacks import stacks_of
 
 console = Console()
 
@@ -29,6 +34,7 @@ _TYPE_ORDER = [t.value for t in EntityType]  # canonical display order: CHAR, EN
 
 HP_BAR_WIDTH = 10
 LOG_LINES    = 8
+MAX_FPS      = 4      # Live refreshes per second, however fast the simulation runs
 
 
 def _hp_colour(hp: int, hp_max: int) -> str:
@@ -70,56 +76,195 @@ def label(e: Entity, count: int = 1, full: bool = False, loc_hp: int | None = No
     return f"{tag}  {e.name}{extra}{hp}{details}"
 
 
-def add_children(world: World, parent_id: str, node: Tree, full: bool) -> None:
-    for child, count in world.children(parent_id):
-        loc_hp = None
-        if child.type == EntityType.SUMS:
-            loc_rel = next(
-                (r for r in world.relations.values()
-                 if r.type == RelationType.LOCATION and r.ent1 == parent_id and r.ent2 == child.id),
-                None,
-            )
-            if loc_rel is not None:
-                loc_hp = loc_rel.hp
-        child_node = node.add(label(child, count, full, loc_hp=loc_hp))
-        add_children(world, child.id, child_node, full)
-
-
-def _build_manifest_panel(world: World) -> Panel:
+class _Stats:
+    """Entity / relation counts for the --full header, kept up to date from the change feed."""
+
+    def __init__(self, world: World):
+        self.entities: Counter[str] = Counter(e.type.value for e in world.entities.values())
+        self.relations: Counter[str] = Counter(r.type.value for r in world.relations.values())
+        # LOCATIONs per contained entity — a UNIQUE without one is an archetype/dialogue
+        self.located: Counter[str] = Counter(
+            r.ent2 for r in world.relations.values() if r.type == RelationType.LOCATION
+        )
+        self.arch = sum(
+            1 for e in world.entities.values()
+            if e.type == EntityType.UNIQUE and not self.located[e.id]
+        )
+
+    def _is_arch(self, world: World, entity_id: str) -> bool:
+        e = world.entities.get(entity_id)
+        return e is not None and e.type == EntityType.UNIQUE and not self.located[entity_id]
+
+    def on_change(self, world: World, change: Change, subject) -> None:
+        match change:
+            case Change.ENTITY_ADDED | Change.ENTITY_REMOVED:
+                delta = 1 if change == Change.ENTITY_ADDED else -1
+                self.entities[subject.type.value] += delta
+                if subject.type == EntityType.UNIQUE and not self.located[subject.id]:
+                    self.arch += delta
+            case Change.RELATION_ADDED | Change.RELATION_REMOVED:
+                delta = 1 if change == Change.RELATION_ADDED else -1
+                self.relations[subject.type.value] += delta
+                if subject.type == RelationType.LOCATION:
+                    was_arch = self._is_arch(world, subject.ent2)
+                    self.located[subject.ent2] += delta
+                    self.arch += self._is_arch(world, subject.ent2) - was_arch
+
+    def markup(self) -> str:
+        type_counts = +self.entities
+        if self.arch > 0:
+            placed_unique = type_counts.get("UNIQUE", 0) - self.arch
+            if placed_unique == 0:
+                del type_counts["UNIQUE"]
+            else:
+                type_counts["UNIQUE"] = placed_unique
+
+        entity_parts = [
+            f"[dim]{k}:[/] {v}"
+            for k, v in sorted(type_counts.items(), key=lambda x: _TYPE_ORDER.index(x[0]) if x[0] in _TYPE_ORDER else 99)
+        ]
+        if self.arch > 0:
+            entity_parts.append(f"[dim]arch:[/] {self.arch}")
+
+        return "  ".join(entity_parts) + "   " + "  ".join(
+            f"[dim]{k}:[/] {v}"
+            for k, v in sorted((+self.relations).items())
+        )
+
+
+class WorldView:
+    """The world tree, built once and patched from the change feed.
+
+    Every LOCATION relation has one cached Tree node (an entity with several
+    locations — a SUMS — has one per stack); root entities have their own.
+    World changes only mark nodes dirty; render() relabels and re-links the
+    dirty ones, so any number of ticks between two frames costs one update.
+    Decaying stacks change hp without notifications (backend/sim/stacks.py)
+    and are relabelled on every frame.
+    """
+
+    def __init__(self, world: World, full: bool):
+        self.world = world
+        self.full = full
+        self.stats = _Stats(world)
+        self.nodes: dict[int, Tree] = {}         # LOCATION relation id → node
+        self.root_nodes: dict[str, Tree] = {}    # root entity id → node
+        self.tree: Tree = Tree("")
+        self.decaying: set[int] = {
+            r.id for r in world.relations.values() if r.decay is not None
+        }
+        self._dirty_nodes: set[int] = {
+            r.id for r in world.relations.values() if r.type == RelationType.LOCATION
+        }
+        self._dirty_entities: set[str] = set()   # relabel every node showing the entity
+        self._dirty_parents: set[str] = set()    # re-link children in world order
+        self._dirty_roots = True
+        world.subscribe(self._on_change)
+
+    def _on_change(self, change: Change, subject, old) -> None:
+        self.stats.on_change(self.world, change, subject)
+        match change:
+            case Change.HP:
+                self._dirty_entities.add(subject.id)
+            case Change.STACK | Change.DECAY:
+                if subject.decay is not None:
+                    self.decaying.add(subject.id)
+                else:
+                    self.decaying.discard(subject.id)
+                self._dirty_nodes.add(subject.id)
+            case Change.RELATION_ADDED if subject.type == RelationType.LOCATION:
+                self._dirty_nodes.add(subject.id)
+                self._dirty_roots = True
+            case Change.RELATION_REMOVED if subject.type == RelationType.LOCATION:
+                self.nodes.pop(subject.id, None)
+                self.decaying.discard(subject.id)
+                self._dirty_parents.add(subject.ent1)
+                self._dirty_roots = True
+            case Change.RELATION_MOVED:
+                self._dirty_parents.update((old, subject.ent1))
+            case Change.ENTITY_ADDED | Change.ENTITY_REMOVED:
+                self._dirty_roots = True
+
+    def close(self) -> None:
+        """Stop following the world."""
+        self.world.unsubscribe(self._on_change)
+
+    # ── Patching ────────────────────────────────────────────────────────────
+
+    def _shown_at(self, entity_id: str) -> list[Tree]:
+        """Every node that shows entity_id."""
+        shown = [
+            self.nodes[r.id] for r in self.world.related(RelationType.LOCATION, ent2=entity_id)
+            if r.id in self.nodes
+        ]
+        if entity_id in self.root_nodes:
+            shown.append(self.root_nodes[entity_id])
+        return shown
+
+    def _relabel(self, rel_id: int) -> None:
+        r = self.world.relations.get(rel_id)
+        if r is None or r.type != RelationType.LOCATION:
+            return
+        child = self.world.get(r.ent2)
+        if child is None:
+            return
+        text = label(child, r.number, self.full, loc_hp=r.hp)
+        node = self.nodes.get(rel_id)
+        if node is None:
+            self.nodes[rel_id] = Tree(text)
+            self._dirty_parents.update((r.ent1, r.ent2))
+        else:
+            node.label = text
+
+    def _update_roots(self) -> None:
+        # Archetype/dialogue UNIQUE entities (no LOCATION) are never shown in the tree —
+        # they clutter the view. Placed UNIQUEs (with LOCATION) still appear as children.
+        roots = [r for r in self.world.roots() if r.type != EntityType.UNIQUE]
+        self.root_nodes = {
+            e.id: self.root_nodes[e.id] if e.id in self.root_nodes else Tree(label(e, full=self.full))
+            for e in roots
+        }
+        self._dirty_parents.update(self.root_nodes)
+        if len(roots) == 1:
+            self.tree = self.root_nodes[roots[0].id]
+        else:
+            self.tree = Tree("[bold]PocketWorld[/]")
+            self.tree.children = list(self.root_nodes.values())
+
+    def update(self) -> Tree:
+        """Apply everything marked dirty since the last call; returns the tree."""
+        world = self.world
+        if self._dirty_roots:
+            self._dirty_roots = False
+            self._update_roots()
+        for rel_id in self._dirty_nodes | self.decaying:
+            self._relabel(rel_id)
+        for entity_id in self._dirty_entities:
+            entity = world.get(entity_id)
+            if entity is None:
+                continue
+            for r in world.related(RelationType.LOCATION, ent2=entity_id):
+                self._relabel(r.id)
+            if entity_id in self.root_nodes:
+                self.root_nodes[entity_id].label = label(entity, full=self.full)
+        for parent_id in self._dirty_parents:
+            children = [
+                self.nodes[r.id] for r in world.related(RelationType.LOCATION, ent1=parent_id)
+                if r.id in self.nodes
+            ]
+            for node in self._shown_at(parent_id):
+                node.children = children
+        self._dirty_nodes.clear()
+        self._dirty_entities.clear()
+        self._dirty_parents.clear()
+        return self.tree
+
+
+def _build_manifest_panel(world: World, stats: _Stats) -> Panel:
     """Header panel shown only in --full mode."""
     mf = world.manifest
     m  = world.meta
 
-    # Stats computed on the fly
-    from collections import Counter
-    type_counts = Counter(e.type.value for e in world.entities.values())
-    rel_counts  = Counter(r.type.value for r in world.relations.values())
-
-    # Split UNIQUE into "placed" (has a LOCATION) and "arch" (archetype/dialogue, no LOCATION).
-    in_loc = {r.ent2 for r in world.relations.values() if r.type == RelationType.LOCATION}
-    arch_count = sum(
-        1 for e in world.entities.values()
-        if e.type == EntityType.UNIQUE and e.id not in in_loc
-    )
-    if arch_count > 0:
-        placed_unique = type_counts.get("UNIQUE", 0) - arch_count
-        if placed_unique == 0:
-            del type_counts["UNIQUE"]
-        else:
-            type_counts["UNIQUE"] = placed_unique
-
-    entity_parts = [
-        f"[dim]{k}:[/] {v}"
-        for k, v in sorted(type_counts.items(), key=lambda x: _TYPE_ORDER.index(x[0]) if x[0] in _TYPE_ORDER else 99)
-    ]
-    if arch_count > 0:
-        entity_parts.append(f"[dim]arch:[/] {arch_count}")
-
-    stats = "  ".join(entity_parts) + "   " + "  ".join(
-        f"[dim]{k}:[/] {v}"
-        for k, v in sorted(rel_counts.items())
-    )
-
     lines: list = []
     if mf.author or mf.created:
         meta_line = Text()
@@ -133,7 +278,7 @@ def _build_manifest_panel(world: World) -> Panel:
         lines.append(meta_line)
     if mf.lore:
         lines.append(Text(mf.lore, style="italic dim"))
-    lines.append(Text.from_markup(stats))
+    lines.append(Text.from_markup(stats.markup()))
 
     return Panel(
         Group(*lines),
@@ -143,34 +288,26 @@ def _build_manifest_panel(world: World) -> Panel:
     )
 
 
-def build_display(world: World, tick_num: int, log: deque, full: bool) -> Group:
-    """Build the full renderable for one Live refresh."""
-    # ── World tree ───────────────────────────────────────────────
-    # Archetype/dialogue UNIQUE entities (no LOCATION) are never shown in the tree —
-    # they clutter the view. Placed UNIQUEs (with LOCATION) still appear as children.
-    roots = [r for r in world.roots() if r.type != EntityType.UNIQUE]
-    if len(roots) == 1:
-        tree = Tree(label(roots[0], full=full))
-        add_children(world, roots[0].id, tree, full)
-    else:
-        tree = Tree("[bold]PocketWorld[/]")
-        for root in roots:
-            subtree = tree.add(label(root, full=full))
-            add_children(world, root.id, subtree, full)
-
+def build_display(view: WorldView, tick_num: int, log: deque, tps: float | None = None) -> Group:
+    """Build the renderable for one Live refresh from the patched WorldView."""
+    world = view.world
+    full = view.full
+    speed = f"  [dim]{tps:,.0f} ticks/s[/]" if tps is not None else ""
     world_panel = Panel(
-        tree,
-        title=f"[bold]{world.name}[/]  [dim]tick {tick_num}[/]",
+        view.update(),
+        title=f"[bold]{world.name}[/]  [dim]tick {tick_num}[/]{speed}",
         subtitle=f"[dim]{world.description}[/]" if world.description and not full else "",
         border_style="blue",
     )
 
     # ── Event log ────────────────────────────────────────────────
+    # Entries are (tick, message); formatted here, once per frame.
     if log:
         log_text = Text()
-        for i, line in enumerate(log):
+        for i, (t, msg) in enumerate(log):
             if i > 0:
                 log_text.append("\n")
+            line = f"[t{t:>3}] {msg}"
             # Dialogue lines (quoted speech or resurrection) stand out with reverse video.
             if '"' in line or line.startswith("[RESURRECT]"):
                 log_text.append(line, style="reverse")
@@ -182,16 +319,128 @@ def build_display(world: World, tick_num: int, log: deque, full: bool) -> Group:
     log_panel = Panel(log_text, title="[dim]Event log[/]", border_style="dim")
 
     if full:
-        return Group(_build_manifest_panel(world), world_panel, log_panel)
+        return Group(_build_manifest_panel(world, view.stats), world_panel, log_panel)
     return Group(world_panel, log_panel)
 
 
-def parse_args() -> tuple[Path, int, float, bool]:
-    """Returns (world_path, ticks, delay_seconds, full_mode)."""
-    path  = Path("worlds/nord.json")
+# ── Headless run ────────────────────────────────────────────────────────────
+
+class _Report:
+    """What happened during a headless run, from the change feed and the engine's counters."""
+
+    def __init__(self, world: World):
+        self.world = world
+        self.deaths: Counter[str] = Counter()        # entity name → times HP hit 0
+        self.wipes: Counter[str] = Counter()         # item name → stacks wiped
+        self.wiped_units: Counter[str] = Counter()   # item name → units lost to wipes
+        self.produced: Counter[str] = Counter()      # item name → units produced
+        self.dialogue = 0
+        self.resurrections = 0
+        self.phase_time: dict[str, float] = dict.fromkeys((name for name, _ in PHASES), 0.0)
+        self.ticks = 0
+        self.seconds = 0.0
+        world.subscribe(self._on_change)
+
+    def _item_name(self, relation) -> str:
+        item = self.world.get(relation.ent2)
+        return item.name if item is not None else str(relation.ent2)
+
+    def _on_change(self, change: Change, subject, old) -> None:
+        match change:
+            case Change.HP:
+                if subject.hp == 0 and old:
+                    self.deaths[subject.name] += 1
+            case Change.RELATION_REMOVED if subject.type == RelationType.LOCATION:
+                # The SUMS phase zeroes a stack's hp right before deleting it;
+                # an eaten-up stack leaves with number 0 instead.
+                if subject.hp == 0 and subject.number > 0:
+                    name = self._item_name(subject)
+                    self.wipes[name] += 1
+                    self.wiped_units[name] += subject.number
+
+    def run(self, ticks: int) -> None:
+        """Run `ticks` ticks, timing every phase."""
+        world = self.world
+        firings, produced = firings_of(world), produced_of(world)
+        fired_before, produced_before = Counter(firings), Counter(produced)
+        started = time.perf_counter()
+        for _ in range(ticks):
+            tick(world, self.phase_time)
+        self.seconds += time.perf_counter() - started
+        self.ticks += ticks
+        fired = firings - fired_before
+        self.dialogue += fired["threshold"] + fired["ambient"]
+        self.resurrections += fired["resurrect"]
+        for item_id, units in (produced - produced_before).items():
+            item = world.get(item_id)
+            self.produced[item.name if item is not None else item_id] += units
+
+    def close(self) -> None:
+        self.world.unsubscribe(self._on_change)
+
+    @property
+    def tps(self) -> float:
+        return self.ticks / self.seconds if self.seconds > 0 else 0.0
+
+
+def _top(counts: Counter, limit: int = 8, units: Counter | None = None) -> Text:
+    if not counts:
+        return Text("—", style="dim")
+    parts = [
+        f"{name} ×{n}" + (f" ({units[name]})" if units is not None else "")
+        for name, n in counts.most_common(limit)
+    ]
+    if len(counts) > limit:
+        parts.append(f"… +{len(counts) - limit}")
+    return Text(", ".join(parts))
+
+
+def build_summary(world: World, report: _Report, full: bool) -> Group:
+    """Final tree plus what happened during the run."""
+    facts = Table.grid(padding=(0, 2))
+    facts.add_column(style="dim")
+    facts.add_column()
+    facts.add_row("ticks", f"{report.ticks:,}  in {report.seconds:.2f} s  "
+                           f"([bold]{report.tps:,.0f}[/] ticks/s)")
+    facts.add_row("deaths", _top(report.deaths))
+    facts.add_row("wipes", _top(report.wipes, units=report.wiped_units))
+    facts.add_row("produced", Text(", ".join(
+        f"{name} +{n}" for name, n in report.produced.most_common(8)
+    ) or "—", style="" if report.produced else "dim"))
+    facts.add_row("triggers", f"{report.dialogue} dialogue, {report.resurrections} resurrections")
+
+    phases = Table(box=None, padding=(0, 2), show_edge=False, header_style="dim")
+    phases.add_column("phase")
+    phases.add_column("total ms", justify="right")
+    phases.add_column("µs/tick", justify="right")
+    phases.add_column("share", justify="right")
+    spent = sum(report.phase_time.values()) or 1.0
+    for name, seconds in report.phase_time.items():
+        phases.add_row(name, f"{seconds * 1000:,.1f}",
+                       f"{seconds * 1e6 / max(report.ticks, 1):,.1f}",
+                       f"{seconds / spent:.0%}")
+
+    view = WorldView(world, full)
+    view.close()   # a one-off render
+    tree_panel = Panel(
+        view.update(),
+        title=f"[bold]{world.name}[/]  [dim]tick {world.meta.tick}[/]",
+        border_style="blue",
+    )
+    summary = Panel(Group(facts, Rule(style="dim"), phases),
+                    title="[dim]Summary[/]", border_style="dim")
+    return Group(tree_panel, summary)
+
+
+def parse_args() -> tuple[list[Path], int, float, bool, bool, int | None, bool]:
+    """Returns (world_paths, ticks, delay_seconds, full_mode, headless, seed, stack_log)."""
+    paths: list[Path] = []
     ticks = 0
     delay = 0.8
     full  = False
+    headless = False
+    seed: int | None = None
+    stack_log = False
 
     args = sys.argv[1:]
     i = 0
@@ -202,29 +451,79 @@ def parse_args() -> tuple[Path, int, float, bool]:
         elif args[i] == "--delay" and i + 1 < len(args):
             delay = float(args[i + 1])
             i += 2
+        elif args[i] == "--seed" and i + 1 < len(args):
+            seed = int(args[i + 1])
+            i += 2
         elif args[i] == "--full":
             full = True
             i += 1
+        elif args[i] == "--headless":
+            headless = True
+            i += 1
+        elif args[i] == "--stack-log":
+            stack_log = True
+            i += 1
         else:
-            path = Path(args[i])
+            paths.append(Path(args[i]))
             i += 1
 
-    return path, ticks, delay, full
+    return paths or [Path("worlds/nord.json")], ticks, delay, full, headless, seed, stack_log
 
 
-if __name__ == "__main__":
-    path, num_ticks, delay, full = parse_args()
-    world  = World.load(path)
-    log    = deque(maxlen=LOG_LINES)
+def run_live(world: World, num_ticks: int, delay: float, full: bool) -> None:
+    view = WorldView(world, full)
+    log  = deque(maxlen=LOG_LINES)
 
     if num_ticks == 0:
         # Static view — no live loop
-        console.print(build_display(world, 0, log, full))
-    else:
-        with Live(build_display(world, 0, log, full), console=console, refresh_per_second=4) as live:
-            for t in range(1, num_ticks + 1):
+        console.print(build_display(view, 0, log))
+        return
+
+    # The simulation runs at its own pace (--delay 0 = flat out); the view
+    # is redrawn at most MAX_FPS times a second and on the last tick. A big
+    # tree takes a while to draw, so frames are also spaced to leave the
+    # simulation at least 3/4 of the time.
+    with Live(build_display(view, 0, log), console=console, auto_refresh=False) as live:
+        frame_tick = 0
+        frame_time = time.perf_counter()
+        interval = 1 / MAX_FPS
+        for t in range(1, num_ticks + 1):
+            if delay > 0:
                 time.sleep(delay)
-                events = tick(world)
-                for msg in events:
-                    log.append(f"[t{t:>3}] {msg}")
-                live.update(build_display(world, t, log, full))
+            for msg in tick(world):
+                log.append((t, msg))
+            now = time.perf_counter()
+            if now - frame_time >= interval or t == num_ticks:
+                tps = (t - frame_tick) / (now - frame_time)
+                live.update(build_display(view, t, log, tps), refresh=True)
+                frame_tick, frame_time = t, time.perf_counter()
+                interval = max(1 / MAX_FPS, 3 * (frame_time - now))
+
+
+if __name__ == "__main__":
+    paths, num_ticks, delay, full, headless, seed, stack_log = parse_args()
+    runs: list[tuple[str, _Report]] = []
+    for path in paths:
+        if seed is not None:
+            random.seed(seed)   # per world, so results do not depend on the file order
+        world = World.load(path)
+        load_dialogue(world, path, seed=seed)
+        stacks_of(world).log = stack_log
+        if not headless:
+            run_live(world, num_ticks, delay, full)
+            continue
+        report = _Report(world)
+        report.run(num_ticks)
+        report.close()
+        console.print(build_summary(world, report, full))
+        runs.append((path.name, report))
+
+    if len(runs) > 1:
+        totals = Table(title="Headless runs", title_style="bold", header_style="dim")
+        for column in ("world", "ticks", "seconds", "ticks/s", "deaths", "wipes", "produced"):
+            totals.add_column(column, justify="left" if column == "world" else "right")
+        for name, report in runs:
+            totals.add_row(name, f"{report.ticks:,}", f"{report.seconds:.2f}", f"{report.tps:,.0f}",
+                           str(sum(report.deaths.values())), str(sum(report.wipes.values())),
+                           str(sum(report.produced.values())))
+        console.print(totals)
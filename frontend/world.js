@@ -0,0 +1 @@
+window.WORLD_GRAPH = {"world":"Chronicle of the Polar Night Dynasty","tick":0,"topology":"6f8a8f6fb6dc3795","types":["CHAR","ENVI","UNIQUE","SUMS"],"ids":["KINGDOM","CASTLE","THRONE_ROOM","GREAT_HALL","ROYAL_VAULT","FOREST","HAROLD","INDRID","FREYA","BYGUL","CROWN_IRON","SWORD_FROSTBITE","STAFF_INDRID","FREYA_DAGGER","KEY_VAULT","WILDFIRE_OIL","GOLD_COINS","MANA_POTIONS","WOOD","VENISON"],"names":["Kingdom of the Polar Night","Frostkeep Castle","Throne Room","Great Hall","Royal Vault","Whispering Forest","King Harold","Queen Indrid","Princess Freya","Bygul","Iron Crown of the North","Frostbite","Indrid's Staff","Silver Dagger","Iron Key","Wildfire Oil","Gold Coins","Mana Potions","Wood","Venison"],"type":[1,1,1,1,1,1,0,0,0,0,2,2,2,2,2,2,3,3,3,3],"pos":[0.1,0.0,0.7,1.39,-2.5,-0.24,2.42,-5.0,0.99,1.43,-5.0,-0.28,0.37,-5.0,-1.47,-1.2,-2.5,1.63,2.42,-6.1,0.99,1.43,-6.1,-0.28,-1.2,-3.6,1.63,-0.23,-4.7,1.63,3.47,-7.2,0.99,2.42,-7.2,2.04,1.43,-7.2,-0.28,-1.68,-4.7,2.46,1.37,-7.2,0.99,-1.68,-4.7,0.8,1.25,-6.1,-1.47,-0.5,-6.1,-1.47,0.0,1.4,0.0,2.42,-7.2,-0.06],"location":[0,1,0,5,1,2,1,3,1,4,2,6,3,7,5,8,6,10,6,11,6,14,7,12,8,13,8,9,8,15,4,16,4,17,6,19],"adjacency":[2,3,3,4]};
@@ -0,0 +1,16 @@
+"""tick(): the tick counter."""
+
+from backend.core.world import World
+from backend.sim.engine import tick
+from backend.sim.oracle import random_world
+
+
+def test_tick_advances_meta_tick(tmp_path):
+    world = World.from_dict(random_world(0))
+    seen = []
+    for _ in range(3):
+        tick(world)
+        seen.append(world.meta.tick)
+    assert seen == [1, 2, 3]
+    world.save(tmp_path / "w.json")
+    assert World.load(tmp_path / "w.json").meta.tick == 3
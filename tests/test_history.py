@@ -0,0 +1,50 @@
+"""History.world_at(): re-simulation, its limit, and worlds that cannot be replayed."""
+
+import json
+import random
+
+import pytest
+
+from backend.core.world import World
+from backend.sim.engine import tick
+from backend.sim.history import History
+from backend.sim.hooks import hooks_of, open_package
+from backend.sim.oracle import random_world
+
+
+def _dump(world: World) -> str:
+    return json.dumps(world.to_dict(), sort_keys=True)
+
+
+def test_resimulation_matches_the_live_run_within_its_limit():
+    random.seed(5)
+    world = World.from_dict(random_world(5))
+    history = History(world, every=5, segments=1, keyframes=2)
+    states = {}
+    for _ in range(60):
+        tick(world)
+        history.record()
+        states[world.meta.tick] = _dump(world)
+    ticks = history._ticks
+    assert any(b - a > 5 for a, b in zip(ticks, ticks[1:]))   # keyframes were thinned
+    for tick_no in range(history.first + 1, ticks[-2]):
+        keyframe = max(t for t in ticks if t <= tick_no)
+        if tick_no - keyframe > 5:
+            with pytest.raises(ValueError, match="limit 5"):
+                history.world_at(tick_no, limit=5)
+        assert _dump(history.world_at(tick_no)) == states[tick_no]
+
+
+def test_worlds_with_hooks_are_not_resimulated():
+    world = open_package("worlds/valley")
+    try:
+        history = History(world, every=10, segments=2)
+        for _ in range(40):
+            tick(world)
+            history.record()
+        with pytest.raises(ValueError, match="package hooks"):
+            history.world_at(5)
+        assert history.world_at(10).meta.tick == 10    # keyframes need no replay
+        assert history.world_at(35).meta.tick == 35    # nor do retained deltas
+    finally:
+        hooks_of(world).close()
@@ -0,0 +1,45 @@
+"""Package hooks on the sample package worlds/valley: budgets, cut-offs, bad manifests."""
+
+from pathlib import Path
+
+import pytest
+
+from backend.sim.engine import tick
+from backend.sim.hooks import hooks_of, load_manifest, open_package, run
+
+VALLEY = Path("worlds/valley")
+
+
+def test_slow_hook_is_cut_off_and_its_worker_replaced():
+    # omens sleeps 0.5 s every 5th tick against a 0.05 s budget
+    result = run(VALLEY, ticks=12, seed=1)
+    assert result["omens"]["calls"] == 12
+    assert result["omens"]["late"] == 2          # ticks 5 and 10
+    assert result["omens"]["ok"] == 10
+    assert result["restarts"] == 2               # one worker killed per cut-off
+    assert result["slowest_tick_ms"] < 400       # nobody waited for the sleep
+    for name in ("weather", "flock"):
+        counts = result[name]
+        assert counts["calls"] == 12
+        assert counts["ok"] + counts["late"] + counts["failed"] == 12
+        assert counts["failed"] == 0
+
+
+def test_engine_hook_behaviors_reach_the_world():
+    world = open_package(VALLEY)
+    try:
+        tick(world)   # tick 1: raining
+        rained_on = {entity_id for entity_id, behaviors in hooks_of(world).modifiers.items()
+                     if ("RAIN", 1) in behaviors}
+        assert rained_on
+        assert all(world.location_of(entity_id).id != "BARN" for entity_id in rained_on)
+    finally:
+        hooks_of(world).close()
+
+
+def test_bad_manifest_is_a_value_error(tmp_path):
+    (tmp_path / "world.yaml").write_text(
+        "hooks:\n  - {name: x, module: nowhere.py, function: f, kind: engine, reads: ['*']}\n",
+        encoding="utf-8")
+    with pytest.raises(ValueError, match="no module"):
+        load_manifest(tmp_path)
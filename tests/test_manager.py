@@ -0,0 +1,22 @@
+"""WorldManager: worlds come back from a snapshot with their dialogue and hooks."""
+
+from backend.api.manager import WorldManager
+from backend.sim.dialogue import dialogue_of
+from backend.sim.hooks import hooks_of
+
+
+def test_dialogue_and_hooks_survive_eviction(tmp_path):
+    manager = WorldManager(tmp_path, tps=0.0)
+    manager.register("genesis", "worlds/genesis.json")
+    manager.register("valley", "worlds/valley")
+    try:
+        for _ in range(2):   # from the source, then from the snapshot
+            genesis, valley = manager.get("genesis"), manager.get("valley")
+            assert dialogue_of(genesis).pools
+            assert {h.name for h in hooks_of(valley).engine} == {"weather", "omens"}
+            assert hooks_of(valley).pool is not None
+            manager.close()
+            assert hooks_of(valley).pool is None   # eviction stops the workers
+        assert manager.evictions == 4
+    finally:
+        manager.close()
@@ -0,0 +1,45 @@
+"""MultiRate: cached regions follow moves, and the cache does not change results."""
+
+import json
+import random
+
+from backend.core.entity import EntityType
+from backend.core.world import World
+from backend.sim.multirate import MultiRate, Region, around, run_multirate
+from backend.sim.oracle import random_world
+
+
+def test_region_follows_a_move():
+    world = World.from_dict(random_world(0))
+    envis = sorted(e.id for e in world.entities.values() if e.type == EntityType.ENVI)
+    plan = MultiRate(world, regions=[Region("near", 1, frozenset({envis[0]}))], default=10)
+    try:
+        char = next(e for e in world.entities.values() if e.type == EntityType.CHAR
+                    and world.location_of(e.id).id != envis[0])
+        assert plan._region(char.id) is None
+        world.move(char.id, envis[0])
+        assert plan._region(char.id) == 0
+        world.move(char.id, envis[1])
+        assert plan._region(char.id) is None
+    finally:
+        plan.close()
+    assert plan._on_change not in world._listeners
+
+
+def test_cached_regions_match_fresh_lookups():
+    data = random_world(3)
+    runs = []
+    for fresh in (False, True):
+        random.seed(3)
+        world = World.from_dict(data)
+        regions = [Region("near", 1, around(world, "E1", 1))]
+        if fresh:   # forget every lookup before each tick
+            plan = MultiRate(world, {"triggers": 5}, regions, default=4)
+            for _ in range(60):
+                plan._regions.clear()
+                plan.step()
+            plan.close()
+        else:
+            run_multirate(world, 60, {"triggers": 5}, regions, default=4)
+        runs.append(json.dumps(world.to_dict(), sort_keys=True))
+    assert runs[0] == runs[1]
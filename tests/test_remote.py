@@ -0,0 +1,66 @@
+"""Remote brains against the stand-in (backend/api/brainstub.py): deadline and fallback."""
+
+import time
+
+import pytest
+
+from backend.api.brainstub import _serve_in_thread, create_app
+from backend.api.loadtest import _free_port
+from backend.core.world import World
+from backend.sim.engine import REMOTE, tick
+from backend.sim.oracle import deterministic, differences, random_world, state
+from backend.sim.remote import remote_of
+
+
+@pytest.fixture
+def stub():
+    """Start a stand-in; yields a function (latency, late) → its /decide URL."""
+    servers = []
+
+    def start(latency: float, late: float = 0.0) -> str:
+        port = _free_port()
+        servers.append(_serve_in_thread(create_app(latency, late=late, stall=5.0), port))
+        return f"http://127.0.0.1:{port}/decide"
+
+    yield start
+    for server in servers:
+        server.should_exit = True
+
+
+def _remote_world(url: str, deadline: float) -> tuple[World, list[str]]:
+    world = World.from_dict(deterministic(random_world(0)))
+    chars = [e.id for e in world.entities.values() if e.control is not None]
+    for entity_id in chars:
+        world.entities[entity_id].control = f"{REMOTE}{url}"
+    remote_of(world).deadline = deadline
+    return world, chars
+
+
+def test_answers_in_time(stub):
+    world, chars = _remote_world(stub(latency=0.01), deadline=1.0)
+    for _ in range(3):
+        tick(world)
+    stats = remote_of(world).stats
+    remote_of(world).close()
+    assert chars
+    assert stats["asked"] == stats["answered"] > 0
+    assert stats["late"] == stats["failed"] == 0
+
+
+def test_late_answers_fall_back_to_survival(stub):
+    deadline = 0.05
+    world, chars = _remote_world(stub(latency=0.0, late=1.0), deadline)
+    local = World.from_dict(deterministic(random_world(0)))   # the same CHARs on survival
+    moves = 0
+    started = time.perf_counter()
+    for _ in range(5):
+        tick(world)
+        moves += sum(": EAT " in line or ": MOVE " in line for line in tick(local))
+    elapsed = time.perf_counter() - started
+    stats = remote_of(world).stats
+    remote_of(world).close()
+    assert stats["answered"] == 0
+    assert stats["late"] == stats["asked"] == 5 * len(chars)
+    assert elapsed < 5 * (deadline + 0.5)   # the stalled answers are not waited for
+    assert moves > 0   # the fallback had something to do
+    assert differences(state(local), state(world)) == []
@@ -0,0 +1,44 @@
+"""World's relation index: related() against a full scan of world.relations."""
+
+from backend.core.entity import Entity, EntityType
+from backend.core.relation import Relation, RelationType
+from backend.core.world import World
+
+
+def _scan(world: World, type: RelationType, ent1: str | None = None) -> list[Relation]:
+    return [r for r in world.relations.values()
+            if r.type == type and (ent1 is None or r.ent1 == ent1)]
+
+
+def _world() -> World:
+    world = World("index")
+    for i in range(3):
+        world.add_entity(Entity(f"room{i}", EntityType.ENVI, id=f"E{i}"))
+        world.add_entity(Entity(f"char{i}", EntityType.CHAR, id=f"C{i}", hp=10))
+    for i in range(3):
+        world.add_relation(Relation(i + 1, RelationType.LOCATION, "E0", f"C{i}"))
+    world.add_relation(Relation(4, RelationType.EDGE, "E0", "E1"))
+    world.add_relation(Relation(5, RelationType.EDGE, "E1", "E2"))
+    return world
+
+
+def test_reindex_after_a_direct_edit():
+    world = _world()
+    assert world.related(RelationType.LOCATION, ent1="E0") == _scan(world, RelationType.LOCATION, "E0")
+    world.relations[2].ent1 = "E1"   # behind World's back, same number of relations
+    world.reindex()
+    for ent1 in ("E0", "E1"):
+        assert world.related(RelationType.LOCATION, ent1=ent1) == _scan(world, RelationType.LOCATION, ent1)
+
+
+def test_replaced_relation_keeps_its_place():
+    world = _world()
+    world.related(RelationType.EDGE)   # build the index
+    world.insert_relation(Relation(4, RelationType.EDGE, "E0", "E1", 3))   # same ends
+    world.insert_relation(Relation(1, RelationType.EDGE, "E2", "E0"))      # another type
+    assert list(world.relations) == [1, 2, 3, 4, 5]
+    for type in (RelationType.EDGE, RelationType.LOCATION):
+        assert world.related(type) == _scan(world, type)
+    assert world.related(RelationType.EDGE)[1].number == 3
+    assert world.touching(RelationType.EDGE, "E0") == [r for r in _scan(world, RelationType.EDGE)
+                                                       if "E0" in (r.ent1, r.ent2)]
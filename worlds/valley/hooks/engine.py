@@ -0,0 +1,35 @@
+"""Engine hooks of the Valley package (see backend/sim/hooks.py)."""
+
+import time
+
+RAIN_EVERY = 30      # a storm starts every RAIN_EVERY ticks …
+RAIN_TICKS = 10      # … and lasts this long
+OMEN_EVERY = 5       # omens brood this often — far longer than their budget
+
+
+def weather(view: dict) -> dict:
+    """Rain chills everyone out in the open; the barn keeps it off."""
+    tick = view["tick"]
+    raining = tick % RAIN_EVERY < RAIN_TICKS
+    log = []
+    if tick % RAIN_EVERY == 0:
+        log.append("Dark clouds roll down into the valley.")
+    elif tick % RAIN_EVERY == RAIN_TICKS:
+        log.append("The rain stops.")
+    behaviors = {}
+    if raining:
+        for entity in view["entities"]:
+            if entity["type"] == "CHAR" and entity["location"] not in (None, "BARN"):
+                behaviors[entity["id"]] = [["RAIN", 1]]
+    return {"behaviors": behaviors, "log": log}
+
+
+def omens(view: dict) -> dict:
+    """Deliberately slow: every OMEN_EVERY ticks it broods for half a second."""
+    if view["tick"] % OMEN_EVERY == 0:
+        time.sleep(0.5)
+    weak = [e for e in view["entities"] if e["hp"] is not None and e["hp"] < 20]
+    if not weak:
+        return {}
+    return {"behaviors": {e["id"]: [["DREAD", 1]] for e in weak},
+            "log": [f"A crow circles above {e['name']}." for e in weak]}
@@ -0,0 +1,17 @@
+"""Intents hook of the Valley package: the flock's brain (see backend/sim/hooks.py)."""
+
+
+def flock(view: dict) -> dict:
+    """Sheep graze in the meadow and head for the barn when they weaken."""
+    intents = []
+    for actor in view["actors"]:
+        hp, hp_max = actor["hp"], actor["hp_max"]
+        here, neighbours = actor["location"], actor["neighbours"]
+        if hp is None or hp_max is None:
+            continue
+        if hp < hp_max * 0.5 and here != "BARN" and neighbours:
+            home = "BARN" if "BARN" in neighbours else "MEADOW"   # the meadow leads to the barn
+            intents.append({"actor_id": actor["id"], "action": "MOVE", "target_id": home})
+        elif hp >= hp_max - 5 and here != "MEADOW" and "MEADOW" in neighbours:
+            intents.append({"actor_id": actor["id"], "action": "MOVE", "target_id": "MEADOW"})
+    return {"intents": intents}